@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# the registers file of the user is not touched by the benchmarks: the
+# conftest is imported before the benchmarks import `vimdcc.registers`
+os.environ.setdefault('REGISTER_DIR', tempfile.mkdtemp())
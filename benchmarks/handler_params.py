@@ -0,0 +1,101 @@
+"""Compare the handler parameters allocated for each key press.
+
+Before the keymap dispatcher, the normal mode filter built a `HandlerParams`
+dataclass for every handler on every key press. Now a single read only
+instance is built for the key press.
+
+Usage:
+    python -m benchmarks.handler_params
+
+"""
+import gc
+import sys
+import timeit
+import tracemalloc
+from typing import List, Callable, Optional
+from dataclasses import field, dataclass
+
+from PySide2.QtGui import QKeyEvent, QTextCursor
+from PySide2.QtCore import Qt, QEvent
+
+from vimdcc.handlers import normal, missing  # noqa: F401 register the handlers
+from vimdcc.status_bar import StatusBar, status_bar
+from vimdcc.editor_mode import Modes
+from vimdcc.handler_base import get_normal_handlers
+from vimdcc.handler_parameters import HandlerParams
+
+KEY_PRESSES = 100_000
+
+
+@dataclass
+class LegacyHandlerParams:
+    cursor: QTextCursor
+    event: QKeyEvent
+
+    keys: str
+    modifiers: List[str]
+
+    mode: Modes
+
+    count: Optional[int] = None
+
+    visual: bool = field(init=False)
+    anchor: QTextCursor.MoveMode = field(init=False)
+    status_bar: StatusBar = field(init=False)
+
+    def __post_init__(self):
+        self.visual = self.mode in [Modes.VISUAL, Modes.VISUAL_LINE, Modes.YANK,
+                                    Modes.DELETE, Modes.CHANGE]
+        self.anchor = QTextCursor.KeepAnchor if self.visual else QTextCursor.MoveAnchor
+        self.status_bar = status_bar
+
+
+def legacy_key_press(handlers: int, cursor: QTextCursor, event: QKeyEvent) -> list:
+    return [
+        LegacyHandlerParams(cursor=cursor, keys='w', modifiers=[], event=event,
+                            mode=Modes.NORMAL)
+        for _ in range(handlers)
+    ]
+
+
+def key_press(handlers: int, cursor: QTextCursor, event: QKeyEvent) -> list:
+    return [HandlerParams(cursor=cursor, keys='w', modifiers=[], event=event, mode=Modes.NORMAL)]
+
+
+def allocated_bytes(func: Callable[[], list]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    handlers = len(get_normal_handlers())
+    cursor = QTextCursor()
+    event = QKeyEvent(QEvent.KeyPress, Qt.Key_W, Qt.NoModifier, 'w')
+
+    print(f'{handlers} handlers, {KEY_PRESSES} key presses')
+    print(f'{"":<10}{"us/key":>10}{"bytes/key":>12}{"objects/key":>14}')
+
+    for name, func in [('dataclass', legacy_key_press), ('slots', key_press)]:
+        seconds = min(timeit.repeat(
+            lambda: func(handlers, cursor, event), number=KEY_PRESSES, repeat=3
+        ))
+        size = allocated_bytes(lambda: func(handlers, cursor, event))
+        objects = len(func(handlers, cursor, event))
+        print(f'{name:<10}{seconds / KEY_PRESSES * 1e6:>10.2f}{size:>12}{objects:>14}')
+
+    legacy = LegacyHandlerParams(cursor=cursor, keys='w', modifiers=[], event=event,
+                                 mode=Modes.NORMAL)
+    params = HandlerParams(cursor=cursor, keys='w', modifiers=[], event=event, mode=Modes.NORMAL)
+    print(
+        f'instance size: dataclass {sys.getsizeof(legacy) + sys.getsizeof(legacy.__dict__)}'
+        f' bytes, slots {sys.getsizeof(params)} bytes'
+    )
+
+
+if __name__ == '__main__':
+    main()
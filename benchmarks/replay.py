@@ -0,0 +1,154 @@
+"""Replay key sequences through the normal mode filter on large documents.
+
+A script of commands is replayed on generated documents of 1k, 10k and 100k
+lines, in an offscreen `QPlainTextEdit`. The latency of every command is
+recorded in a `LatencyHistogram` and reported with the throughput of the
+whole replay.
+
+The p50 of every step is compared to the baseline stored in
+`replay_baseline.json`: the benchmark exits with 1 when a step is slower than
+its baseline by more than the tolerance. The baseline depends on the machine,
+so it is not committed: store it with `--update` before making a change.
+
+Usage:
+    python -m benchmarks.replay
+    python -m benchmarks.replay --lines 1000 10000 --rounds 5
+    python -m benchmarks.replay --update
+
+"""
+import os
+import sys
+import json
+import pathlib
+import argparse
+import tempfile
+from time import perf_counter_ns
+from typing import Dict, List
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ.setdefault('REGISTER_DIR', tempfile.mkdtemp())
+
+from PySide2.QtWidgets import QApplication, QPlainTextEdit  # noqa: E402
+
+from vimdcc.macros import parse_notation  # noqa: E402
+from vimdcc.latency import LatencyHistogram  # noqa: E402
+from vimdcc.registers import Registers  # noqa: E402
+from vimdcc.editor_mode import Modes, EditorMode  # noqa: E402
+from vimdcc.editor_filters import EditorEventFilter  # noqa: E402
+
+BASELINE_FILE = pathlib.Path(__file__).parent / 'replay_baseline.json'
+
+LINES = (1_000, 10_000, 100_000)
+
+# every edit is undone by the steps after it, so every round replays the same
+# edits on the same text. The changes of `ciw` are two undo steps: the delete
+# and the typed text.
+SCRIPT = [
+    'gg', '20j', 'w', 'e', 'b', '5w', '$', '0', '}', '{',
+    'x', 'u', 'dd', 'u', 'yyp', 'u', 'dw', 'u', 'ciwname<Esc>', 'u', 'u',
+    'f(', 'di(', 'u', 'F"', 'h', 'viwgU', 'u', 'h', 'ya"', 'A # note<Esc>', 'u',
+    '/needle<CR>', 'n', 'N', '*', 'G', 'k',
+]
+
+# the same keys are timed separately at each step of the script
+STEPS = [f'{index:02} {command}' for index, command in enumerate(SCRIPT)]
+
+
+def generate_document(lines: int) -> str:
+    """A Python like document, with a `needle` every 97 lines."""
+    return '\n'.join(
+        f'    value_{i} = compute(first, "second", {i})  # needle {i}'
+        if i % 97 == 0 else
+        f'    value_{i} = compute(first, "second", {i})'
+        for i in range(lines)
+    )
+
+
+def replay(editor: QPlainTextEdit, rounds: int) -> Dict[str, LatencyHistogram]:
+    EditorMode.mode = Modes.NORMAL
+    event_filter = EditorEventFilter(editor)
+    scripts = [(step, parse_notation(command)) for step, command in zip(STEPS, SCRIPT)]
+    histograms = {step: LatencyHistogram() for step in STEPS}
+
+    for _ in range(rounds):
+        for step, events in scripts:
+            start = perf_counter_ns()
+            for event in events:
+                if not event_filter.eventFilter(editor, event):
+                    QApplication.sendEvent(editor, event)
+            histograms[step].record(perf_counter_ns() - start)
+
+    Registers.set_named_register(None)
+    return histograms
+
+
+def run(editor: QPlainTextEdit, lines: int, rounds: int) -> Dict[str, float]:
+    """Replay the script and return the p50 in microseconds of every step."""
+    editor.setPlainText(generate_document(lines))
+
+    start = perf_counter_ns()
+    histograms = replay(editor, rounds)
+    seconds = (perf_counter_ns() - start) / 1e9
+    keys = rounds * sum(len(parse_notation(command)) for command in SCRIPT)
+
+    print(f'\n{lines} lines, {rounds} rounds: {keys / seconds:,.0f} keys/s')
+    print(f'{"step":<18}{"p50 us":>10}{"p95 us":>10}{"max us":>10}')
+    for step, histogram in histograms.items():
+        print(
+            f'{step:<18}{histogram.percentile(50) / 1000:>10.1f}'
+            f'{histogram.percentile(95) / 1000:>10.1f}{histogram.max / 1000:>10.1f}'
+        )
+
+    return {step: histogram.percentile(50) / 1000 for step, histogram in histograms.items()}
+
+
+def regressions(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float
+) -> List[str]:
+    slower: List[str] = []
+    for lines, steps in results.items():
+        for step, p50 in steps.items():
+            expected = baseline.get(lines, {}).get(step)
+            if expected is not None and p50 > expected * (1 + tolerance):
+                slower.append(f'{lines} lines {step}: {p50:.1f}us, baseline {expected:.1f}us')
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, nargs='+', default=LINES)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='allowed slowdown of the p50, 0.5 is 50%% slower')
+    parser.add_argument('--update', action='store_true', help='store the results as baseline')
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication([])  # noqa: F841
+
+    # the editors are kept alive until the end: the document indexes are
+    # still connected to the documents of the previous runs
+    editors = [QPlainTextEdit() for _ in args.lines]
+    results = {
+        str(lines): run(editor, lines, args.rounds)
+        for editor, lines in zip(editors, args.lines)
+    }
+
+    if args.update:
+        BASELINE_FILE.write_text(json.dumps(results, indent=4) + '\n')
+        print(f'\nBaseline written to {BASELINE_FILE}')
+        return 0
+
+    if not BASELINE_FILE.exists():
+        print('\nNo baseline, run with --update to store one')
+        return 0
+
+    slower = regressions(results, json.loads(BASELINE_FILE.read_text()), args.tolerance)
+    for line in slower:
+        print(f'REGRESSION {line}')
+    return 1 if slower else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
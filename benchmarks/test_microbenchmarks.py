@@ -0,0 +1,127 @@
+"""Microbenchmarks of the search, text object, register and index functions.
+
+The inputs grow from a few bytes to 10 MB, with the worst cases of each
+function (no match, deep nesting, escaped quotes), so the scaling of the
+algorithms can be compared across releases.
+
+Usage:
+    python -m pytest benchmarks -p no:randomly --no-cov
+    python -m pytest benchmarks -p no:randomly --no-cov --benchmark-autosave
+    python -m pytest benchmarks -p no:randomly --no-cov --benchmark-compare
+
+"""
+from functools import lru_cache
+
+import pytest
+from PySide2.QtWidgets import QPlainTextEdit
+
+from vimdcc.settings import Settings
+from vimdcc.registers import Clipboard
+from vimdcc.text_objects import (MatchingCharacter, find_matching_quotes,
+                                 find_matching_brackets)
+from vimdcc.document_index import get_blank_block_index
+from vimdcc.commands.search import _find, _find_next_up, _find_next_down
+
+SIZES = {
+    'tiny': 100,
+    '10kb': 10_000,
+    '1mb': 1_000_000,
+    '10mb': 10_000_000,
+}
+
+LINE = '    value = compute(first, "second", third)  # needle\n'
+
+# the calibration of pytest-benchmark runs the large inputs hundreds of times
+LARGE_ROUNDS = 3
+
+# every round adds a new item, which has to be built beforehand
+CLIPBOARD_ROUNDS = 200
+
+
+@lru_cache(maxsize=None)
+def code(size: int) -> str:
+    return (LINE * (size // len(LINE) + 1))[:size]
+
+
+def run(benchmark, size: str, func, *args):
+    if SIZES[size] >= SIZES['1mb']:
+        return benchmark.pedantic(func, args=args, rounds=LARGE_ROUNDS, iterations=1)
+    return benchmark(func, *args)
+
+
+@pytest.fixture(params=SIZES)
+def size(request) -> str:
+    return request.param
+
+
+@pytest.mark.parametrize('search', ['n', 'needle', 'missing'])
+def test_find(benchmark, size: str, search: str):
+    run(benchmark, size, _find, search, code(SIZES[size]))
+
+
+@pytest.mark.parametrize('find_next', [_find_next_down, _find_next_up])
+def test_find_next(benchmark, size: str, find_next):
+    positions = _find('needle', code(SIZES[size]))
+    run(benchmark, size, find_next, positions, SIZES[size] // 2)
+
+
+def test_brackets_code(benchmark, size: str):
+    text = code(SIZES[size])
+    position = text.index('compute', SIZES[size] // 2) + 10
+    result = run(benchmark, size, find_matching_brackets,
+                 text, MatchingCharacter.PARENTHESIS, position, -1)
+    assert result is not None
+
+
+def test_brackets_deep_nesting(benchmark, size: str):
+    depth = SIZES[size] // 2
+    text = '(' * depth + ')' * depth
+    result = run(benchmark, size, find_matching_brackets,
+                 text, MatchingCharacter.PARENTHESIS, depth, -1)
+    assert result == (depth - 1, depth)
+
+
+def test_brackets_no_match(benchmark, size: str):
+    text = 'x' * SIZES[size]
+    result = run(benchmark, size, find_matching_brackets,
+                 text, MatchingCharacter.PARENTHESIS, SIZES[size] // 2, -1)
+    assert result is None
+
+
+def test_quotes_escaped(benchmark, size: str):
+    middle = SIZES[size] // 4
+    text = '"' + '\\"' * middle + 'x' + '\\"' * middle + '"'
+    result = run(benchmark, size, find_matching_quotes, text, '"', len(text) // 2, len(text))
+    assert result == (0, len(text) - 1)
+
+
+def test_quotes_no_match(benchmark, size: str):
+    text = 'x' * SIZES[size]
+    result = run(benchmark, size, find_matching_quotes, text, '"', SIZES[size] // 2, len(text))
+    assert result is None
+
+
+@pytest.mark.parametrize('history', [100, 10_000])
+def test_clipboard_add(benchmark, monkeypatch, size: str, history: int):
+    monkeypatch.setattr(Settings, 'copy_to_system_clipboard', False)
+    clipboard = Clipboard([str(i) for i in range(history)])
+    clipboard.size = history
+    rounds = LARGE_ROUNDS if SIZES[size] >= SIZES['1mb'] else CLIPBOARD_ROUNDS
+    items = iter([code(SIZES[size]) + str(i) for i in range(rounds)])
+
+    # a different item each round (the same one in a row is not added), built
+    # outside of the timed call
+    benchmark.pedantic(clipboard.add, setup=lambda: ((next(items),), {}), rounds=rounds)
+
+
+@pytest.mark.parametrize('lines', [1_000, 100_000])
+def test_blank_block_index_new_lines(benchmark, qapp, lines: int):
+    editor = QPlainTextEdit()
+    editor.setPlainText('\n'.join('' if i % 3 == 0 else 'code' for i in range(lines)))
+    index = get_blank_block_index(editor.document())
+    cursor = editor.textCursor()
+    cursor.setPosition(len('\ncode\ncode') * 10)
+
+    # every new line shifts the blank lines below it
+    benchmark(cursor.insertText, '\n')
+    assert index.next_blank(lines // 2) is not None
@@ -0,0 +1,71 @@
+import pytest
+from PySide2.QtGui import QKeyEvent
+from PySide2.QtCore import Qt, QEvent
+from pytestqt.qtbot import QtBot
+from PySide2.QtWidgets import QPlainTextEdit
+
+from vimdcc.editor_mode import Modes
+from vimdcc.handlers.normal import CommandLineHandler
+from vimdcc.handler_parameters import HandlerParams
+
+
+@pytest.fixture()
+def editor(qtbot: QtBot) -> QPlainTextEdit:
+    return QPlainTextEdit()
+
+
+@pytest.fixture()
+def handler(editor: QPlainTextEdit) -> CommandLineHandler:
+    return CommandLineHandler(editor)
+
+
+def enter_event() -> QKeyEvent:
+    return QKeyEvent(QEvent.KeyPress, Qt.Key_Return, Qt.NoModifier)
+
+
+@pytest.mark.parametrize('keys, cursor_start, expected_line, expected_column', [
+    (':1', 30, 0, 2),
+    (':3', 5, 2, 5),
+    (':18000', 0, 17999, 0),
+    (':99999', 3, 19999, 3),
+    (':0', 8, 0, 1),
+])
+def test_go_to_line(
+    handler: CommandLineHandler,
+    keys: str,
+    cursor_start: int,
+    expected_line: int,
+    expected_column: int
+):
+    editor = handler.editor
+    editor.setPlainText('\n'.join(f'line {i}' for i in range(20000)))
+
+    params = HandlerParams(
+        cursor=editor.textCursor(),
+        keys=keys,
+        modifiers=[],
+        event=enter_event(),
+        mode=Modes.NORMAL
+    )
+
+    params.cursor.setPosition(cursor_start)
+    assert handler.handle(params)
+
+    assert params.cursor.blockNumber() == expected_line
+    assert params.cursor.positionInBlock() == expected_column
+
+
+def test_command_line_needs_enter(handler: CommandLineHandler):
+    editor = handler.editor
+    editor.setPlainText('foo\nbar')
+
+    params = HandlerParams(
+        cursor=editor.textCursor(),
+        keys=':2',
+        modifiers=[],
+        event=QKeyEvent(QEvent.KeyPress, Qt.Key_2, Qt.NoModifier, '2'),
+        mode=Modes.NORMAL
+    )
+
+    assert not handler.handle(params)
+    assert params.cursor.position() == 0
@@ -7,6 +7,7 @@
 
 from vimdcc.editor_mode import Modes
 from vimdcc.handlers.normal import DocumentHandler
+from vimdcc.commands.document import visible_lines
 from vimdcc.handler_parameters import HandlerParams
 
 
@@ -53,7 +54,7 @@ def test_move_document_no_selection(handler: DocumentHandler, data: MotionTest)
     params.cursor.setPosition(data.cursor_start)
 
     for motion in data.motion:
-        params.keys = motion
+        params = params.replace(keys=motion)
         handler.handle(params)
         editor.setTextCursor(params.cursor)
 
@@ -93,7 +94,7 @@ def test_move_document_selection(handler: DocumentHandler, data: MotionTest) ->
     params.cursor.setPosition(data.cursor_start)
 
     for motion in data.motion:
-        params.keys = motion
+        params = params.replace(keys=motion)
         handler.handle(params)
         editor.setTextCursor(params.cursor)
 
@@ -126,7 +127,7 @@ def test_move_document_edit(handler: DocumentHandler, data: MotionTest) -> None:
     params.cursor.setPosition(data.cursor_start)
 
     for motion in data.motion:
-        params.keys = motion
+        params = params.replace(keys=motion)
         handler.handle(params)
         editor.setTextCursor(params.cursor)
 
@@ -156,7 +157,7 @@ def test_move_document_delete(handler: DocumentHandler, data: MotionTest) -> Non
     params.cursor.setPosition(data.cursor_start)
 
     for motion in data.motion:
-        params.keys = motion
+        params = params.replace(keys=motion)
         handler.handle(params)
         editor.setTextCursor(params.cursor)
 
@@ -184,9 +185,156 @@ def test_move_document_yank(handler: DocumentHandler, data: MotionTest) -> None:
     params.cursor.setPosition(data.cursor_start)
 
     for motion in data.motion:
-        params.keys = motion
+        params = params.replace(keys=motion)
         handler.handle(params)
         editor.setTextCursor(params.cursor)
 
     register = handler.registers.get_clipboard()
     assert register[0] == data.expected_text
+
+
+@pytest.mark.parametrize('keys, start_line, pages', [
+    ('<C-d>', 0, 0.5),
+    ('<C-f>', 0, 1),
+    ('<C-u>', 150, -0.5),
+    ('<C-b>', 150, -1),
+])
+def test_scroll_document(handler: DocumentHandler, keys: str, start_line: int, pages: float):
+    editor = handler.editor
+    editor.resize(300, 300)
+    editor.setPlainText('\n'.join(f'line {i}' for i in range(200)))
+
+    params = HandlerParams(
+        cursor=editor.textCursor(),
+        keys=keys,
+        modifiers=['ctrl'],
+        event=None,
+        mode=Modes.NORMAL
+    )
+
+    block = editor.document().findBlockByNumber(start_line)
+    params.cursor.setPosition(block.position() + 2)
+    editor.verticalScrollBar().setValue(start_line)
+
+    handler.handle(params)
+
+    lines = int(visible_lines(editor) * abs(pages))
+    expected_line = start_line + lines if pages > 0 else start_line - lines
+
+    assert params.cursor.blockNumber() == expected_line
+    assert params.cursor.positionInBlock() == 2
+    assert editor.verticalScrollBar().value() == min(
+        expected_line, editor.verticalScrollBar().maximum()
+    )
+
+
+@pytest.mark.parametrize('keys, start_line, expected_line', [
+    ('<C-d>', 195, 199),
+    ('<C-f>', 195, 199),
+    ('<C-u>', 3, 0),
+    ('<C-b>', 3, 0),
+])
+def test_scroll_document_bounds(
+    handler: DocumentHandler, keys: str, start_line: int, expected_line: int
+):
+    editor = handler.editor
+    editor.resize(300, 300)
+    editor.setPlainText('\n'.join(f'line {i}' for i in range(200)))
+
+    params = HandlerParams(
+        cursor=editor.textCursor(),
+        keys=keys,
+        modifiers=['ctrl'],
+        event=None,
+        mode=Modes.NORMAL
+    )
+
+    params.cursor.setPosition(editor.document().findBlockByNumber(start_line).position())
+    handler.handle(params)
+
+    assert params.cursor.blockNumber() == expected_line
+
+
+@pytest.mark.parametrize('data', [
+    MotionTest(['}'], 'foo\n\nbar\n\nfoo\n\nbar', 0, '\n', 9),
+    MotionTest(['}'], 'foo\n\nbar\n\nfoo\n\nbar', 4, '\n', 14),
+    MotionTest(['{'], 'foo\n\nbar\n\nfoo\n\nbar', 17, '\n', 9),
+])
+def test_move_paragraph_count(handler: DocumentHandler, data: MotionTest) -> None:
+    editor = handler.editor
+    editor.setPlainText(data.text)
+
+    params = HandlerParams(
+        cursor=editor.textCursor(),
+        keys='',
+        modifiers=[],
+        event=None,
+        mode=Modes.NORMAL,
+        count=2,
+    )
+
+    params.cursor.setPosition(data.cursor_start)
+
+    for motion in data.motion:
+        params = params.replace(keys=motion)
+        handler.handle(params)
+        editor.setTextCursor(params.cursor)
+
+    assert editor.textCursor().position() == data.expected_pos
+    assert editor.toPlainText()[data.expected_pos] == data.expected_text
+
+
+def test_move_paragraph_after_edit(handler: DocumentHandler) -> None:
+    editor = handler.editor
+    editor.setPlainText('foo\n\nbar\n\nfoo')
+
+    params = HandlerParams(
+        cursor=editor.textCursor(),
+        keys='}',
+        modifiers=[],
+        event=None,
+        mode=Modes.NORMAL
+    )
+
+    handler.handle(params)
+    assert params.cursor.position() == 4
+
+    cursor = editor.textCursor()
+    cursor.setPosition(0)
+    cursor.insertText('new\n\n')
+
+    params.cursor.setPosition(0)
+    handler.handle(params)
+    assert params.cursor.position() == 4
+
+    handler.handle(params)
+    assert params.cursor.position() == 9
+
+
+@pytest.mark.parametrize('keys, count, cursor_start, expected_pos', [
+    ('G', 2, 0, 4),
+    ('G', 3, 2, 10),
+    ('G', 1, 13, 2),
+    ('G', 99, 1, 16),
+    ('gg', 2, 14, 6),
+    ('gg', 1, 6, 2),
+])
+def test_move_to_line_count(
+    handler: DocumentHandler, keys: str, count: int, cursor_start: int, expected_pos: int
+) -> None:
+    editor = handler.editor
+    editor.setPlainText('foo\nbar\nfoobar\nbar')
+
+    params = HandlerParams(
+        cursor=editor.textCursor(),
+        keys=keys,
+        modifiers=[],
+        event=None,
+        mode=Modes.NORMAL,
+        count=count,
+    )
+
+    params.cursor.setPosition(cursor_start)
+    handler.handle(params)
+
+    assert params.cursor.position() == expected_pos
@@ -0,0 +1,108 @@
+import random
+from typing import List
+
+import pytest
+from PySide2.QtGui import QTextCursor
+from pytestqt.qtbot import QtBot
+from PySide2.QtWidgets import QPlainTextEdit
+
+from vimdcc.document_index import get_blank_block_index
+
+
+@pytest.fixture()
+def editor(qtbot: QtBot) -> QPlainTextEdit:
+    return QPlainTextEdit()
+
+
+def blank_blocks(text: str) -> List[int]:
+    return [i for i, line in enumerate(text.split('\n')) if line == '']
+
+
+def test_blank_block_index_build(editor: QPlainTextEdit):
+    editor.setPlainText('foo\n\nbar\n\n\nfoo')
+    index = get_blank_block_index(editor.document())
+
+    assert index.blocks == [1, 3, 4]
+    assert index is get_blank_block_index(editor.document())
+
+
+@pytest.mark.parametrize('position, removed, inserted', [
+    (0, 0, 'new\n\n'),
+    (3, 0, '\n'),
+    (4, 1, ''),
+    (2, 6, ''),
+    (5, 0, 'a'),
+    (0, 0, '\n\n\n'),
+    (18, 0, '\nlast\n'),
+    (0, 18, ''),
+    (7, 3, 'x\n\ny'),
+])
+def test_blank_block_index_edit(
+    editor: QPlainTextEdit, position: int, removed: int, inserted: str
+):
+    text = 'foo\n\nbar\n\n\nfoo\n\nbar'
+    editor.setPlainText(text)
+    index = get_blank_block_index(editor.document())
+
+    cursor = editor.textCursor()
+    cursor.setPosition(position)
+    cursor.setPosition(position + removed, QTextCursor.KeepAnchor)
+    cursor.insertText(inserted)
+
+    expected = text[:position] + inserted + text[position + removed:]
+    assert editor.toPlainText() == expected
+    assert index.blocks == blank_blocks(expected)
+
+
+def test_blank_block_index_invalidated_wrapper(editor: QPlainTextEdit):
+    editor.setPlainText('foo\n\nbar')
+    index = get_blank_block_index(editor.document())
+
+    # invalidates the wrapper of the document given to the index
+    editor.textCursor().document()
+    editor.textCursor().insertText('new\n')
+
+    assert get_blank_block_index(editor.document()) is index
+    assert index.blocks == [2]
+
+
+def test_blank_block_index_lookup(editor: QPlainTextEdit):
+    editor.setPlainText('foo\n\nbar\n\nfoo\n\nbar')
+    index = get_blank_block_index(editor.document())
+
+    assert index.next_blank(0) == 1
+    assert index.next_blank(1) == 3
+    assert index.next_blank(0, 3) == 5
+    assert index.next_blank(0, 4) is None
+    assert index.previous_blank(6) == 5
+    assert index.previous_blank(5) == 3
+    assert index.previous_blank(6, 3) == 1
+    assert index.previous_blank(1) is None
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_blank_block_index_random_edits(editor: QPlainTextEdit, seed: int):
+    rng = random.Random(seed)
+    text = 'foo\n\nbar\n\n\nfoo\n\nbar\n' * 5
+    editor.setPlainText(text)
+    index = get_blank_block_index(editor.document())
+    cursor = editor.textCursor()
+
+    for _ in range(100):
+        position = rng.randint(0, len(text))
+        removed = rng.randint(0, 4) if rng.random() < 0.4 else 0
+        inserted = rng.choice(['', 'x', '\n', '\n\n', 'a\nb'])
+        cursor.setPosition(position)
+        cursor.setPosition(min(position + removed, len(text)), QTextCursor.KeepAnchor)
+        cursor.insertText(inserted)
+        text = editor.toPlainText()
+
+        # the lookups read the entries with the pending shift
+        expected = blank_blocks(text)
+        number = rng.randint(0, text.count('\n'))
+        following = [block for block in expected if block > number]
+        preceding = [block for block in expected if block < number]
+        assert index.next_blank(number) == (following[0] if following else None)
+        assert index.previous_blank(number) == (preceding[-1] if preceding else None)
+
+    assert index.blocks == blank_blocks(text)
@@ -0,0 +1,56 @@
+import gc
+
+import shiboken2
+from PySide2.QtGui import QTextDocument
+from pytestqt.qtbot import QtBot
+from PySide2.QtWidgets import QPlainTextEdit
+
+from vimdcc.headless import HeadlessDocument
+from vimdcc.document_registry import DocumentRef, DocumentRegistry
+
+
+def test_registry_invalidated_wrapper(qtbot: QtBot):
+    registry = DocumentRegistry(lambda document: object())
+    editor = QPlainTextEdit()
+    value = registry.get(editor.document())
+
+    # PySide2 invalidates the wrapper, the next call returns a new one
+    wrapper = editor.document()
+    editor.textCursor().document()
+    assert not shiboken2.isValid(wrapper)
+
+    assert registry.get(editor.document()) is value
+
+
+def test_registry_destroyed(qtbot: QtBot):
+    registry = DocumentRegistry(lambda document: object())
+    document = QTextDocument()
+    registry.get(document)
+    assert len(registry) == 1
+
+    shiboken2.delete(document)
+    assert len(registry) == 0
+
+
+def test_registry_headless():
+    registry = DocumentRegistry(lambda document: object())
+    document = HeadlessDocument('foo')
+    assert registry.get(document) is registry.get(document)
+
+    del document
+    gc.collect()
+    assert len(registry) == 0
+
+
+def test_document_ref(qtbot: QtBot):
+    editor = QPlainTextEdit()
+    editor.setPlainText('foo\nbar')
+    ref = DocumentRef(editor.document())
+
+    editor.textCursor().document()
+    assert ref().blockCount() == 2
+
+    document = QTextDocument()
+    ref = DocumentRef(document)
+    shiboken2.delete(document)
+    assert ref() is None
@@ -56,7 +56,7 @@ def test_edit_handler(handler: EditHandler, data: MotionTest) -> None:
     params.cursor.setPosition(data.cursor_start)
 
     for motion in data.motion:
-        params.keys = motion
+        params = params.replace(keys=motion)
         handler.handle(params)
         editor.setTextCursor(params.cursor)
 
@@ -64,3 +64,33 @@ def test_edit_handler(handler: EditHandler, data: MotionTest) -> None:
 
     assert editor.toPlainText() == data.expected_text
     assert handler.mode == data.expected_mode
+
+
+@pytest.mark.parametrize('data', [
+    MotionTest(['x'], 'abcdef', 1, 'aef', Modes.NORMAL),
+    MotionTest(['x'], 'abc\ndef', 1, 'a\ndef', Modes.NORMAL),
+    MotionTest(['X'], 'abcdef', 4, 'aef', Modes.NORMAL),
+    MotionTest(['X'], 'abc\ndef', 5, 'abc\nef', Modes.NORMAL),
+    MotionTest(['s'], 'abcdef', 1, 'aef', Modes.INSERT),
+    MotionTest(['C'], 'foo bar\nbaz\nqux\nend', 4, 'foo \nend', Modes.INSERT),
+    MotionTest(['D'], 'foo bar\nbaz\nqux\nend', 4, 'foo \nend', Modes.NORMAL),
+    MotionTest(['D'], 'foo bar\nbaz', 4, 'foo ', Modes.NORMAL),
+])
+def test_edit_handler_count(handler: EditHandler, data: MotionTest) -> None:
+    editor = handler.editor
+    editor.setPlainText(data.text)
+    handler.mode = Modes.NORMAL
+
+    params = HandlerParams(
+        cursor=editor.textCursor(),
+        keys=data.motion[0],
+        modifiers=[],
+        event=None,
+        mode=Modes.NORMAL,
+        count=3,
+    )
+    params.cursor.setPosition(data.cursor_start)
+    handler.handle(params)
+
+    assert editor.toPlainText() == data.expected_text
+    assert handler.mode == data.expected_mode
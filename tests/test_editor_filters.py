@@ -0,0 +1,78 @@
+import pytest
+from PySide2.QtGui import QKeyEvent
+from PySide2.QtCore import Qt, QEvent
+from pytestqt.qtbot import QtBot
+from PySide2.QtWidgets import QPlainTextEdit
+
+from vimdcc.editor_mode import Modes, EditorMode
+from vimdcc.editor_filters import EditorEventFilter
+from vimdcc.handlers.normal import (EditHandler, YankHandler, InsertHandler,
+                                    MotionHandler, UndoRedoHandler)
+
+
+@pytest.fixture()
+def editor(qtbot: QtBot) -> QPlainTextEdit:
+    EditorMode.mode = Modes.NORMAL
+    editor = QPlainTextEdit()
+    editor.setPlainText('one two')
+    yield editor
+    EditorMode.mode = Modes.NORMAL
+
+
+@pytest.fixture()
+def event_filter(editor: QPlainTextEdit) -> EditorEventFilter:
+    return EditorEventFilter(editor, [MotionHandler, InsertHandler])
+
+
+def key_press(key: int, text: str = '') -> QKeyEvent:
+    return QKeyEvent(QEvent.KeyPress, key, Qt.NoModifier, text)
+
+
+def test_filter_modes(event_filter: EditorEventFilter):
+    for mode in Modes:
+        mode_filter = event_filter._mode_filters[mode]
+        if mode == Modes.INSERT:
+            assert mode_filter is event_filter.insert_filter
+        else:
+            assert mode_filter is event_filter.normal_filter
+
+
+def test_filter_ignores_other_events(editor: QPlainTextEdit, event_filter: EditorEventFilter):
+    assert event_filter.eventFilter(editor, QEvent(QEvent.Paint)) is False
+    assert event_filter.eventFilter(editor, QKeyEvent(
+        QEvent.KeyRelease, Qt.Key_W, Qt.NoModifier, 'w')) is False
+    assert editor.textCursor().position() == 0
+
+
+def test_filter_dispatch_mode(editor: QPlainTextEdit, event_filter: EditorEventFilter):
+    assert event_filter.eventFilter(editor, key_press(Qt.Key_W, 'w')) is True
+    assert editor.textCursor().position() == 4
+
+    assert event_filter.eventFilter(editor, key_press(Qt.Key_I, 'i')) is True
+    assert EditorMode.mode == Modes.INSERT
+
+    # the key is not consumed so the editor inserts the text
+    assert event_filter.eventFilter(editor, key_press(Qt.Key_W, 'w')) is False
+    assert editor.textCursor().position() == 4
+
+    assert event_filter.eventFilter(editor, key_press(Qt.Key_Escape)) is True
+    assert EditorMode.mode == Modes.NORMAL
+
+
+@pytest.mark.parametrize('keys, undo', [
+    ('rx', 'u'),
+    ('ddp', 'uu'),
+    ('yyP', 'u'),
+    ('xrx', 'uu'),
+])
+def test_filter_command_undo(qtbot: QtBot, keys: str, undo: str):
+    EditorMode.mode = Modes.NORMAL
+    editor = QPlainTextEdit()
+    editor.setPlainText('one\ntwo')
+    event_filter = EditorEventFilter(editor, [EditHandler, YankHandler, UndoRedoHandler])
+
+    for key in keys + undo:
+        event_filter.eventFilter(editor, key_press(ord(key.upper()), key))
+
+    # each command is a single undo step
+    assert editor.toPlainText() == 'one\ntwo'
@@ -0,0 +1,47 @@
+import pytest
+from PySide2.QtGui import QTextCursor
+
+from vimdcc.editor_mode import Modes
+from vimdcc.handler_parameters import HandlerParams
+
+
+@pytest.fixture()
+def params() -> HandlerParams:
+    return HandlerParams(
+        cursor=QTextCursor(),
+        keys='w',
+        modifiers=[],
+        event=None,
+        mode=Modes.NORMAL
+    )
+
+
+def test_params_are_read_only(params: HandlerParams):
+    with pytest.raises(AttributeError):
+        params.keys = 'b'
+
+    with pytest.raises(AttributeError):
+        params.other = 'b'
+
+
+def test_params_replace(params: HandlerParams):
+    other = params.replace(keys='b', count=3)
+
+    assert other.keys == 'b'
+    assert other.count == 3
+    assert other.cursor is params.cursor
+    assert params.keys == 'w'
+    assert params.count is None
+
+
+@pytest.mark.parametrize('mode, visual, anchor', [
+    (Modes.NORMAL, False, QTextCursor.MoveAnchor),
+    (Modes.VISUAL, True, QTextCursor.KeepAnchor),
+    (Modes.VISUAL_LINE, True, QTextCursor.KeepAnchor),
+    (Modes.DELETE, True, QTextCursor.KeepAnchor),
+])
+def test_params_visual(params: HandlerParams, mode: Modes, visual: bool, anchor):
+    params = params.replace(mode=mode)
+
+    assert params.visual is visual
+    assert params.anchor == anchor
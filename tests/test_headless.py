@@ -0,0 +1,309 @@
+import os
+import sys
+import subprocess
+
+import pytest
+from PySide2.QtGui import QTextCursor
+from pytestqt.qtbot import QtBot
+from PySide2.QtWidgets import QApplication, QPlainTextEdit
+
+from vimdcc.macros import parse_notation
+from vimdcc.headless import HeadlessEditor
+from vimdcc.registers import Registers
+from vimdcc.editor_mode import Modes, EditorMode
+from vimdcc.editor_filters import EditorEventFilter
+
+TEXTS = [
+    'one two',
+    'foo.bar(baz)  x',
+    'a\n\nb c\n  d',
+    'x = [1, 2]; y_z',
+    "it's ok\tgo",
+    'x  \ny',
+    '  ',
+    '',
+]
+
+MOVE_OPERATIONS = [
+    QTextCursor.NextCharacter,
+    QTextCursor.PreviousCharacter,
+    QTextCursor.StartOfLine,
+    QTextCursor.EndOfLine,
+    QTextCursor.Start,
+    QTextCursor.End,
+    QTextCursor.NextWord,
+    QTextCursor.PreviousWord,
+    QTextCursor.EndOfWord,
+    QTextCursor.StartOfWord,
+    QTextCursor.NextBlock,
+    QTextCursor.PreviousBlock,
+]
+
+TEXT = 'def foo(bar, baz):\n    return "one two"\n\nfoo(1, 2)  # three'
+
+
+@pytest.fixture(autouse=True)
+def normal_mode():
+    EditorMode.mode = Modes.NORMAL
+    yield
+    EditorMode.mode = Modes.NORMAL
+
+
+def qt_editor(text: str) -> QPlainTextEdit:
+    editor = QPlainTextEdit()
+    editor.setPlainText(text)
+    return editor
+
+
+@pytest.mark.parametrize('text', TEXTS)
+@pytest.mark.parametrize('operation', MOVE_OPERATIONS)
+def test_move_position(qtbot: QtBot, text: str, operation: QTextCursor.MoveOperation):
+    editor = qt_editor(text)
+    headless = HeadlessEditor(text)
+
+    for position in range(len(text) + 1):
+        for mode in (QTextCursor.MoveAnchor, QTextCursor.KeepAnchor):
+            expected = editor.textCursor()
+            expected.setPosition(position)
+            moved = expected.movePosition(operation, mode)
+
+            cursor = headless.textCursor()
+            cursor.setPosition(position)
+            assert cursor.movePosition(operation, mode) == moved, position
+            assert (cursor.position(), cursor.anchor()) == (
+                expected.position(), expected.anchor()
+            ), position
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_select_word(qtbot: QtBot, text: str):
+    editor = qt_editor(text)
+    headless = HeadlessEditor(text)
+
+    for position in range(len(text) + 1):
+        expected = editor.textCursor()
+        expected.setPosition(position)
+        expected.select(QTextCursor.WordUnderCursor)
+
+        cursor = headless.textCursor()
+        cursor.setPosition(position)
+        cursor.select(QTextCursor.WordUnderCursor)
+        assert cursor.selectedText() == expected.selectedText(), position
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_document(qtbot: QtBot, text: str):
+    editor = qt_editor(text)
+    document = editor.document()
+    headless = HeadlessEditor(text).document()
+
+    assert headless.blockCount() == document.blockCount()
+    assert headless.characterCount() == document.characterCount()
+
+    for position in range(len(text) + 2):
+        assert headless.characterAt(position) == document.characterAt(position)
+        assert headless.findBlock(position).blockNumber() == (
+            document.findBlock(position).blockNumber()
+        )
+
+    for number in range(document.blockCount() + 1):
+        block = document.findBlockByNumber(number)
+        assert headless.findBlockByNumber(number).isValid() == block.isValid()
+        assert headless.findBlockByNumber(number).text() == block.text()
+        assert headless.findBlockByNumber(number).length() == block.length()
+
+
+def test_vertical_move():
+    cursor = HeadlessEditor('abcd\nx\nabcd').textCursor()
+    cursor.setPosition(3)
+
+    assert cursor.movePosition(QTextCursor.Down)
+    assert cursor.position() == 6
+
+    # the column is kept across the short line
+    assert cursor.movePosition(QTextCursor.Down)
+    assert cursor.position() == 10
+
+    assert not cursor.movePosition(QTextCursor.Down)
+    assert cursor.position() == 10
+
+    assert not cursor.movePosition(QTextCursor.Up, QTextCursor.KeepAnchor, 5)
+    assert (cursor.anchor(), cursor.position()) == (10, 3)
+
+
+@pytest.mark.parametrize('operation', [
+    QTextCursor.NextCell, QTextCursor.PreviousCell, QTextCursor.NextRow, QTextCursor.PreviousRow,
+])
+def test_move_position_unsupported(qtbot: QtBot, operation: QTextCursor.MoveOperation):
+    editor = qt_editor(TEXT)
+    expected = editor.textCursor()
+    expected.setPosition(5)
+    cursor = HeadlessEditor(TEXT).textCursor()
+    cursor.setPosition(5)
+
+    assert cursor.movePosition(operation) == expected.movePosition(operation) is False
+    assert cursor.position() == expected.position() == 5
+
+
+def test_cursors_follow_edits():
+    editor = HeadlessEditor('hello world')
+    cursor = editor.textCursor()
+    cursor.setPosition(8)
+
+    other = editor.textCursor()
+    other.setPosition(2)
+    other.setPosition(7, QTextCursor.KeepAnchor)
+    other.removeSelectedText()
+    assert cursor.position() == 3
+
+    other.insertText('ZZ')
+    assert cursor.position() == 5
+    assert editor.toPlainText() == 'heZZorld'
+
+
+def test_contents_change():
+    editor = HeadlessEditor('one\ntwo')
+    changes = []
+    editor.document().contentsChange.connect(lambda *args: changes.append(args))
+
+    cursor = editor.textCursor()
+    cursor.setPosition(1)
+    cursor.setPosition(5, QTextCursor.KeepAnchor)
+    cursor.insertText('x\ny\nz')
+
+    assert changes == [(1, 4, 5)]
+    assert editor.document().blockCount() == 3
+    assert editor.document().findBlockByNumber(2).text() == 'zwo'
+
+
+def test_undo_steps():
+    editor = HeadlessEditor('ab')
+    cursor = editor.textCursor()
+    cursor.setPosition(1)
+    editor.setTextCursor(cursor)
+
+    editor.send_keys('xyz<CR>w')
+    assert editor.toPlainText() == 'axyz\nwb'
+
+    # the typed characters are a single step, the new line is another one
+    editor.undo()
+    assert editor.toPlainText() == 'axyz\nb'
+    editor.undo()
+    assert editor.toPlainText() == 'axyzb'
+    editor.undo()
+    assert editor.toPlainText() == 'ab'
+    assert editor.textCursor().position() == 1
+
+    editor.redo()
+    assert editor.toPlainText() == 'axyzb'
+    assert editor.textCursor().position() == 4
+
+
+def test_edit_block_undo():
+    editor = HeadlessEditor('one two three')
+    cursor = editor.textCursor()
+
+    cursor.beginEditBlock()
+    cursor.insertText('A')
+    cursor.setPosition(5)
+    cursor.deleteChar()
+    cursor.endEditBlock()
+    assert editor.toPlainText() == 'Aone wo three'
+
+    editor.undo()
+    assert editor.toPlainText() == 'one two three'
+
+
+def press_qt(editor: QPlainTextEdit, keys: str):
+    event_filter = EditorEventFilter(editor)
+    for event in parse_notation(keys):
+        if not event_filter.eventFilter(editor, event):
+            QApplication.sendEvent(editor, event)
+
+
+def press_headless(editor: HeadlessEditor, keys: str):
+    editor.installEventFilter(EditorEventFilter(editor))
+    editor.send_keys(keys)
+
+
+@pytest.mark.parametrize('keys', [
+    'wwbeejk$0^',
+    '3w2bG{}gg}',
+    'jwdwjdd',
+    'd2wxXp',
+    'fbdt)',
+    'jfocf"x<Esc>',
+    'ci(x<Esc>',
+    'jdi"',
+    'jjjca(y<Esc>',
+    'viwy$p',
+    'yyjjP',
+    '/foo<CR>nD',
+    '*x',
+    'jVjd',
+    'wv3ld',
+    'A!<Esc>jo2<Esc>.',
+    'ccnew<Esc>u',
+    '3x2.',
+    'w~gUiw',
+    'jjjrxjr0',
+    '<C-d>d<C-u>',
+])
+def test_same_as_qt(qtbot: QtBot, keys: str):
+    editor = qt_editor(TEXT)
+    press_qt(editor, keys)
+    EditorMode.mode = Modes.NORMAL
+    Registers.set_named_register(None)
+
+    headless = HeadlessEditor(TEXT)
+    press_headless(headless, keys)
+
+    assert headless.toPlainText() == editor.toPlainText()
+    assert headless.textCursor().position() == editor.textCursor().position()
+
+
+def test_without_application(tmp_path):
+    script = (
+        'from PySide2.QtWidgets import QApplication\n'
+        'from vimdcc.headless import HeadlessEditor\n'
+        'from vimdcc.editor_filters import EditorEventFilter\n'
+        'editor = HeadlessEditor("foo(bar) baz")\n'
+        'editor.installEventFilter(EditorEventFilter(editor))\n'
+        'editor.send_keys("fadi(wyiwma/baz<CR>P")\n'
+        'assert QApplication.instance() is None\n'
+        'print(editor.toPlainText())\n'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', script],
+        capture_output=True,
+        text=True,
+        env={**os.environ, 'REGISTER_DIR': str(tmp_path)},
+        timeout=60,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == 'foo() bazbaz\n'
+
+
+def test_previewers_without_application(tmp_path):
+    script = (
+        'from PySide2.QtWidgets import QApplication\n'
+        'from vimdcc.headless import HeadlessEditor\n'
+        'from vimdcc.editor_filters import EditorEventFilter\n'
+        'editor = HeadlessEditor("foo bar")\n'
+        'editor.installEventFilter(EditorEventFilter(editor))\n'
+        'editor.send_keys("mawx`\\\'\\\\x")\n'
+        'assert QApplication.instance() is None\n'
+        'print(editor.toPlainText())\n'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', script],
+        capture_output=True,
+        text=True,
+        env={**os.environ, 'REGISTER_DIR': str(tmp_path)},
+        timeout=60,
+    )
+
+    # the previewers are skipped, the keys after them still run
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == 'foo r\n'
@@ -53,7 +53,7 @@ def test_move_document_no_selection(handler: InsertHandler, data: MotionTest) ->
     params.cursor.setPosition(data.cursor_start)
 
     for motion in data.motion:
-        params.keys = motion
+        params = params.replace(keys=motion)
         handler.handle(params)
     editor.setTextCursor(params.cursor)
 
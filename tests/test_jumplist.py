@@ -0,0 +1,123 @@
+from typing import List, Optional
+from dataclasses import dataclass
+
+import pytest
+from PySide2.QtGui import QTextCursor
+from pytestqt.qtbot import QtBot
+from PySide2.QtWidgets import QPlainTextEdit
+
+from vimdcc.jumplist import JumpList, get_jumplist
+from vimdcc.editor_mode import Modes
+from vimdcc.handlers.normal import DocumentHandler, JumpListHandler
+from vimdcc.position_tracker import get_position_tracker
+from vimdcc.handler_parameters import HandlerParams
+
+
+@pytest.fixture()
+def editor(qtbot: QtBot) -> QPlainTextEdit:
+    editor = QPlainTextEdit()
+    editor.setPlainText('\n'.join(f'line {i}' for i in range(20)))
+    return editor
+
+
+def test_jumplist_navigation(editor: QPlainTextEdit):
+    jumps = JumpList(get_position_tracker(editor.document()))
+
+    assert jumps.back(0) is None
+    assert jumps.forward() is None
+
+    jumps.push(10)
+    jumps.push(20)
+
+    assert jumps.back(30) == 20
+    assert jumps.back(20) == 10
+    assert jumps.back(10) is None
+    assert jumps.forward() == 20
+    assert jumps.forward() == 30
+    assert jumps.forward() is None
+    assert jumps.positions() == [10, 20, 30]
+
+
+def test_jumplist_bounded(editor: QPlainTextEdit):
+    tracker = get_position_tracker(editor.document())
+    jumps = JumpList(tracker, size=3)
+
+    for position in range(5):
+        jumps.push(position)
+
+    assert jumps.positions() == [2, 3, 4]
+    assert len(tracker) == 3
+
+
+def test_jumplist_no_duplicates(editor: QPlainTextEdit):
+    jumps = JumpList(get_position_tracker(editor.document()))
+    jumps.push(10)
+    jumps.push(10)
+    assert jumps.positions() == [10]
+
+
+def test_jumplist_invalidated_wrapper(editor: QPlainTextEdit):
+    jumps = get_jumplist(editor.document())
+    jumps.push(10)
+
+    # invalidates the wrapper of the document the jumplist was created for
+    editor.textCursor().document()
+
+    assert get_jumplist(editor.document()) is jumps
+    assert jumps.back(20) == 10
+
+
+def test_jumplist_follows_edits(editor: QPlainTextEdit):
+    jumps = JumpList(get_position_tracker(editor.document()))
+    jumps.push(14)
+
+    cursor = editor.textCursor()
+    cursor.setPosition(0)
+    cursor.insertText('new line\n')
+
+    assert jumps.back(0) == 23
+
+    cursor.setPosition(0)
+    cursor.setPosition(9, QTextCursor.KeepAnchor)
+    cursor.removeSelectedText()
+
+    assert jumps.forward() is not None
+    assert jumps.positions() == [14, 0]
+
+
+@dataclass
+class JumpTest:
+    keys: List[str]
+    count: Optional[int]
+    expected_pos: int
+
+
+@pytest.mark.parametrize('data', [
+    JumpTest(['G', '<C-o>'], None, 7),
+    JumpTest(['G', '<C-o>', '<C-i>'], None, 148),
+    JumpTest(['G', 'gg', '<C-o>', '<C-o>'], None, 7),
+    JumpTest(['G', 'gg', '<C-o>', '<C-o>', '<C-i>', '<C-i>'], None, 0),
+    JumpTest(['<C-o>'], None, 7),
+    JumpTest(['G', '<C-i>'], None, 148),
+])
+def test_jumplist_handler(editor: QPlainTextEdit, data: JumpTest):
+    document_handler = DocumentHandler(editor)
+    jumplist_handler = JumpListHandler(editor)
+
+    params = HandlerParams(
+        cursor=editor.textCursor(),
+        keys='',
+        modifiers=[],
+        event=None,
+        mode=Modes.NORMAL,
+        count=data.count,
+    )
+    params.cursor.setPosition(7)
+
+    for keys in data.keys:
+        params = params.replace(keys=keys)
+        if not jumplist_handler.handle(params):
+            document_handler.handle(params)
+
+    assert params.cursor.position() == data.expected_pos
+    assert get_jumplist(editor.document()) is get_jumplist(editor.document())
@@ -0,0 +1,357 @@
+from typing import List
+
+import pytest
+from PySide2.QtGui import QKeyEvent
+from PySide2.QtCore import Qt, QEvent
+from pytestqt.qtbot import QtBot
+from PySide2.QtWidgets import QPlainTextEdit
+
+from vimdcc.keymap import (Match, Keymap, KeyBinding, KeyArgument,
+                           load_user_keymap)
+from vimdcc.settings import Settings
+from vimdcc.editor_mode import Modes, EditorMode
+from vimdcc.editor_filters import NormalEventFilter
+from vimdcc.handlers.normal import (EditHandler, YankHandler, MotionHandler,
+                                    SearchHandler, DocumentHandler,
+                                    VisualEditHandler)
+
+
+class FakeHandler:
+    def __init__(self, bindings: List[KeyBinding]):
+        self.bindings = bindings
+
+    def key_bindings(self):
+        return self.bindings
+
+
+@pytest.fixture()
+def keymap() -> Keymap:
+    handlers = [
+        FakeHandler([KeyBinding('gg'), KeyBinding('G'), KeyBinding('<C-d>')]),
+        FakeHandler([KeyBinding('f', KeyArgument.CHAR)]),
+        FakeHandler([KeyBinding('/', KeyArgument.LINE)]),
+        FakeHandler([KeyBinding('d', modes=frozenset({Modes.VISUAL}))]),
+    ]
+    return Keymap.from_handlers([Modes.NORMAL, Modes.VISUAL], handlers)
+
+
+def walk(keymap: Keymap, mode: Modes, keys: List[str], submit: bool = False) -> Match:
+    node = keymap.root(mode)
+    for key in keys:
+        node = node.step(key)
+        if node is None:
+            return Match.INVALID
+    return node.match(submit)
+
+
+@pytest.mark.parametrize('keys, expected', [
+    (['g'], Match.PENDING),
+    (['g', 'g'], Match.COMPLETE),
+    (['G'], Match.COMPLETE),
+    (['g', 'x'], Match.INVALID),
+    (['<C-d>'], Match.COMPLETE),
+    (['f'], Match.PENDING),
+    (['f', 'x'], Match.COMPLETE),
+    (['/'], Match.PENDING),
+    (['/', 'f', 'o', 'o'], Match.PENDING),
+    (['d'], Match.INVALID),
+    (['z'], Match.INVALID),
+])
+def test_keymap_step(keymap: Keymap, keys: List[str], expected: Match):
+    assert walk(keymap, Modes.NORMAL, keys) == expected
+
+
+def test_keymap_line_submit(keymap: Keymap):
+    assert walk(keymap, Modes.NORMAL, ['/', 'f', 'o', 'o'], submit=True) == Match.COMPLETE
+
+
+def test_keymap_modes(keymap: Keymap):
+    assert walk(keymap, Modes.VISUAL, ['d']) == Match.COMPLETE
+    assert keymap.root(Modes.DELETE) is None
+
+
+@pytest.mark.parametrize('keys, expected', [
+    ('gg', Match.COMPLETE),
+    ('/foo', Match.PENDING),
+    ('fx', Match.COMPLETE),
+    ('gx', Match.INVALID),
+])
+def test_keymap_lookup(keymap: Keymap, keys: str, expected: Match):
+    node, canonical = keymap.lookup(Modes.NORMAL, keys)
+    assert (node.match() if node else Match.INVALID) == expected
+    assert canonical == keys
+
+
+def test_keymap_handlers(keymap: Keymap):
+    node, _ = keymap.lookup(Modes.NORMAL, 'fx')
+    other, _ = keymap.lookup(Modes.NORMAL, 'fy')
+    assert node is other
+    assert len(node.handlers) == 1
+
+
+@pytest.fixture()
+def editor(qtbot: QtBot) -> QPlainTextEdit:
+    EditorMode.mode = Modes.NORMAL
+    editor = QPlainTextEdit()
+    editor.setPlainText('one two\nthree four\nfive')
+    yield editor
+    EditorMode.mode = Modes.NORMAL
+
+
+@pytest.fixture()
+def event_filter(editor: QPlainTextEdit) -> NormalEventFilter:
+    handlers = [
+        MotionHandler, DocumentHandler, SearchHandler, VisualEditHandler, EditHandler
+    ]
+    return NormalEventFilter(editor, handlers)
+
+
+def press(event_filter: NormalEventFilter, editor: QPlainTextEdit, keys: List[str]):
+    special = {
+        '<CR>': Qt.Key_Return,
+        '<BS>': Qt.Key_Backspace,
+        '<Esc>': Qt.Key_Escape,
+    }
+    for key in keys:
+        if key in special:
+            event = QKeyEvent(QEvent.KeyPress, special[key], Qt.NoModifier)
+        else:
+            event = QKeyEvent(QEvent.KeyPress, ord(key.upper()), Qt.NoModifier, key)
+        event_filter.eventFilter(editor, event)
+
+
+@pytest.mark.parametrize('keys, expected_position, expected_text', [
+    (['w'], 4, 'one two\nthree four\nfive'),
+    (['g', 'g'], 0, 'one two\nthree four\nfive'),
+    (['G'], 22, 'one two\nthree four\nfive'),
+    (['d', 'w'], 0, 'two\nthree four\nfive'),
+    (['d', 'd'], 0, '\nthree four\nfive'),
+    (['/', 'f', 'o', '<CR>'], 14, 'one two\nthree four\nfive'),
+    (['/', 'f', 'i', '<BS>', 'o', '<CR>'], 14, 'one two\nthree four\nfive'),
+    (['d', '<BS>', 'w'], 4, 'one two\nthree four\nfive'),
+    (['z', '<Esc>', 'w'], 4, 'one two\nthree four\nfive'),
+])
+def test_filter_dispatch(
+    editor: QPlainTextEdit,
+    event_filter: NormalEventFilter,
+    keys: List[str],
+    expected_position: int,
+    expected_text: str
+):
+    press(event_filter, editor, keys)
+
+    assert editor.textCursor().position() == expected_position
+    assert editor.toPlainText() == expected_text
+    assert event_filter.key_sequence == ''
+
+
+def test_filter_pending_sequence(editor: QPlainTextEdit, event_filter: NormalEventFilter):
+    press(event_filter, editor, ['g'])
+    assert event_filter.key_sequence == 'g'
+    assert editor.textCursor().position() == 0
+
+
+def test_filter_only_runs_matching_handler(
+    editor: QPlainTextEdit, event_filter: NormalEventFilter, monkeypatch
+):
+    called = []
+    for handler in event_filter._handlers:
+        monkeypatch.setattr(handler, 'handle', lambda params, h=handler: called.append(h))
+
+    press(event_filter, editor, ['w'])
+    assert [type(handler) for handler in called] == [MotionHandler]
+
+
+def test_keymap_remap(keymap: Keymap):
+    assert keymap.remap('H', 'G')
+    node, keys = keymap.lookup(Modes.NORMAL, 'H')
+    assert node.match() == Match.COMPLETE
+    assert keys == 'G'
+
+    # the remap leads to the same node, the handlers are not copied
+    assert node is keymap.lookup(Modes.NORMAL, 'G')[0]
+
+
+def test_keymap_remap_argument(keymap: Keymap):
+    assert keymap.remap('S', 'f')
+
+    node, keys = keymap.root(Modes.NORMAL).follow('S', '')
+    assert keys == 'f'
+
+    node, keys = node.follow('x', keys)
+    assert node.match() == Match.COMPLETE
+    assert keys == 'fx'
+
+
+def test_keymap_remap_prefix(keymap: Keymap):
+    assert keymap.remap('zg', 'gg')
+    assert walk(keymap, Modes.NORMAL, ['z']) == Match.PENDING
+    assert keymap.lookup(Modes.NORMAL, 'zg')[1] == 'gg'
+
+
+def test_keymap_unmap(keymap: Keymap):
+    assert keymap.remap('G', None)
+    assert walk(keymap, Modes.NORMAL, ['G']) == Match.INVALID
+
+
+def test_keymap_remap_invalid(keymap: Keymap):
+    assert keymap.remap('H', 'xyz') is False
+    assert keymap.remap('', 'G') is False
+    assert walk(keymap, Modes.NORMAL, ['H']) == Match.INVALID
+
+
+def test_keymap_remap_swap(keymap: Keymap):
+    # the rhs is resolved against the bindings, not against the previous remap
+    assert keymap.remap('G', 'gg')
+    assert keymap.remap('gg', 'G')
+
+    assert keymap.lookup(Modes.NORMAL, 'G')[1] == 'gg'
+    assert keymap.lookup(Modes.NORMAL, 'gg')[1] == 'G'
+
+
+def test_keymap_remap_invalid_prefix(keymap: Keymap):
+    # a failed remap does not leave the prefix of the lhs behind
+    assert keymap.remap('zx', 'xyz') is False
+    assert keymap.remap('zx', None) is False
+    assert 'z' not in keymap.root(Modes.NORMAL).children
+
+
+def test_keymap_remap_operator_motion(editor: QPlainTextEdit):
+    # an operator and its motion are two bindings, not one key sequence
+    event_filter = NormalEventFilter(editor, [MotionHandler, YankHandler])
+    assert event_filter._keymap.remap('Q', 'y$') is False
+    assert event_filter._keymap.remap('Q', 'yy')
+
+
+def test_keymap_remap_mode(keymap: Keymap):
+    assert keymap.remap('D', 'd')
+    assert walk(keymap, Modes.VISUAL, ['D']) == Match.COMPLETE
+    assert walk(keymap, Modes.NORMAL, ['D']) == Match.INVALID
+
+
+@pytest.mark.parametrize('content, expected', [
+    ('{"H": "^", "zz": null}', {'H': '^', 'zz': None}),
+    ('{"H": ', {}),
+    ('["H"]', {}),
+])
+def test_load_user_keymap(tmp_path, content: str, expected: dict):
+    path = tmp_path / 'vimdcc_keymap.json'
+    path.write_text(content)
+    assert load_user_keymap(path) == expected
+
+
+def test_load_user_keymap_missing(tmp_path):
+    assert load_user_keymap(tmp_path / 'vimdcc_keymap.json') == {}
+
+
+@pytest.mark.parametrize('keys, expected_position, expected_text', [
+    (['L'], 6, 'one two\nthree four\nfive'),
+    (['w', 'd', 'H'], 0, 'two\nthree four\nfive'),
+    (['Q', 'o', '<CR>'], 6, 'one two\nthree four\nfive'),
+    (['w', 'b'], 4, 'one two\nthree four\nfive'),
+])
+def test_filter_user_keymap(
+    editor: QPlainTextEdit,
+    monkeypatch,
+    keys: List[str],
+    expected_position: int,
+    expected_text: str
+):
+    remaps = {'H': '0', 'L': '$', 'Q': '/', 'b': None}
+    monkeypatch.setattr('vimdcc.editor_filters.load_user_keymap', lambda: remaps)
+    event_filter = NormalEventFilter(editor, [MotionHandler, SearchHandler, EditHandler])
+
+    press(event_filter, editor, keys)
+
+    assert editor.textCursor().position() == expected_position
+    assert editor.toPlainText() == expected_text
+
+
+def test_keymap_ambiguous():
+    handler = FakeHandler([KeyBinding('g'), KeyBinding('gg')])
+    keymap = Keymap.from_handlers([Modes.NORMAL], [handler])
+
+    assert walk(keymap, Modes.NORMAL, ['g']) == Match.AMBIGUOUS
+    assert walk(keymap, Modes.NORMAL, ['g'], submit=True) == Match.COMPLETE
+    assert walk(keymap, Modes.NORMAL, ['g', 'g']) == Match.COMPLETE
+
+
+@pytest.mark.parametrize('keys, expected_position, expected_mode', [
+    (['g', 'x'], 0, Modes.NORMAL),
+    (['g', 'x', 'w'], 4, Modes.NORMAL),
+    (['d', 'z'], 0, Modes.NORMAL),
+    (['d', 'z', 'w'], 4, Modes.NORMAL),
+])
+def test_filter_clears_dead_prefix(
+    editor: QPlainTextEdit,
+    event_filter: NormalEventFilter,
+    keys: List[str],
+    expected_position: int,
+    expected_mode: Modes
+):
+    press(event_filter, editor, keys)
+
+    assert event_filter.key_sequence == ''
+    assert event_filter.count is None
+    assert EditorMode.mode == expected_mode
+    assert editor.textCursor().position() == expected_position
+
+
+@pytest.fixture()
+def ambiguous_filter(editor: QPlainTextEdit, monkeypatch) -> NormalEventFilter:
+    # `x` deletes a character but `xy` is remapped to `w`
+    monkeypatch.setattr('vimdcc.editor_filters.load_user_keymap', lambda: {'xy': 'w'})
+    return NormalEventFilter(editor, [MotionHandler, EditHandler])
+
+
+def test_filter_ambiguous_waits(editor: QPlainTextEdit, ambiguous_filter: NormalEventFilter):
+    press(ambiguous_filter, editor, ['x'])
+    assert editor.toPlainText() == 'one two\nthree four\nfive'
+    assert ambiguous_filter.key_sequence == 'x'
+
+    press(ambiguous_filter, editor, ['y'])
+    assert editor.toPlainText() == 'one two\nthree four\nfive'
+    assert editor.textCursor().position() == 4
+
+
+def test_filter_ambiguous_next_key(editor: QPlainTextEdit, ambiguous_filter: NormalEventFilter):
+    press(ambiguous_filter, editor, ['x', 'w'])
+
+    assert editor.toPlainText() == 'ne two\nthree four\nfive'
+    assert editor.textCursor().position() == 3
+    assert ambiguous_filter.key_sequence == ''
+
+
+def test_filter_ambiguous_timeout(
+    qtbot: QtBot,
+    editor: QPlainTextEdit,
+    ambiguous_filter: NormalEventFilter,
+    monkeypatch
+):
+    monkeypatch.setattr(Settings, 'timeoutlen', 10)
+
+    press(ambiguous_filter, editor, ['x'])
+    qtbot.waitUntil(lambda: editor.toPlainText() == 'ne two\nthree four\nfive', timeout=1000)
+    assert ambiguous_filter.key_sequence == ''
+
+
+def test_filter_ambiguous_escape(
+    qtbot: QtBot,
+    editor: QPlainTextEdit,
+    ambiguous_filter: NormalEventFilter,
+    monkeypatch
+):
+    monkeypatch.setattr(Settings, 'timeoutlen', 10)
+
+    press(ambiguous_filter, editor, ['x', '<Esc>'])
+    qtbot.wait(50)
+    assert editor.toPlainText() == 'one two\nthree four\nfive'
+
+
+@pytest.mark.parametrize('mode', [Modes.VISUAL, Modes.VISUAL_LINE])
+@pytest.mark.parametrize('key', ['d', 'y', 'c'])
+def test_keymap_visual_operators_complete(qtbot: QtBot, mode: Modes, key: str):
+    # with all the handlers, `dd`, `cc` and `yy` do not make the visual keys wait
+    event_filter = NormalEventFilter(QPlainTextEdit())
+    node, _ = event_filter._keymap.lookup(mode, key)
+    assert node.match() == Match.COMPLETE
@@ -0,0 +1,105 @@
+from typing import List
+
+import pytest
+from PySide2.QtGui import QKeyEvent
+from PySide2.QtCore import Qt, QEvent
+from pytestqt.qtbot import QtBot
+from PySide2.QtWidgets import QPlainTextEdit
+
+from vimdcc.latency import (BUCKETS, Latency, LatencyRecorder,
+                            LatencyHistogram, bucket_index, bucket_upper_bound)
+from vimdcc.editor_mode import Modes, EditorMode
+from vimdcc.editor_filters import NormalEventFilter
+from vimdcc.handlers.normal import MotionHandler
+
+
+@pytest.mark.parametrize('nanoseconds', [
+    0, 1, 15, 16, 17, 1000, 1500, 123456, 10 ** 9, 2 ** 39,
+])
+def test_bucket_bounds(nanoseconds: int):
+    index = bucket_index(nanoseconds)
+    assert index < BUCKETS
+    assert nanoseconds <= bucket_upper_bound(index)
+
+    # the error is bound to the size of the sub buckets
+    assert bucket_upper_bound(index) <= nanoseconds * 1.125 + 1
+
+
+def test_bucket_overflow():
+    assert bucket_index(2 ** 60) == BUCKETS - 1
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for value in range(1, 101):
+        histogram.record(value * 1000)
+
+    assert histogram.count == 100
+    assert histogram.max == 100000
+    assert 50000 <= histogram.percentile(50) <= 50000 * 1.125
+    assert 95000 <= histogram.percentile(95) <= 95000 * 1.125
+    assert histogram.percentile(99) <= 100000
+    assert histogram.percentile(100) == 100000
+
+
+def test_histogram_empty():
+    assert LatencyHistogram().percentile(50) == 0
+
+
+def test_recorder_report():
+    recorder = LatencyRecorder(enabled=True)
+    recorder.record('w', 2000)
+    recorder.record('w', 4000)
+    recorder.record('dd', 10000)
+
+    report = recorder.report()
+    assert report['w']['count'] == 2
+    assert report['w']['max'] == 4.0
+    assert report['dd']['p99'] == 10.0
+
+    lines = recorder.format_report().splitlines()
+    assert lines[1].startswith('dd')
+
+    recorder.reset()
+    assert recorder.report() == {}
+    assert recorder.format_report() == 'No latency recorded'
+
+
+@pytest.fixture()
+def recorder(monkeypatch) -> LatencyRecorder:
+    recorder = LatencyRecorder()
+    monkeypatch.setattr('vimdcc.editor_filters.Latency', recorder)
+    return recorder
+
+
+@pytest.fixture()
+def event_filter(qtbot: QtBot) -> NormalEventFilter:
+    EditorMode.mode = Modes.NORMAL
+    editor = QPlainTextEdit()
+    editor.setPlainText('one two three')
+    return NormalEventFilter(editor, [MotionHandler])
+
+
+def press(event_filter: NormalEventFilter, keys: List[str]):
+    for key in keys:
+        event = QKeyEvent(QEvent.KeyPress, ord(key.upper()), Qt.NoModifier, key)
+        event_filter.eventFilter(event_filter.editor, event)
+
+
+def test_filter_latency_disabled(event_filter: NormalEventFilter, recorder: LatencyRecorder):
+    press(event_filter, ['w', 'w'])
+    assert recorder.report() == {}
+
+
+def test_filter_latency_enabled(event_filter: NormalEventFilter, recorder: LatencyRecorder):
+    recorder.enabled = True
+    press(event_filter, ['w', 'w', 'b'])
+
+    report = recorder.report()
+    assert report['NormalEventFilter']['count'] == 3
+    assert report['MotionHandler NORMAL w']['count'] == 2
+    assert report['MotionHandler NORMAL b']['count'] == 1
+
+
+def test_latency_disabled_by_default():
+    assert Latency.enabled is False
@@ -0,0 +1,104 @@
+import pytest
+from PySide2.QtGui import QKeyEvent
+from PySide2.QtCore import Qt, QEvent
+from pytestqt.qtbot import QtBot
+from PySide2.QtWidgets import QApplication, QPlainTextEdit
+
+from vimdcc.macros import Macros, key_notation, parse_notation
+from vimdcc.registers import Registers
+from vimdcc.editor_mode import Modes, EditorMode
+from vimdcc.editor_filters import EditorEventFilter
+from vimdcc.handlers.normal import (EditHandler, MacroHandler, InsertHandler,
+                                    MotionHandler)
+
+TEXT = 'one\ntwo\nthree\nfour'
+
+
+@pytest.fixture()
+def editor(qtbot: QtBot) -> QPlainTextEdit:
+    EditorMode.mode = Modes.NORMAL
+    editor = QPlainTextEdit()
+    editor.setPlainText(TEXT)
+    yield editor
+    EditorMode.mode = Modes.NORMAL
+    Macros.register = None
+
+
+@pytest.fixture()
+def event_filter(editor: QPlainTextEdit) -> EditorEventFilter:
+    handlers = [MotionHandler, InsertHandler, EditHandler, MacroHandler]
+    return EditorEventFilter(editor, handlers)
+
+
+def press(event_filter: EditorEventFilter, editor: QPlainTextEdit, keys: str):
+    """Press the keys, the keys not consumed by the filter are typed in the editor."""
+    for event in parse_notation(keys):
+        if not event_filter.eventFilter(editor, event):
+            QApplication.sendEvent(editor, event)
+
+
+@pytest.mark.parametrize('keys', [
+    'ciwfoo<Esc>',
+    'd/bar<CR>',
+    '<C-d><C-u>',
+    'i<lt>div><Esc>',
+    'A<Tab>x<BS><Left><Esc>',
+])
+def test_notation_round_trip(keys: str):
+    assert ''.join(key_notation(event) for event in parse_notation(keys)) == keys
+
+
+def test_notation_events():
+    escape, ctrl, char = parse_notation('<Esc><C-d>x')
+    assert escape.key() == Qt.Key_Escape
+    assert ctrl.key() == Qt.Key_D
+    assert ctrl.modifiers() == Qt.ControlModifier
+    assert char.text() == 'x'
+
+
+def test_notation_unknown_key():
+    assert ''.join(event.text() for event in parse_notation('<foo>')) == '<foo>'
+
+
+def test_macro_record(editor: QPlainTextEdit, event_filter: EditorEventFilter):
+    press(event_filter, editor, 'qaA!<Esc>jq')
+
+    assert not Macros.recording
+    assert Registers.get_named_register()['a'] == 'A!<Esc>j'
+    assert editor.toPlainText() == 'one!\ntwo\nthree\nfour'
+
+
+def test_macro_play(editor: QPlainTextEdit, event_filter: EditorEventFilter):
+    press(event_filter, editor, 'qaA!<Esc>jq@a')
+    assert editor.toPlainText() == 'one!\ntwo!\nthree\nfour'
+
+    press(event_filter, editor, '@@')
+    assert editor.toPlainText() == 'one!\ntwo!\nthree!\nfour'
+    assert EditorMode.mode == Modes.NORMAL
+
+
+def test_macro_play_count(editor: QPlainTextEdit, event_filter: EditorEventFilter):
+    Registers.set_named_register_value('b', 'x<Down>')
+    press(event_filter, editor, '3@b')
+    assert editor.toPlainText() == 'ne\nwo\nhree\nfour'
+
+    # the whole replay is a single undo step
+    editor.undo()
+    assert editor.toPlainText() == TEXT
+
+
+def test_macro_play_repaint(editor: QPlainTextEdit, event_filter: EditorEventFilter, monkeypatch):
+    calls = []
+    monkeypatch.setattr(editor, 'setUpdatesEnabled', calls.append)
+
+    Registers.set_named_register_value('b', 'x')
+    press(event_filter, editor, '@b')
+
+    assert calls == [False, True]
+    assert Macros.playing is False
+
+
+def test_macro_play_empty(editor: QPlainTextEdit, event_filter: EditorEventFilter):
+    Registers.set_named_register_value('c', '')
+    press(event_filter, editor, '@cx')
+    assert editor.toPlainText() == 'ne\ntwo\nthree\nfour'
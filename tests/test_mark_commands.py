@@ -7,6 +7,7 @@
 from pytestqt.qtbot import QtBot
 from PySide2.QtWidgets import QPlainTextEdit
 
+from vimdcc.marks import get_live_marks
 from vimdcc.editor_mode import Modes
 from vimdcc.handlers.normal import MarksHandler
 from vimdcc.handler_parameters import HandlerParams
@@ -48,7 +49,7 @@ def test_set_mark(handler: MarksHandler, data: MotionTest) -> None:
     params.cursor.setPosition(data.jump_to)
 
     for motion in data.motion:
-        params.keys += motion
+        params = params.replace(keys=params.keys + motion)
         handler.handle(params)
 
     editor.setTextCursor(params.cursor)
@@ -60,7 +61,7 @@ def test_set_mark(handler: MarksHandler, data: MotionTest) -> None:
 
     assert editor.textCursor().position() == 0
 
-    params.keys = '`'
+    params = params.replace(keys='`')
 
     # FIXME: Too hacky don't like it...
     preview_marks = mock.Mock()
@@ -71,3 +72,106 @@ def test_set_mark(handler: MarksHandler, data: MotionTest) -> None:
     editor.setTextCursor(params.cursor)
 
     assert editor.textCursor().position() == data.jump_to
+
+
+def test_mark_follows_edits(handler: MarksHandler) -> None:
+    editor = handler.editor
+    editor.setPlainText('foo\nbar\nfoo\nbar')
+
+    params = HandlerParams(
+        cursor=editor.textCursor(),
+        keys='ma',
+        modifiers=[],
+        event=None,
+        mode=Modes.NORMAL
+    )
+
+    params.cursor.setPosition(9)
+    handler.handle(params)
+
+    cursor = editor.textCursor()
+    cursor.setPosition(0)
+    cursor.insertText('new line\n')
+
+    preview_marks = mock.Mock()
+    preview_marks.get_text_value = lambda: str(handler.registers.get_mark('a')['position'])
+    handler._preview_marks = preview_marks
+
+    params = params.replace(keys='`')
+    params.cursor.setPosition(0)
+    handler.handle(params)
+
+    assert params.cursor.position() == 18
+    assert editor.toPlainText()[18] == 'o'
+
+
+def test_mark_saved_lazily(handler: MarksHandler) -> None:
+    editor = handler.editor
+    editor.setPlainText('foo\nbar')
+
+    marks = get_live_marks(editor.document())
+    registers_file = mock.Mock()
+
+    params = HandlerParams(
+        cursor=editor.textCursor(),
+        keys='mb',
+        modifiers=[],
+        event=None,
+        mode=Modes.NORMAL
+    )
+
+    with mock.patch.object(handler.registers, 'registers_file', registers_file):
+        handler.handle(params)
+        params = params.replace(keys='mc')
+        handler.handle(params)
+
+        registers_file.append.assert_not_called()
+
+        marks.save()
+        marks.save()
+
+        # only the changed marks are written
+        registers_file.append.assert_called_once()
+        changes = registers_file.append.call_args[0][1]
+        assert sorted(change['key'] for change in changes if change['op'] == 'mark') == ['b', 'c']
+
+
+def test_global_mark_synced_by_its_document(handler: MarksHandler) -> None:
+    editor = handler.editor
+    editor.setPlainText('foo\nbar')
+    other = QPlainTextEdit()
+    other.setPlainText('foo\nbar')
+
+    params = HandlerParams(
+        cursor=editor.textCursor(),
+        keys='mA',
+        modifiers=[],
+        event=None,
+        mode=Modes.NORMAL
+    )
+    params.cursor.setPosition(4)
+    handler.handle(params)
+
+    # the other editor tracks the mark too, but it was not set there
+    get_live_marks(other.document())
+    other.textCursor().insertText('new line\n')
+    get_live_marks(other.document()).sync()
+    assert handler.registers.get_mark('A')['position'] == 4
+
+    editor.textCursor().insertText('x')
+    get_live_marks(editor.document()).sync()
+    assert handler.registers.get_mark('A')['position'] == 5
+
+
+def test_live_marks_invalidated_wrapper(handler: MarksHandler) -> None:
+    editor = handler.editor
+    editor.setPlainText('foo\nbar')
+    marks = get_live_marks(editor.document())
+    marks.set('a', 4, 'bar')
+
+    # invalidates the wrapper of the document the marks were created for
+    editor.textCursor().document()
+    editor.textCursor().insertText('new\n')
+
+    assert get_live_marks(editor.document()) is marks
+    assert marks.get('a') == 8
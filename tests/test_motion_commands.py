@@ -72,7 +72,7 @@ def test_motion_no_select(
     params.cursor.setPosition(data.cursor_start)
 
     for motion in data.motion:
-        params.keys = motion
+        params = params.replace(keys=motion)
         handler.handle(params)
         editor.setTextCursor(params.cursor)
 
@@ -124,7 +124,7 @@ def test_motion_select(handler: MotionHandler, data: MotionTest):
     params.cursor.setPosition(data.cursor_start)
 
     for motion in data.motion:
-        params.keys = motion
+        params = params.replace(keys=motion)
         handler.handle(params)
         editor.setTextCursor(params.cursor)
 
@@ -164,7 +164,7 @@ def test_motion_yank(handler: MotionHandler, data: MotionTest):
     params.cursor.setPosition(data.cursor_start)
 
     for motion in data.motion:
-        params.keys = motion
+        params = params.replace(keys=motion)
         handler.handle(params)
         editor.setTextCursor(params.cursor)
 
@@ -205,7 +205,7 @@ def test_motion_edit_change(handler: MotionHandler, data: MotionTest):
     params.cursor.setPosition(data.cursor_start)
 
     for motion in data.motion:
-        params.keys = motion
+        params = params.replace(keys=motion)
         handler.handle(params)
         editor.setTextCursor(params.cursor)
 
@@ -248,7 +248,7 @@ def test_motion_edit_delete(handler: MotionHandler, data: MotionTest):
     params.cursor.setPosition(data.cursor_start)
 
     for motion in data.motion:
-        params.keys = motion
+        params = params.replace(keys=motion)
         handler.handle(params)
         editor.setTextCursor(params.cursor)
 
@@ -256,3 +256,105 @@ def test_motion_edit_delete(handler: MotionHandler, data: MotionTest):
 
     assert cursor.position() == data.expected_pos
     assert editor.toPlainText() == data.expected_text
+
+
+@pytest.mark.parametrize('data', [
+    MotionTest(['j', 'j'], 'foobar\nfo\nfoobar', 4, 'a', 14),
+    MotionTest(['j', 'k'], 'foobar\nfo\nfoobar', 4, 'a', 4),
+    MotionTest(['j', 'h', 'j'], 'foobar\nfo\nfoobar', 4, 'f', 10),
+    MotionTest(['j', 'h', 'l', 'j'], 'foobar\nfo\nfoobar', 4, 'o', 11),
+    MotionTest(['j', 'l', 'h', 'j'], 'foobar\nfoo\nfoobar', 4, 'o', 13),
+    MotionTest(['j', 'j'], 'foobar\n\nfoobar', 3, 'b', 11),
+    MotionTest(['$', 'j', 'j'], 'foo\nf\nfoobar', 0, 'r', 11),
+    MotionTest(['k'], 'foo\nbar', 0, 'f', 0),
+    MotionTest(['j'], 'foo\nbar', 5, 'a', 5),
+])
+def test_motion_desired_column(handler: MotionHandler, data: MotionTest):
+    editor = handler.editor
+    editor.setPlainText(data.text)
+
+    params = HandlerParams(
+        cursor=editor.textCursor(),
+        keys='',
+        modifiers=[],
+        event=None,
+        mode=Modes.NORMAL
+    )
+
+    params.cursor.setPosition(data.cursor_start)
+
+    for motion in data.motion:
+        params = params.replace(keys=motion)
+        handler.handle(params)
+        editor.setTextCursor(params.cursor)
+
+    position = editor.textCursor().position()
+    assert position == data.expected_pos
+    assert editor.toPlainText()[position] == data.expected_text
+
+
+@pytest.mark.parametrize('data', [
+    MotionTest(['j'], 'a\nb\nc\nd\ne', 0, 'd', 6),
+    MotionTest(['k'], 'a\nb\nc\nd\ne', 8, 'b', 2),
+    MotionTest(['j'], 'a\nb\nc', 0, 'c', 4),
+])
+def test_motion_vertical_count(handler: MotionHandler, data: MotionTest):
+    editor = handler.editor
+    editor.setPlainText(data.text)
+
+    params = HandlerParams(
+        cursor=editor.textCursor(),
+        keys='',
+        modifiers=[],
+        event=None,
+        mode=Modes.NORMAL,
+        count=3,
+    )
+
+    params.cursor.setPosition(data.cursor_start)
+
+    for motion in data.motion:
+        params = params.replace(keys=motion)
+        handler.handle(params)
+
+    assert params.cursor.position() == data.expected_pos
+    assert editor.toPlainText()[data.expected_pos] == data.expected_text
+
+
+@pytest.mark.parametrize('count, expected_pos', [(1, 2), (3, 8), (5, 12)])
+def test_motion_line_end_count(handler: MotionHandler, count: int, expected_pos: int):
+    editor = handler.editor
+    editor.setPlainText('foo\nbar\n\nlast')
+
+    params = HandlerParams(
+        cursor=editor.textCursor(),
+        keys='$',
+        modifiers=[],
+        event=None,
+        mode=Modes.NORMAL,
+        count=count,
+    )
+    handler.handle(params)
+
+    assert params.cursor.position() == expected_pos
+
+
+@pytest.mark.parametrize('motion', ['w', 'b', 'e'])
+def test_motion_keeps_document_wrapper(handler: MotionHandler, motion: str):
+    editor = handler.editor
+    editor.setPlainText('foo bar\nbaz')
+    document = editor.document()
+
+    params = HandlerParams(
+        cursor=editor.textCursor(),
+        keys=motion,
+        modifiers=[],
+        event=None,
+        mode=Modes.NORMAL
+    )
+    params.cursor.setPosition(4)
+    handler.handle(params)
+    del params
+
+    # the wrapper shared by the document indexes is still valid
+    assert document.blockCount() == 2
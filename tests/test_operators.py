@@ -0,0 +1,130 @@
+from typing import List
+
+import pytest
+from PySide2.QtGui import QKeyEvent
+from PySide2.QtCore import Qt, QEvent
+from pytestqt.qtbot import QtBot
+from PySide2.QtWidgets import QPlainTextEdit
+
+from vimdcc.operators import apply_operator
+from vimdcc.registers import Registers
+from vimdcc.editor_mode import Modes, EditorMode
+from vimdcc.editor_filters import NormalEventFilter
+from vimdcc.handlers.normal import (EditHandler, YankHandler, MotionHandler,
+                                    SearchHandler, DocumentHandler,
+                                    SearchLineHandler, VisualEditHandler,
+                                    TextObjectsHandler)
+
+TEXT = 'one two three four\nfive six\nseven (eight)'
+
+
+@pytest.fixture()
+def editor(qtbot: QtBot) -> QPlainTextEdit:
+    EditorMode.mode = Modes.NORMAL
+    editor = QPlainTextEdit()
+    editor.setPlainText(TEXT)
+    yield editor
+    EditorMode.mode = Modes.NORMAL
+
+
+@pytest.fixture()
+def event_filter(editor: QPlainTextEdit) -> NormalEventFilter:
+    handlers = [
+        MotionHandler, DocumentHandler, SearchHandler, SearchLineHandler,
+        YankHandler, VisualEditHandler, TextObjectsHandler, EditHandler
+    ]
+    return NormalEventFilter(editor, handlers)
+
+
+def press(event_filter: NormalEventFilter, editor: QPlainTextEdit, keys: str):
+    for key in keys.replace('<CR>', '\n'):
+        if key == '\n':
+            event = QKeyEvent(QEvent.KeyPress, Qt.Key_Return, Qt.NoModifier)
+        else:
+            event = QKeyEvent(QEvent.KeyPress, ord(key.upper()), Qt.NoModifier, key)
+        event_filter.eventFilter(editor, event)
+
+
+@pytest.mark.parametrize('keys, expected_text, expected_mode', [
+    ('dw', 'two three four\nfive six\nseven (eight)', Modes.NORMAL),
+    ('d3w', 'four\nfive six\nseven (eight)', Modes.NORMAL),
+    ('3dw', 'four\nfive six\nseven (eight)', Modes.NORMAL),
+    ('2d2w', 'five six\nseven (eight)', Modes.NORMAL),
+    ('c$', '\nfive six\nseven (eight)', Modes.INSERT),
+    ('de', ' two three four\nfive six\nseven (eight)', Modes.NORMAL),
+    ('d2e', ' three four\nfive six\nseven (eight)', Modes.NORMAL),
+    ('dft', 'wo three four\nfive six\nseven (eight)', Modes.NORMAL),
+    ('dtt', 'two three four\nfive six\nseven (eight)', Modes.NORMAL),
+    ('d/four<CR>', 'four\nfive six\nseven (eight)', Modes.NORMAL),
+    ('2dd', '\nseven (eight)', Modes.NORMAL),
+    ('2cc', '\nseven (eight)', Modes.INSERT),
+    ('Gdi(', 'one two three four\nfive six\nseven ()', Modes.NORMAL),
+])
+def test_operator_grammar(
+    editor: QPlainTextEdit,
+    event_filter: NormalEventFilter,
+    keys: str,
+    expected_text: str,
+    expected_mode: Modes
+):
+    press(event_filter, editor, keys)
+    assert editor.toPlainText() == expected_text
+    assert EditorMode.mode == expected_mode
+    assert event_filter.key_sequence == ''
+
+
+@pytest.mark.parametrize('keys, expected_register', [
+    ('yw', 'one '),
+    ('y2w', 'one two '),
+    ('2yy', '<LINE_COPY>one two three four five six\n'),
+    ('3dd', 'one two three four five six seven (eight)\n'),
+])
+def test_operator_register(
+    editor: QPlainTextEdit,
+    event_filter: NormalEventFilter,
+    keys: str,
+    expected_register: str
+):
+    press(event_filter, editor, keys)
+    assert Registers.get_clipboard()[0] == expected_register
+
+
+def test_operator_yank_keeps_position(editor: QPlainTextEdit, event_filter: NormalEventFilter):
+    press(event_filter, editor, 'wy2w')
+    assert editor.textCursor().position() == 4
+    assert editor.toPlainText() == TEXT
+    assert EditorMode.mode == Modes.NORMAL
+
+
+def test_operator_visual(editor: QPlainTextEdit, event_filter: NormalEventFilter):
+    press(event_filter, editor, 'v2e')
+    assert EditorMode.mode == Modes.VISUAL
+    assert editor.textCursor().selectedText() == 'one two'
+
+
+def test_operator_invalid_motion(editor: QPlainTextEdit, event_filter: NormalEventFilter):
+    press(event_filter, editor, 'd3z')
+    assert EditorMode.mode == Modes.NORMAL
+    assert event_filter.key_sequence == ''
+
+    # the count of the discarded operator is not used by the next command
+    press(event_filter, editor, 'dw')
+    assert editor.toPlainText() == 'two three four\nfive six\nseven (eight)'
+
+
+def test_apply_operator(editor: QPlainTextEdit):
+    cursor = editor.textCursor()
+    cursor.setPosition(4)
+    cursor.setPosition(7, cursor.KeepAnchor)
+
+    apply_operator(cursor, Modes.YANK, 4)
+    assert Registers.get_clipboard()[0] == 'two'
+    assert cursor.position() == 4
+    assert not cursor.hasSelection()
+
+    cursor.setPosition(7, cursor.KeepAnchor)
+    apply_operator(cursor, Modes.VISUAL)
+    assert cursor.selectedText() == 'two'
+
+    apply_operator(cursor, Modes.DELETE)
+    assert editor.toPlainText() == 'one  three four\nfive six\nseven (eight)'
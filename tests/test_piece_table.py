@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from vimdcc.piece_table import PieceTable
+
+
+def check(table: PieceTable, text: str):
+    assert len(table) == len(text)
+    assert table.line_count() == text.count('\n') + 1
+
+    starts = [0] + [i + 1 for i, char in enumerate(text) if char == '\n']
+    for line, start in enumerate(starts):
+        assert table.line_start(line) == start
+
+    for position in range(len(text) + 1):
+        assert table.line_of(position) == text.count('\n', 0, position)
+
+    assert table.substring(2, 9) == text[2:9]
+    assert table.text() == text
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_edits(seed: int):
+    rng = random.Random(seed)
+    text = 'one\ntwo three\n\nfour'
+    table = PieceTable(text)
+
+    for _ in range(200):
+        position = rng.randint(0, len(text))
+        if rng.random() < 0.6:
+            insert = rng.choice(['x', 'yz', '\n', 'a\nb', ' \n\n'])
+            table.insert(position, insert)
+            text = text[:position] + insert + text[position:]
+        else:
+            length = rng.randint(0, 5)
+            table.delete(position, length)
+            text = text[:position] + text[position + length:]
+
+        assert len(table) == len(text)
+        if position < len(text):
+            assert table.char_at(position) == text[position]
+
+    check(table, text)
+
+
+def test_typing():
+    table = PieceTable('ab\ncd')
+    for i, char in enumerate('x\ny'):
+        table.insert(1 + i, char)
+
+    # the typed characters extend the same buffer
+    check(table, 'ax\nyb\ncd')
+
+
+def test_line_start_out_of_range():
+    with pytest.raises(IndexError):
+        PieceTable('one\ntwo').line_start(2)
@@ -0,0 +1,64 @@
+import pytest
+from PySide2.QtGui import QTextCursor
+from pytestqt.qtbot import QtBot
+from PySide2.QtWidgets import QPlainTextEdit
+
+from vimdcc.position_tracker import get_position_tracker
+
+
+@pytest.fixture()
+def editor(qtbot: QtBot) -> QPlainTextEdit:
+    return QPlainTextEdit()
+
+
+@pytest.mark.parametrize('position, removed, inserted, tracked, expected', [
+    (0, 0, 'foo', 4, 7),
+    (4, 0, 'foo', 4, 7),
+    (5, 0, 'foo', 4, 4),
+    (0, 2, '', 4, 2),
+    (2, 4, '', 4, 2),
+    (2, 2, '', 4, 2),
+    (2, 4, 'abc', 10, 9),
+    (6, 2, '', 4, 4),
+])
+def test_tracked_position(
+    editor: QPlainTextEdit,
+    position: int,
+    removed: int,
+    inserted: str,
+    tracked: int,
+    expected: int
+):
+    editor.setPlainText('foo bar foo bar')
+    tracker = get_position_tracker(editor.document())
+    tracked_position = tracker.track(tracked)
+
+    cursor = editor.textCursor()
+    cursor.setPosition(position)
+    cursor.setPosition(position + removed, QTextCursor.KeepAnchor)
+    cursor.insertText(inserted)
+
+    assert tracked_position.position == expected
+
+
+def test_tracked_position_release(editor: QPlainTextEdit):
+    tracker = get_position_tracker(editor.document())
+    tracked = tracker.track(0)
+    assert len(tracker) == 1
+
+    tracker.release(tracked)
+    assert len(tracker) == 0
+    assert tracker is get_position_tracker(editor.document())
+
+
+def test_tracker_invalidated_wrapper(editor: QPlainTextEdit):
+    editor.setPlainText('foo bar')
+    tracker = get_position_tracker(editor.document())
+    tracked = tracker.track(4)
+
+    # invalidates the wrapper of the document the tracker was created for
+    editor.textCursor().document()
+    editor.textCursor().insertText('new ')
+
+    assert get_position_tracker(editor.document()) is tracker
+    assert tracked.position == 8
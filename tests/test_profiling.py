@@ -0,0 +1,100 @@
+import pstats
+import pathlib
+import cProfile
+
+import pytest
+from PySide2.QtGui import QKeyEvent
+from PySide2.QtCore import Qt, QEvent
+from pytestqt.qtbot import QtBot
+from PySide2.QtWidgets import QPlainTextEdit
+
+from vimdcc.editor_mode import Modes, EditorMode
+from vimdcc.editor_filters import NormalEventFilter
+from vimdcc.handlers.normal import MotionHandler
+from vimdcc.utils.profiling import SessionProfiler, collapsed_stacks
+
+
+def leaf():
+    return sum(range(20000))
+
+
+def branch():
+    return leaf() + leaf()
+
+
+@pytest.fixture()
+def profiler(tmp_path: pathlib.Path) -> SessionProfiler:
+    return SessionProfiler(tmp_path)
+
+
+def test_profiler_not_running(profiler: SessionProfiler):
+    with profiler.profile():
+        branch()
+
+    assert profiler.running is False
+    assert profiler.stop() is None
+
+
+def test_profiler_accumulates(profiler: SessionProfiler):
+    profiler.start()
+    for _ in range(3):
+        with profiler.profile():
+            branch()
+
+    # code outside of the profiled blocks is not recorded
+    leaf()
+
+    path = profiler.stop(collapsed=True)
+    assert profiler.running is False
+    assert path.suffix == '.prof'
+    assert path.with_suffix('.txt').exists()
+    assert path.with_suffix('.collapsed').exists()
+
+    stats = pstats.Stats(str(path))
+    calls = {name: values[1] for (_, _, name), values in stats.stats.items()}
+    assert calls['branch'] == 3
+    assert calls['leaf'] == 6
+
+
+def test_profiler_timestamped_files(profiler: SessionProfiler):
+    paths = []
+    for _ in range(2):
+        profiler.toggle()
+        with profiler.profile():
+            leaf()
+        paths.append(profiler.toggle())
+
+    assert paths[0] != paths[1]
+    assert all(path.exists() for path in paths)
+    assert not paths[0].with_suffix('.collapsed').exists()
+
+
+def test_collapsed_stacks():
+    profile = cProfile.Profile()
+    profile.enable()
+    branch()
+    profile.disable()
+
+    lines = collapsed_stacks(pstats.Stats(profile))
+    stacks = [line.rsplit(' ', 1)[0] for line in lines]
+
+    assert any(stack.endswith(':branch') for stack in stacks)
+    assert any(':branch;' in stack and stack.endswith(':leaf') for stack in stacks)
+    assert all(int(line.rsplit(' ', 1)[1]) > 0 for line in lines)
+
+
+def test_filter_profiled(qtbot: QtBot, monkeypatch, profiler: SessionProfiler):
+    monkeypatch.setattr('vimdcc.editor_filters.Profiler', profiler)
+
+    EditorMode.mode = Modes.NORMAL
+    editor = QPlainTextEdit()
+    editor.setPlainText('one two three')
+    event_filter = NormalEventFilter(editor, [MotionHandler])
+
+    profiler.start()
+    event = QKeyEvent(QEvent.KeyPress, Qt.Key_W, Qt.NoModifier, 'w')
+    event_filter.eventFilter(editor, event)
+    path = profiler.stop()
+
+    stats = pstats.Stats(str(path))
+    assert any(name == 'parse_keys' for (_, _, name) in stats.stats)
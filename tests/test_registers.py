@@ -1,11 +1,17 @@
 
+import json
+import pathlib
 from typing import List
-from dataclasses import dataclass
+from unittest import mock
+from dataclasses import asdict, dataclass
 
 import pytest
+from pytestqt.qtbot import QtBot
 
-from vimdcc.registers import (Clipboard, RegistersData, RegisterFileInterface,
-                              _Registers)
+from vimdcc.settings import Settings
+from vimdcc.registers import (Payload, Clipboard, PayloadStore, RegisterFile,
+                              RegistersData, JournalRegisterFile,
+                              RegisterFileInterface, _Registers)
 
 
 @dataclass
@@ -18,22 +24,35 @@ def test_clipboard():
 
     clipboard = Clipboard(['a'])
     clipboard.size = 3
-    assert clipboard.history == ['a']
+    assert list(clipboard.history) == ['a']
     assert clipboard.get(0) == 'a'
 
     clipboard.add('b')
-    assert clipboard.history == ['b', 'a']
+    assert list(clipboard.history) == ['b', 'a']
 
     # does not add duplicate
     clipboard.add('b')
-    assert clipboard.history == ['b', 'a']
+    assert list(clipboard.history) == ['b', 'a']
 
     clipboard.add('c')
-    assert clipboard.history == ['c', 'b', 'a']
+    assert list(clipboard.history) == ['c', 'b', 'a']
 
     # max 3 items
     clipboard.add('d')
-    assert clipboard.history == ['d', 'c', 'b']
+    assert list(clipboard.history) == ['d', 'c', 'b']
+
+    # the newest items are kept
+    clipboard.size = 2
+    assert list(clipboard.history) == ['d', 'c']
+    clipboard.size = 4
+    clipboard.add('e')
+    clipboard.add('f')
+    clipboard.add('g')
+    assert list(clipboard.history) == ['g', 'f', 'e', 'd']
+
+
+def as_json(registers: RegistersData) -> dict:
+    return json.loads(json.dumps(asdict(registers), default=list))
 
 
 class RegisterFileMock(RegisterFileInterface):
@@ -53,7 +72,7 @@ def test_registers_add():
     register = _Registers(RegisterFileMock())
     register.add('a')
     register.add('b')
-    assert register.registers.clipboard == ['b', 'a']
+    assert list(register.registers.clipboard) == ['b', 'a']
 
 
 def test_registers_add_named():
@@ -62,7 +81,7 @@ def test_registers_add_named():
     register.set_named_register('a')
     register.add('a')
 
-    assert register.registers.clipboard == ['a']
+    assert list(register.registers.clipboard) == ['a']
     assert register.registers.named == {'a': 'a'}
     assert register._named_register is None
 
@@ -93,6 +112,25 @@ def test_register_get_numbered_value():
     assert register.get_numbered_register_value(2) is None
 
 
+def test_clipboard_load_longer_history(monkeypatch):
+    monkeypatch.setattr(Settings, 'clipboard_size', 3)
+    clipboard = Clipboard(['new1', 'new2', 'new3', 'old1', 'old2'])
+    assert list(clipboard.history) == ['new1', 'new2', 'new3']
+
+
+def test_registers_clipboard_size():
+    register = _Registers(RegisterFileMock())
+    for value in 'abc':
+        register.add(value)
+
+    register.set_clipboard_size(2)
+    register.add('d')
+
+    assert list(register.get_clipboard()) == ['d', 'c']
+    assert register.get_numbered_register_value(1) == 'c'
+    assert register.get_numbered_register_value(2) is None
+
+
 def test_register_add_mark():
     register = _Registers(RegisterFileMock())
     register.add_mark('a', 'b', 1)
@@ -107,6 +145,199 @@ def test_register_add_space():
     register.set_named_register('a')
     register.add('\u2029')
 
-    assert register.registers.clipboard == []
+    assert list(register.registers.clipboard) == []
     assert register.get_numbered_register_value(0) is None
     assert register.get_named_register_value() is None
+
+
+def test_registers_write_behind():
+    register_file = mock.Mock(wraps=RegisterFileMock())
+    register = _Registers(register_file)
+
+    register.add('a')
+    register.set_named_register_value('b', 'b')
+    register.add_mark('c', 'c', 0)
+    register_file.append.assert_not_called()
+
+    # the changes are written once
+    register.flush()
+    register.flush()
+    register_file.append.assert_called_once()
+    assert [change['op'] for change in register_file.append.call_args[0][1]] == [
+        'clipboard', 'named', 'mark'
+    ]
+
+    # the registers edited in place are written in full
+    register.save_later()
+    register.add('d')
+    register.flush()
+    register_file.save.assert_called_once()
+
+
+def test_registers_save_timer(qtbot: QtBot):
+    register_file = mock.Mock(wraps=RegisterFileMock())
+    register = _Registers(register_file)
+    register._save_timer.setInterval(10)
+
+    register.add('a')
+    register.add('b')
+    qtbot.waitUntil(lambda: register_file.append.called)
+
+    register_file.append.assert_called_once()
+
+
+def test_register_file_atomic_save(tmp_path: pathlib.Path):
+    path = tmp_path / 'registers.json'
+    register_file = RegisterFile(path)
+    registers = register_file.load()
+
+    registers.named['a'] = 'a'
+    register_file.save(registers)
+    assert json.loads(path.read_text())['named'] == {'a': 'a'}
+
+    # a failed write keeps the previous file
+    registers.named['b'] = object()
+    with pytest.raises(TypeError):
+        register_file.save(registers)
+
+    assert json.loads(path.read_text())['named'] == {'a': 'a'}
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_journal_register_file(tmp_path: pathlib.Path):
+    path = tmp_path / 'registers.journal'
+    register = _Registers(JournalRegisterFile(path))
+
+    register.add('a')
+    register.set_named_register('x')
+    register.add('b')
+    register.add_last_search('c')
+    register.add_mark('m', 'line', 3)
+    register.flush()
+
+    # the snapshot and one line per change
+    assert len(path.read_text().splitlines()) == 7
+
+    registers = JournalRegisterFile(path).load()
+    assert as_json(registers) == as_json(register.registers)
+    assert registers.clipboard == ['c', 'b', 'a']
+    assert registers.named == {'x': 'b'}
+
+
+def test_journal_register_file_compact(tmp_path: pathlib.Path):
+    path = tmp_path / 'registers.journal'
+    register = _Registers(JournalRegisterFile(path, compact_size=100))
+
+    for i in range(20):
+        register.add(f'item {i}')
+        register.flush()
+
+    assert len(path.read_text().splitlines()) < 20
+    assert as_json(JournalRegisterFile(path).load()) == as_json(register.registers)
+
+
+def test_journal_register_file_torn_line(tmp_path: pathlib.Path):
+    path = tmp_path / 'registers.journal'
+    register = _Registers(JournalRegisterFile(path))
+    register.add('a')
+    register.flush()
+
+    with path.open('a') as f:
+        f.write('{"op": "clipboard", "val')
+
+    register = _Registers(JournalRegisterFile(path))
+    assert list(register.get_clipboard()) == ['a']
+
+    # the changes after the cut line are not lost
+    register.add('b')
+    register.flush()
+    assert JournalRegisterFile(path).load().clipboard == ['b', 'a']
+
+
+def test_journal_register_file_initial(tmp_path: pathlib.Path):
+    initial = RegisterFile(tmp_path / 'registers.json')
+    registers = initial.load()
+    registers.named['a'] = 'a'
+    initial.save(registers)
+
+    journal = JournalRegisterFile(tmp_path / 'registers.journal', initial)
+    assert journal.load().named == {'a': 'a'}
+
+
+def test_registers_payloads(tmp_path: pathlib.Path):
+    path = tmp_path / 'registers.json'
+    payloads = PayloadStore(tmp_path / 'payloads', size=10)
+    register = _Registers(RegisterFile(path), payloads)
+
+    large = 'large\nyank' * 10
+    register.set_named_register('a')
+    register.add(large)
+    register.add('small')
+    register.flush()
+
+    # only the reference of the large value is in the registers file
+    text = path.read_text()
+    assert large not in text
+    assert len(list((tmp_path / 'payloads').iterdir())) == 1
+
+    loaded = _Registers(RegisterFile(path), PayloadStore(tmp_path / 'payloads', size=10))
+    payload = loaded.get_clipboard()[1]
+    assert isinstance(payload, Payload)
+    assert payload._text is None
+
+    assert loaded.get_numbered_register_value(1) == large
+    loaded.set_named_register('a')
+    assert loaded.get_named_register_value() == large
+
+
+def test_registers_payloads_prune(tmp_path: pathlib.Path):
+    payloads = PayloadStore(tmp_path, size=1)
+    register = _Registers(RegisterFileMock(), payloads)
+    register.add('first')
+    register.add('second')
+    register.add('first')
+    assert len(list(tmp_path.iterdir())) == 2
+
+    register.clear()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_registers_payloads_prune_compaction(tmp_path: pathlib.Path):
+    journal = JournalRegisterFile(tmp_path / 'registers.journal', compact_size=150)
+    payloads = PayloadStore(tmp_path / 'payloads', size=10)
+    register = _Registers(journal, payloads)
+    register.set_clipboard_size(1)
+
+    register.add('first large yank')
+    register.flush()
+    register.add('second large yank')
+    register.flush()
+
+    # the journal still references the first payload
+    assert len(list((tmp_path / 'payloads').iterdir())) == 2
+
+    register.add('third large yank')
+    register.flush()
+    assert [path.stem for path in (tmp_path / 'payloads').iterdir()] == [
+        register.get_clipboard()[0].digest
+    ]
+
+
+def test_registers_payloads_missing(tmp_path: pathlib.Path):
+    path = tmp_path / 'registers.json'
+    register = _Registers(RegisterFile(path), PayloadStore(tmp_path / 'payloads', size=10))
+    register.set_named_register('a')
+    register.add('large\nyank' * 10)
+    register.add('small')
+    register.flush()
+
+    for payload in (tmp_path / 'payloads').iterdir():
+        payload.unlink()
+
+    loaded = _Registers(RegisterFile(path), PayloadStore(tmp_path / 'payloads', size=10))
+    assert list(loaded.get_clipboard()) == ['small']
+    assert loaded.get_named_register() == {}
+
+    # the references of the dropped registers are removed from the file
+    loaded.flush()
+    assert 'PAYLOAD' not in path.read_text()
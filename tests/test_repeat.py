@@ -0,0 +1,88 @@
+import pytest
+from PySide2.QtGui import QKeyEvent
+from PySide2.QtCore import Qt, QEvent
+from pytestqt.qtbot import QtBot
+from PySide2.QtWidgets import QApplication, QPlainTextEdit
+
+from vimdcc.repeat import LastChange
+from vimdcc.editor_mode import Modes, EditorMode
+from vimdcc.editor_filters import EditorEventFilter
+from vimdcc.handlers.normal import (EditHandler, YankHandler, InsertHandler,
+                                    MotionHandler)
+
+TEXT = 'one two three four five'
+
+
+@pytest.fixture()
+def editor(qtbot: QtBot) -> QPlainTextEdit:
+    EditorMode.mode = Modes.NORMAL
+    LastChange.change = None
+    editor = QPlainTextEdit()
+    editor.setPlainText(TEXT)
+    yield editor
+    EditorMode.mode = Modes.NORMAL
+
+
+@pytest.fixture()
+def event_filter(editor: QPlainTextEdit) -> EditorEventFilter:
+    return EditorEventFilter(editor, [MotionHandler, InsertHandler, YankHandler, EditHandler])
+
+
+def press(event_filter: EditorEventFilter, editor: QPlainTextEdit, keys: str):
+    """Press the keys, the keys not consumed by the filter are typed in the editor."""
+    special = {'<Esc>': Qt.Key_Escape, '<BS>': Qt.Key_Backspace, '<CR>': Qt.Key_Return}
+    tokens = keys.replace('<', '\0<').replace('>', '>\0').split('\0')
+
+    for token in tokens:
+        for key in [token] if token in special else token:
+            if key in special:
+                text = '\r' if key == '<CR>' else ''
+                event = QKeyEvent(QEvent.KeyPress, special[key], Qt.NoModifier, text)
+            else:
+                event = QKeyEvent(QEvent.KeyPress, ord(key.upper()), Qt.NoModifier, key)
+
+            if not event_filter.eventFilter(editor, event):
+                QApplication.sendEvent(editor, event)
+
+
+@pytest.mark.parametrize('keys, expected_text', [
+    ('dw.', 'three four five'),
+    ('dw3.', 'five'),
+    ('d2w.', 'five'),
+    ('x..', ' two three four five'),
+    ('cezero<Esc>w.', 'zero zero three four five'),
+    ('cezer<BS>ro<Esc>w.', 'zero zero three four five'),
+    ('ix<Esc>.', 'xxone two three four five'),
+    ('Ax<CR>y<Esc>.', 'one two three four fivex\nyx\ny'),
+    ('dww.', 'two four five'),
+    ('yw.', TEXT),
+    ('.', TEXT),
+])
+def test_repeat(
+    editor: QPlainTextEdit,
+    event_filter: EditorEventFilter,
+    keys: str,
+    expected_text: str
+):
+    press(event_filter, editor, keys)
+    assert editor.toPlainText() == expected_text
+    assert EditorMode.mode == Modes.NORMAL
+
+
+def test_repeat_undo(editor: QPlainTextEdit, event_filter: EditorEventFilter):
+    press(event_filter, editor, 'cezero<Esc>w.')
+    assert editor.toPlainText() == 'zero zero three four five'
+
+    # the repeat is a single undo step
+    editor.undo()
+    assert editor.toPlainText() == 'zero two three four five'
+
+
+def test_repeat_records_changes(editor: QPlainTextEdit, event_filter: EditorEventFilter):
+    press(event_filter, editor, 'dwyww')
+    assert LastChange.change.params.keys == 'w'
+    assert LastChange.change.params.mode == Modes.DELETE
+
+    press(event_filter, editor, 'ifoo<Esc>')
+    assert LastChange.change.params.keys == 'i'
+    assert LastChange.change.text == 'foo'
@@ -127,7 +127,7 @@ def test_search_hanlder(handler: SearchHandler, data: MotionTest):
 
     params.cursor.setPosition(data.cursor_start)
     for motion in data.motion:
-        params.keys = motion
+        params = params.replace(keys=motion)
         handler.handle(params)
         editor.setTextCursor(params.cursor)
 
@@ -204,7 +204,7 @@ def test_search_hanlder_search(handler: SearchHandler):
         mode=Modes.NORMAL
     )
 
-    params.keys += 'foo'
+    params = params.replace(keys=params.keys + 'foo')
     handler.handle(params)
 
     # go back
@@ -219,7 +219,7 @@ def test_search_hanlder_search(handler: SearchHandler):
     )
 
     # go forward
-    params.keys += 'foo'
+    params = params.replace(keys=params.keys + 'foo')
     handler.handle(params)
     assert params.cursor.position() == 0
 
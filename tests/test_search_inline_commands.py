@@ -58,7 +58,7 @@ def test_search_inline_hanlder(handler: SearchHandler, data: MotionTest):
 
     params.cursor.setPosition(data.cursor_start)
     for motion in data.motion:
-        params.keys = motion
+        params = params.replace(keys=motion)
         handler.handle(params)
         editor.setTextCursor(params.cursor)
 
@@ -55,7 +55,7 @@ def test_swap_case_motion(swapCaseHandler: SwapCaseHandler, data: MotionTest):
     params.cursor.setPosition(data.cursor_start)
     params.cursor.setPosition(data.cursor_end, QTextCursor.KeepAnchor)
 
-    params.keys = data.motion[0]
+    params = params.replace(keys=data.motion[0])
     swapCaseHandler.handle(params)
     editor.setTextCursor(params.cursor)
 
@@ -94,11 +94,11 @@ def test_swap_case_motion_with_motion(
     )
 
     params.cursor.setPosition(data.cursor_start)
-    params.keys = data.motion
+    params = params.replace(keys=data.motion)
 
     motionHandler.handle(params)
 
-    params.keys = data.command
+    params = params.replace(keys=data.command)
     swapCaseHandler.handle(params)
 
     editor.setTextCursor(params.cursor)
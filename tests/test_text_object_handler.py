@@ -59,7 +59,7 @@ def test_text_object_handler(handler: TextObjectsHandler, data: MotionTest) -> N
 
     params.cursor.setPosition(data.cursor_start)
 
-    params.keys = data.motion[0]
+    params = params.replace(keys=data.motion[0])
     handler.handle(params)
     editor.setTextCursor(params.cursor)
 
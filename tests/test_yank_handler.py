@@ -47,7 +47,7 @@ def test_yank_handler(handler: YankHandler, data: MotionTest):
     params.cursor.setPosition(data.cursor_start)
 
     for motion in data.motion:
-        params.keys = motion
+        params = params.replace(keys=motion)
         handler.handle(params)
         editor.setTextCursor(params.cursor)
 
@@ -76,7 +76,7 @@ def test_paste_handler(handler: YankHandler, data: MotionTest):
     params.cursor.setPosition(data.cursor_start)
 
     for motion in data.motion:
-        params.keys = motion
+        params = params.replace(keys=motion)
         handler.handle(params)
         editor.setTextCursor(params.cursor)
 
@@ -1,6 +1,11 @@
 from abc import ABC, abstractmethod
 
-from .registers import Registers
+from PySide2.QtGui import QTextCursor
+
+from .jumplist import get_jumplist
+from .operators import apply_operator
+from .editor_state import get_editor_state
+from .editor_adapter import TextEditor
 from .handler_parameters import HandlerParams
 
 
@@ -16,14 +21,47 @@ class MoveCommand(ABC):
     """Interface for all move commands.
 
     A move command is similar to a BaseCommand, but it performs a pre and post
-    actions based on the mode.
+    actions based on the mode: in the operator modes the range from the initial
+    position to the new one is passed to `apply_operator`.
+
+    When `jump` is True, the position the cursor moved from is added to the
+    jumplist.
+
+    When `counted` is False the motion is repeated `count` times, otherwise the
+    command reads `params.count` itself (e.g. `3j` or `5G`).
+
+    When `inclusive` is True the character under the new position is part of
+    the selected range (e.g. `de` deletes the last character of the word).
+
+    When `horizontal` is True the desired column of the vertical motions is
+    reset, even when the cursor ends where the last vertical motion left it
+    (e.g. `jhlj`).
 
     """
+    editor: TextEditor
     initial_position = None
+    jump = False
+    counted = False
+    inclusive = False
+    horizontal = False
 
     def execute(self, params: HandlerParams) -> bool:
         self.initial_position = params.cursor.position()
         result = self._do_execute(params)
+
+        if not self.counted:
+            for _ in range((params.count or 1) - 1):
+                result = self._do_execute(params)
+
+        if self.inclusive and params.visual:
+            params.cursor.movePosition(QTextCursor.NextCharacter, params.anchor)
+
+        if self.horizontal:
+            get_editor_state(self.editor).reset_desired_column()
+
+        if self.jump and params.cursor.position() != self.initial_position:
+            get_jumplist(self.editor.document()).push(self.initial_position)
+
         self._post_execute(params)
         return result
 
@@ -32,25 +70,4 @@ def _do_execute(self, params: HandlerParams) -> bool:
         """The actual execution logic to be implemented by subclasses."""
 
     def _post_execute(self, params: HandlerParams) -> None:
-        self.select_entire_line(params)
-        self.yank_selected_text(params)
-        self.remove_selected_text(params)
-
-    def select_entire_line(self, params: HandlerParams) -> None:
-        if params.mode == 'VISUAL_LINE':
-            params.cursor.movePosition(params.cursor.StartOfLine, params.cursor.KeepAnchor)
-            params.cursor.movePosition(params.cursor.EndOfLine, params.cursor.KeepAnchor)
-
-    def remove_selected_text(self, params: HandlerParams) -> None:
-        if params.mode in ['DELETE', 'CHANGE']:
-            Registers.add(params.cursor.selectedText())
-            params.cursor.removeSelectedText()
-
-    def yank_selected_text(self, params: HandlerParams) -> None:
-        if params.mode == 'YANK':
-            Registers.add(params.cursor.selectedText())
-            params.cursor.clearSelection()
-
-            # Restore the cursor position to the initial position
-            if self.initial_position is not None:
-                params.cursor.setPosition(self.initial_position)
+        apply_operator(params.cursor, params.mode, self.initial_position)
@@ -1,71 +1,155 @@
 from PySide2.QtGui import QTextCursor
-from PySide2.QtWidgets import QPlainTextEdit
 
 from ..command_base import MoveCommand
+from ..editor_state import get_editor_state
+from ..document_index import get_blank_block_index
+from ..editor_adapter import TextEditor
 from ..handler_parameters import HandlerParams
 
 
+def visible_lines(editor: TextEditor) -> int:
+    """Return the number of lines that fit in the editor viewport."""
+    return max(1, editor.viewport().height() // editor.fontMetrics().lineSpacing())
+
+
+def move_to_block(params: HandlerParams, editor: TextEditor, number: int) -> None:
+    """Move the cursor to the block `number` keeping the desired column.
+
+    The block is found with a single `findBlockByNumber` lookup and `number` is
+    clamped to the document blocks.
+    """
+    cursor = params.cursor
+    document = editor.document()
+    state = get_editor_state(editor)
+    column = state.get_desired_column(cursor.position(), cursor.positionInBlock())
+
+    block = document.findBlockByNumber(max(0, min(number, document.blockCount() - 1)))
+    last_column = block.length() - 1 if params.visual else block.length() - 2
+    cursor.setPosition(block.position() + min(column, max(last_column, 0)), params.anchor)
+    state.set_desired_column(cursor.position(), column)
+
+
 class MoveDocumentUp(MoveCommand):
-    def __init__(self, editor: QPlainTextEdit):
+    jump = True
+    counted = True
+
+    def __init__(self, editor: TextEditor):
         self.editor = editor
 
     def _do_execute(self, params: HandlerParams) -> bool:
+        if params.count:
+            move_to_block(params, self.editor, params.count - 1)
+            return True
+
         params.cursor.movePosition(QTextCursor.Start, params.anchor)
         return True
 
 
 class MoveDocumentDown(MoveCommand):
-    def __init__(self, editor: QPlainTextEdit):
+    jump = True
+    counted = True
+
+    def __init__(self, editor: TextEditor):
         self.editor = editor
 
     def _do_execute(self, params: HandlerParams) -> bool:
+        if params.count:
+            move_to_block(params, self.editor, params.count - 1)
+            return True
+
         params.cursor.movePosition(QTextCursor.End, params.anchor)
         if not params.visual:
             params.cursor.movePosition(QTextCursor.PreviousCharacter, params.anchor)
         return True
 
 
+class MoveToLine(MoveCommand):
+    """Move to the line number typed in the command line (e.g. `:18`)."""
+    jump = True
+    counted = True
+
+    def __init__(self, editor: TextEditor):
+        self.editor = editor
+
+    def _do_execute(self, params: HandlerParams) -> bool:
+        move_to_block(params, self.editor, int(params.keys[1:]) - 1)
+        return True
+
+
 class MoveParagraphUp(MoveCommand):
-    def __init__(self, editor: QPlainTextEdit):
+    jump = True
+    counted = True
+
+    def __init__(self, editor: TextEditor):
         self.editor = editor
 
     def _do_execute(self, params: HandlerParams) -> bool:
         cursor = params.cursor
         document = self.editor.document()
-        paragraphs_left = False
 
-        for i in range(cursor.blockNumber() - 1, -1, -1):
-            current_line = document.findBlockByLineNumber(i)
-            if current_line.text() == '':
-                paragraphs_left = True
-                cursor.setPosition(current_line.position(), params.anchor)
-                break
+        index = get_blank_block_index(document)
+        number = index.previous_blank(cursor.blockNumber(), params.count or 1)
 
-        if not paragraphs_left:
+        if number is None:
             cursor.movePosition(QTextCursor.Start, params.anchor)
+        else:
+            cursor.setPosition(document.findBlockByNumber(number).position(), params.anchor)
 
         return True
 
 
 class MoveParagraphDown(MoveCommand):
-    def __init__(self, editor: QPlainTextEdit):
+    jump = True
+    counted = True
+
+    def __init__(self, editor: TextEditor):
         self.editor = editor
 
     def _do_execute(self, params: HandlerParams) -> bool:
         cursor = params.cursor
         document = self.editor.document()
 
-        paragraphs_left = False
-        for i in range(cursor.blockNumber() + 1, document.lineCount()):
-            current_line = document.findBlockByLineNumber(i)
-            if current_line.text() == '':
-                cursor.setPosition(current_line.position(), params.anchor)
-                paragraphs_left = True
-                break
+        index = get_blank_block_index(document)
+        number = index.next_blank(cursor.blockNumber(), params.count or 1)
 
-        if not paragraphs_left:
+        if number is None:
             cursor.movePosition(QTextCursor.End, params.anchor)
             if not params.visual:
                 cursor.movePosition(QTextCursor.PreviousCharacter, params.anchor)
+        else:
+            cursor.setPosition(document.findBlockByNumber(number).position(), params.anchor)
 
         return True
+
+
+def create_scroll_command(pages: float):
+    """Create a command that scrolls the view and the cursor by a fraction of a page.
+
+    The target block is computed from the viewport line capacity and reached with
+    a single `findBlockByNumber` lookup, so scrolling costs the same regardless
+    of the distance. The scrollbar is moved once so the view is repainted once.
+    """
+    class ScrollCommand(MoveCommand):
+        counted = True
+
+        def __init__(self, editor: TextEditor):
+            self.editor = editor
+
+        def _do_execute(self, params: HandlerParams) -> bool:
+            lines = max(1, int(visible_lines(self.editor) * abs(pages)))
+            if pages < 0:
+                lines = -lines
+
+            move_to_block(params, self.editor, params.cursor.blockNumber() + lines)
+
+            scrollbar = self.editor.verticalScrollBar()
+            scrollbar.setValue(scrollbar.value() + lines)
+            return True
+
+    return ScrollCommand
+
+
+ScrollHalfPageDown = create_scroll_command(0.5)
+ScrollHalfPageUp = create_scroll_command(-0.5)
+ScrollPageDown = create_scroll_command(1)
+ScrollPageUp = create_scroll_command(-1)
@@ -1,7 +1,7 @@
 from PySide2.QtGui import QTextCursor
-from PySide2.QtWidgets import QPlainTextEdit
 
 from ..command_base import BaseCommand
+from ..editor_adapter import TextEditor
 from ..handler_parameters import HandlerParams
 
 # TODO: When Calling O, o commands, the cursor should keep the same column
@@ -10,7 +10,7 @@
 
 def create_insert_command(move_position: QTextCursor.MoveOperation):
     class InsertCommand(BaseCommand):
-        def __init__(self, editor: QPlainTextEdit):
+        def __init__(self, editor: TextEditor):
             self.editor = editor
 
         def execute(self, params: HandlerParams):
@@ -21,7 +21,7 @@ def execute(self, params: HandlerParams):
 
 
 class InsertO(BaseCommand):
-    def __init__(self, editor: QPlainTextEdit):
+    def __init__(self, editor: TextEditor):
         self.editor = editor
 
     def execute(self, params: HandlerParams):
@@ -32,7 +32,7 @@ def execute(self, params: HandlerParams):
 
 
 class Inserto(BaseCommand):
-    def __init__(self, editor: QPlainTextEdit):
+    def __init__(self, editor: TextEditor):
         self.editor = editor
 
     def execute(self, params: HandlerParams):
@@ -1,19 +1,23 @@
 from PySide2.QtGui import QTextCursor
-from PySide2.QtWidgets import QPlainTextEdit
 
+from .document import move_to_block
 from ..command_base import MoveCommand
+from ..editor_state import END_OF_LINE, get_editor_state
+from ..editor_adapter import TextEditor, TextDocument
 from ..handler_parameters import HandlerParams
 
 
 class MoveWordForward(MoveCommand):
-    def __init__(self, editor: QPlainTextEdit):
+    horizontal = True
+
+    def __init__(self, editor: TextEditor):
         self.editor = editor
 
     def _do_execute(self, params: HandlerParams) -> bool:
         params.cursor.movePosition(QTextCursor.NextWord, params.anchor)
 
         position = params.cursor.position()
-        character = params.cursor.document().characterAt(position)
+        character = self.editor.document().characterAt(position)
         if character in ['\u2029', '\n']:
             params.cursor.movePosition(QTextCursor.NextWord, params.anchor)
 
@@ -21,7 +25,10 @@ def _do_execute(self, params: HandlerParams) -> bool:
 
 
 class MoveWordForwardEnd(MoveCommand):
-    def __init__(self, editor: QPlainTextEdit):
+    inclusive = True
+    horizontal = True
+
+    def __init__(self, editor: TextEditor):
         self.editor = editor
 
     def move_to_next_end_word(self, params: HandlerParams):
@@ -37,7 +44,7 @@ def _do_execute(self, params: HandlerParams) -> bool:
 
         while cursor.movePosition(QTextCursor.NextCharacter, params.anchor):
             position = cursor.position()
-            character = cursor.document().characterAt(position)
+            character = self.editor.document().characterAt(position)
 
             if character.isalnum():
                 has_seen_alnum = True
@@ -51,21 +58,20 @@ def _do_execute(self, params: HandlerParams) -> bool:
                 cursor.movePosition(QTextCursor.PreviousCharacter, params.anchor)
                 break
 
-        if params.mode in ['VISUAL', 'YANK', 'DELETE', 'CHANGE']:
-            params.cursor.movePosition(QTextCursor.NextCharacter, params.anchor)
-
         return True
 
 
 class MoveWordBackward(MoveCommand):
-    def __init__(self, editor: QPlainTextEdit):
+    horizontal = True
+
+    def __init__(self, editor: TextEditor):
         self.editor = editor
 
     def _do_execute(self, params: HandlerParams) -> bool:
         params.cursor.movePosition(QTextCursor.PreviousWord, params.anchor)
 
         position = params.cursor.position()
-        character = params.cursor.document().characterAt(position)
+        character = self.editor.document().characterAt(position)
         if character.isspace():
             params.cursor.movePosition(QTextCursor.PreviousWord, params.anchor)
 
@@ -73,7 +79,9 @@ def _do_execute(self, params: HandlerParams) -> bool:
 
 
 class MoveWordLeft(MoveCommand):
-    def __init__(self, editor: QPlainTextEdit):
+    horizontal = True
+
+    def __init__(self, editor: TextEditor):
         self.editor = editor
 
     def _do_execute(self, params: HandlerParams) -> bool:
@@ -82,7 +90,9 @@ def _do_execute(self, params: HandlerParams) -> bool:
 
 
 class MoveWordRight(MoveCommand):
-    def __init__(self, editor: QPlainTextEdit):
+    horizontal = True
+
+    def __init__(self, editor: TextEditor):
         self.editor = editor
 
     def _do_execute(self, params: HandlerParams) -> bool:
@@ -90,32 +100,60 @@ def _do_execute(self, params: HandlerParams) -> bool:
         return True
 
 
-class MoveLineUp(MoveCommand):
-    def __init__(self, editor: QPlainTextEdit):
-        self.editor = editor
+def select_lines(params: HandlerParams, document: TextDocument, lines: int) -> None:
+    """Select the whole lines from the cursor line to `lines` lines below or above."""
+    cursor = params.cursor
+    block = cursor.block()
+    number = max(0, min(block.blockNumber() + lines, document.blockCount() - 1))
+    target = document.findBlockByNumber(number)
 
-    def _do_execute(self, params: HandlerParams) -> bool:
-        if params.mode in ['YANK', 'DELETE', 'CHANGE']:
-            params.cursor.movePosition(QTextCursor.EndOfLine, QTextCursor.MoveAnchor)
-            params.cursor.movePosition(QTextCursor.StartOfLine, QTextCursor.KeepAnchor)
-        params.cursor.movePosition(QTextCursor.Up, params.anchor)
-        return True
+    first, last = (block, target) if lines > 0 else (target, block)
+    start = first.position()
+    end = last.position() + last.length() - 1
 
+    if lines > 0:
+        cursor.setPosition(start, QTextCursor.MoveAnchor)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+    else:
+        cursor.setPosition(end, QTextCursor.MoveAnchor)
+        cursor.setPosition(start, QTextCursor.KeepAnchor)
 
-class MoveLineDown(MoveCommand):
-    def __init__(self, editor: QPlainTextEdit):
-        self.editor = editor
 
-    def _do_execute(self, params: HandlerParams) -> bool:
-        if params.mode in ['YANK', 'DELETE', 'CHANGE']:
-            params.cursor.movePosition(QTextCursor.StartOfLine, QTextCursor.MoveAnchor)
-            params.cursor.movePosition(QTextCursor.EndOfLine, QTextCursor.KeepAnchor)
-        params.cursor.movePosition(QTextCursor.Down, params.anchor)
-        return True
+def create_vertical_command(direction: int):
+    """Create a command that moves the cursor `count` lines up or down.
+
+    The target is computed from the block number and the desired column of the
+    editor instead of the layout dependent `QTextCursor.Up/Down`, so the column
+    is kept across short lines and a counted move costs the same as a single one.
+    """
+    class VerticalCommand(MoveCommand):
+        counted = True
+
+        def __init__(self, editor: TextEditor):
+            self.editor = editor
+
+        def _do_execute(self, params: HandlerParams) -> bool:
+            lines = (params.count or 1) * direction
+
+            if params.operator_pending:
+                select_lines(params, self.editor.document(), lines)
+            else:
+                move_to_block(params, self.editor, params.cursor.blockNumber() + lines)
+
+            return True
+
+    return VerticalCommand
+
+
+MoveLineUp = create_vertical_command(-1)
+MoveLineDown = create_vertical_command(1)
 
 
 class MoveLineStart(MoveCommand):
-    def __init__(self, editor: QPlainTextEdit):
+    counted = True
+    horizontal = True
+
+    def __init__(self, editor: TextEditor):
         self.editor = editor
 
     def _do_execute(self, params: HandlerParams) -> bool:
@@ -124,18 +162,29 @@ def _do_execute(self, params: HandlerParams) -> bool:
 
 
 class MoveLineEnd(MoveCommand):
-    def __init__(self, editor: QPlainTextEdit):
+    counted = True
+
+    def __init__(self, editor: TextEditor):
         self.editor = editor
 
     def _do_execute(self, params: HandlerParams) -> bool:
-        params.cursor.movePosition(QTextCursor.EndOfLine, params.anchor)
-        if not params.visual:
-            params.cursor.movePosition(QTextCursor.PreviousCharacter, params.anchor)
+        # `3$` moves to the end of the second line below
+        cursor = params.cursor
+        cursor.movePosition(QTextCursor.NextBlock, params.anchor, (params.count or 1) - 1)
+        cursor.movePosition(QTextCursor.EndOfLine, params.anchor)
+        if not params.visual and cursor.positionInBlock() > 0:
+            cursor.movePosition(QTextCursor.PreviousCharacter, params.anchor)
+
+        # stick to the end of the lines when moving vertically
+        get_editor_state(self.editor).set_desired_column(cursor.position(), END_OF_LINE)
         return True
 
 
 class MoveToStartOfBlock(MoveCommand):
-    def __init__(self, editor: QPlainTextEdit):
+    counted = True
+    horizontal = True
+
+    def __init__(self, editor: TextEditor):
         self.editor = editor
 
     def _do_execute(self, params: HandlerParams) -> bool:
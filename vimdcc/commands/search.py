@@ -1,7 +1,7 @@
 from bisect import bisect_left
 from typing import List, Optional
 
-from PySide2.QtWidgets import QPlainTextEdit
+from ..editor_adapter import TextEditor
 
 Positions = List[int]
 
@@ -44,7 +44,7 @@ class SearchCommand:
     history: Positions = []
     last_search: Optional[str] = None
 
-    def __init__(self, editor: QPlainTextEdit):
+    def __init__(self, editor: TextEditor):
         self.editor = editor
 
     def find(self, search: str):
@@ -1,8 +1,7 @@
 from enum import Enum
 
-from PySide2.QtWidgets import QPlainTextEdit
-
 from ..command_base import BaseCommand
+from ..editor_adapter import TextEditor
 from ..handler_parameters import HandlerParams
 
 
@@ -14,7 +13,7 @@ class SwapMode(str, Enum):
 
 def create_swap_case_command(mode: SwapMode):
     class SwapCaseCommand(BaseCommand):
-        def __init__(self, editor: QPlainTextEdit):
+        def __init__(self, editor: TextEditor):
             self.editor = editor
 
         def execute(self, params: HandlerParams):
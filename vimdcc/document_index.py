@@ -0,0 +1,145 @@
+"""Document indexes kept in sync with the editor edits.
+
+The indexes are built once per document and then patched from the
+`QTextDocument.contentsChange` signal, so the commands can query them without
+walking the document blocks on every key press.
+
+"""
+from bisect import bisect_left, bisect_right
+from typing import List, Optional
+
+from .editor_adapter import TextDocument
+from .document_registry import DocumentRef, DocumentRegistry
+
+
+class BlankBlockIndex:
+    """Sorted block numbers of the empty lines of a document.
+
+    Only the blocks touched by an edit are checked again: the entries before the
+    edit are kept as they are and the entries after it are shifted by the number
+    of blocks added or removed.
+
+    The shift is applied lazily: the entries from `_shift_start` on are stored
+    without the pending `_shift`. The next edit only updates the entries between
+    the two edits, so typing or joining lines costs the blank lines near the
+    cursor instead of all the blank lines below it.
+
+    NOTE: Use `get_blank_block_index` instead of instantiating the class yourself
+    so every command shares the same index for the same document.
+
+    """
+
+    def __init__(self, document: TextDocument):
+        self._document = DocumentRef(document)
+        self._block_count = 0
+        self._blocks: List[int] = []
+        self._shift_start = 0
+        self._shift = 0
+
+        document.contentsChange.connect(self._on_contents_change)
+        self.rebuild()
+
+    @property
+    def blocks(self) -> List[int]:
+        """The block numbers of the empty lines, with the pending shift applied."""
+        self._apply_shift(self._shift_start, len(self._blocks), self._shift)
+        self._shift = 0
+        return self._blocks
+
+    def rebuild(self):
+        document = self._document()
+        if document is None:
+            return
+
+        self._block_count = document.blockCount()
+        self._blocks = []
+        self._shift_start = 0
+        self._shift = 0
+
+        block = document.begin()
+        number = 0
+        while block.isValid():
+            if block.text() == '':
+                self._blocks.append(number)
+            block = block.next()
+            number += 1
+
+    def _apply_shift(self, start: int, end: int, shift: int) -> None:
+        if shift:
+            blocks = self._blocks
+            for index in range(start, end):
+                blocks[index] += shift
+
+    def _value(self, index: int) -> int:
+        number = self._blocks[index]
+        return number + self._shift if index >= self._shift_start else number
+
+    def _bisect_left(self, number: int) -> int:
+        index = bisect_left(self._blocks, number, 0, self._shift_start)
+        if index < self._shift_start:
+            return index
+        return bisect_left(self._blocks, number - self._shift, self._shift_start)
+
+    def _bisect_right(self, number: int) -> int:
+        index = bisect_right(self._blocks, number, 0, self._shift_start)
+        if index < self._shift_start:
+            return index
+        return bisect_right(self._blocks, number - self._shift, self._shift_start)
+
+    def _on_contents_change(self, position: int, chars_removed: int, chars_added: int):
+        document = self._document()
+        if document is None:
+            return
+
+        block_count = document.blockCount()
+        first = document.findBlock(position).blockNumber()
+        last = document.findBlock(position + chars_added).blockNumber()
+        if last == -1:
+            last = block_count - 1
+
+        delta = block_count - self._block_count
+        old_last = last - delta
+
+        if first == -1 or old_last < first - 1:
+            self.rebuild()
+            return
+
+        self._block_count = block_count
+
+        changed: List[int] = []
+        block = document.findBlockByNumber(first)
+        for number in range(first, last + 1):
+            if block.text() == '':
+                changed.append(number)
+            block = block.next()
+
+        start = self._bisect_left(first)
+        end = self._bisect_right(old_last)
+
+        # only the entries between the previous edit and this one are updated:
+        # before this edit they get the pending shift, after it they lose it so
+        # the whole tail shares the new one.
+        self._apply_shift(self._shift_start, start, self._shift)
+        self._apply_shift(end, self._shift_start, -self._shift)
+
+        self._blocks[start:end] = changed
+        self._shift_start = start + len(changed)
+        self._shift += delta
+
+    def next_blank(self, block_number: int, count: int = 1) -> Optional[int]:
+        """Return the `count`th blank block after `block_number` or None."""
+        index = self._bisect_right(block_number) + count - 1
+        return self._value(index) if index < len(self._blocks) else None
+
+    def previous_blank(self, block_number: int, count: int = 1) -> Optional[int]:
+        """Return the `count`th blank block before `block_number` or None."""
+        index = self._bisect_left(block_number) - count
+        return self._value(index) if index >= 0 else None
+
+
+_BLANK_BLOCK_INDEXES: DocumentRegistry[BlankBlockIndex] = DocumentRegistry(BlankBlockIndex)
+
+
+def get_blank_block_index(document: TextDocument) -> BlankBlockIndex:
+    """Return the blank block index of the document, creating it if needed."""
+    return _BLANK_BLOCK_INDEXES.get(document)
@@ -0,0 +1,82 @@
+"""Per document objects that outlive the Python wrapper of the document.
+
+PySide2 can invalidate the wrapper of a `QTextDocument` while the document is
+still alive, e.g. once `editor.textCursor().document()` was called. A registry
+keyed on the wrapper then misses the document, and an object that kept the
+wrapper raises `RuntimeError` on its next use.
+
+The Qt documents are identified by their C++ pointer instead: the objects are
+dropped when the document emits `destroyed` and `DocumentRef` returns a valid
+wrapper of the document. The other documents (e.g. the `HeadlessDocument`)
+are referenced weakly, like any Python object.
+
+"""
+import weakref
+from typing import Any, Dict, Generic, TypeVar, Callable, Optional
+
+import shiboken2
+from PySide2.QtGui import QTextDocument
+from PySide2.QtCore import QObject
+
+from .editor_adapter import TextDocument
+
+T = TypeVar('T')
+
+
+def _pointer(document: QObject) -> int:
+    return shiboken2.getCppPointer(document)[0]
+
+
+class DocumentRef:
+    """Reference to a document that does not keep it alive, like `weakref.ref`.
+
+    Calling the reference returns the document or None once it was deleted.
+    """
+    __slots__ = ('_pointer', '_ref', '__weakref__')
+
+    def __init__(self, document: TextDocument):
+        self._pointer: Optional[int] = None
+        self._ref: Optional['weakref.ref[Any]'] = None
+
+        if isinstance(document, QObject):
+            self._pointer = _pointer(document)
+            document.destroyed.connect(self._on_destroyed)
+        else:
+            self._ref = weakref.ref(document)
+
+    def _on_destroyed(self, *args: Any) -> None:
+        self._pointer = None
+
+    def __call__(self) -> Optional[TextDocument]:
+        if self._ref is not None:
+            return self._ref()
+        if self._pointer is None:
+            return None
+        return shiboken2.wrapInstance(self._pointer, QTextDocument)
+
+
+class DocumentRegistry(Generic[T]):
+    """One object per document, created by `factory` on the first `get`."""
+
+    def __init__(self, factory: Callable[[TextDocument], T]):
+        self._factory = factory
+        self._objects: Dict[int, T] = {}
+        self._weak_objects: 'weakref.WeakKeyDictionary[Any, T]' = weakref.WeakKeyDictionary()
+
+    def __len__(self):
+        return len(self._objects) + len(self._weak_objects)
+
+    def get(self, document: TextDocument) -> T:
+        if not isinstance(document, QObject):
+            value = self._weak_objects.get(document)
+            if value is None:
+                value = self._weak_objects[document] = self._factory(document)
+            return value
+
+        pointer = _pointer(document)
+        value = self._objects.get(pointer)
+        if value is None:
+            value = self._objects[pointer] = self._factory(document)
+            # the pointer can be reused by the next document
+            document.destroyed.connect(lambda *args: self._objects.pop(pointer, None))
+        return value
@@ -0,0 +1,131 @@
+"""The part of the Qt text editor API the commands are written against.
+
+The handlers and commands only use a small subset of `QPlainTextEdit`,
+`QTextDocument`, `QTextBlock` and `QTextCursor`. The protocols below describe
+that subset, so the engine runs on any editor that implements it: the Qt
+widgets of the DCCs or the `HeadlessEditor` of `vimdcc.headless`, which needs
+neither a `QApplication` nor a display.
+
+The move operations, the move modes and the selection types are the
+`QTextCursor` enums for every implementation.
+
+"""
+from typing import Any, Callable, Protocol
+
+from PySide2.QtGui import QTextCursor
+
+
+class Signal(Protocol):
+    def connect(self, slot: Callable[..., Any]) -> Any: ...
+
+    def disconnect(self, slot: Callable[..., Any]) -> Any: ...
+
+
+class TextBlock(Protocol):
+    def text(self) -> str: ...
+
+    def position(self) -> int: ...
+
+    def length(self) -> int: ...
+
+    def blockNumber(self) -> int: ...
+
+    def isValid(self) -> bool: ...
+
+    def next(self) -> 'TextBlock': ...
+
+    def previous(self) -> 'TextBlock': ...
+
+
+class TextDocument(Protocol):
+    # emitted with (position, chars_removed, chars_added) after every edit
+    contentsChange: Signal
+
+    def toPlainText(self) -> str: ...
+
+    def characterAt(self, position: int) -> str: ...
+
+    def characterCount(self) -> int: ...
+
+    def blockCount(self) -> int: ...
+
+    def begin(self) -> TextBlock: ...
+
+    def findBlock(self, position: int) -> TextBlock: ...
+
+    def findBlockByNumber(self, number: int) -> TextBlock: ...
+
+
+class TextCursor(Protocol):
+    def document(self) -> TextDocument: ...
+
+    def position(self) -> int: ...
+
+    def anchor(self) -> int: ...
+
+    def setPosition(self, position: int, mode: QTextCursor.MoveMode = ...) -> None: ...
+
+    def movePosition(
+        self,
+        operation: QTextCursor.MoveOperation,
+        mode: QTextCursor.MoveMode = ...,
+        n: int = ...
+    ) -> bool: ...
+
+    def block(self) -> TextBlock: ...
+
+    def blockNumber(self) -> int: ...
+
+    def positionInBlock(self) -> int: ...
+
+    def select(self, selection: QTextCursor.SelectionType) -> None: ...
+
+    def hasSelection(self) -> bool: ...
+
+    def selectedText(self) -> str: ...
+
+    def selectionStart(self) -> int: ...
+
+    def selectionEnd(self) -> int: ...
+
+    def clearSelection(self) -> None: ...
+
+    def removeSelectedText(self) -> None: ...
+
+    def insertText(self, text: str) -> None: ...
+
+    def deleteChar(self) -> None: ...
+
+    def deletePreviousChar(self) -> None: ...
+
+    def beginEditBlock(self) -> None: ...
+
+    def endEditBlock(self) -> None: ...
+
+
+class TextEditor(Protocol):
+    def document(self) -> TextDocument: ...
+
+    def textCursor(self) -> TextCursor: ...
+
+    def setTextCursor(self, cursor: TextCursor) -> None: ...
+
+    def toPlainText(self) -> str: ...
+
+    def setPlainText(self, text: str) -> None: ...
+
+    def undo(self) -> None: ...
+
+    def redo(self) -> None: ...
+
+    def event(self, event: Any) -> bool: ...
+
+    def setUpdatesEnabled(self, enable: bool) -> None: ...
+
+    def setCursorWidth(self, width: int) -> None: ...
+
+    def fontMetrics(self) -> Any: ...
+
+    def viewport(self) -> Any: ...
+
+    def verticalScrollBar(self) -> Any: ...
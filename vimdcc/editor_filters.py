@@ -1,14 +1,24 @@
-from typing import List, Optional, cast
+from time import perf_counter_ns
+from typing import Dict, List, Optional, cast
 
 from PySide2.QtGui import Qt, QKeyEvent, QTextCursor
-from PySide2.QtCore import QEvent, QObject
-from PySide2.QtWidgets import QPlainTextEdit
+from PySide2.QtCore import QEvent, QTimer, QObject
 
+from .marks import get_live_marks
 from .events import EventManager
+from .keymap import Match, Keymap, KeymapNode, load_user_keymap
 from .logger import LOGGER
+from .macros import Macros, parse_notation
+from .repeat import LastChange
+from .latency import Latency
+from .settings import Settings
+from .operators import OPERATOR_MODES
+from .registers import Registers
 from .status_bar import status_bar
 from .editor_mode import Modes, EditorMode
-from .handler_base import HandlerType, get_normal_handlers
+from .handler_base import BaseHandler, HandlerType, get_normal_handlers
+from .editor_adapter import TextCursor, TextEditor
+from .utils.profiling import Profiler
 from .handler_parameters import HandlerParams
 
 # TODO: Test this module
@@ -25,10 +35,23 @@ def extract_modifiers(modifiers: Qt.KeyboardModifiers) -> List[str]:
     return [name for name, modifier in base_modifiers.items() if modifiers & modifier]
 
 
+def extract_key_text(event: QKeyEvent) -> str:
+    """Return the text of the key event to append to the key sequence.
+
+    Control chords are converted to the Vim notation (e.g. `<C-d>`) since
+    their text is a non printable character.
+    """
+    key = event.key()
+    if event.modifiers() & Qt.ControlModifier and Qt.Key_A <= key <= Qt.Key_Z:
+        return f'<C-{chr(key).lower()}>'
+    return event.text().strip()
+
+
 class BaseFilter(QObject):
     key_sequence = ''
+    count: Optional[int] = None
 
-    def __init__(self, editor: QPlainTextEdit, allowed_modes: List[Modes], parent=None):
+    def __init__(self, editor: TextEditor, allowed_modes: List[Modes], parent=None):
         super().__init__(parent)
         self.allowed_modes = allowed_modes
         self.editor = editor
@@ -38,23 +61,33 @@ def __init__(self, editor: QPlainTextEdit, allowed_modes: List[Modes], parent=No
         }
 
     def eventFilter(self, watched: QObject, event: QEvent):
-        if not isinstance(watched, QPlainTextEdit):
-            assert (
-                False
-            ), 'This event filter should only be installed on a QPlainTextEdit'
-
-        if EditorMode.mode not in self.allowed_modes:
+        if event.type() != QEvent.KeyPress or EditorMode.mode not in self.allowed_modes:
             return False
 
-        if event.type() == QEvent.KeyPress:
+        return self.key_press(cast(TextEditor, watched), event)
+
+    def key_press(self, watched: TextEditor, event: QEvent) -> bool:
+        """Handle a key press of one of the allowed modes."""
+        if Profiler.running:
+            with Profiler.profile():
+                return self._key_press(watched, event)
+
+        return self._key_press(watched, event)
+
+    def _key_press(self, watched: TextEditor, event: QEvent) -> bool:
+        if not Latency.enabled:
             return self.parse_keys(watched, event)
 
-        return False
+        start = perf_counter_ns()
+        handled = self.parse_keys(watched, event)
+        Latency.record(type(self).__name__, perf_counter_ns() - start)
+        return handled
 
     def change_mode(self, mode: Modes, cursor_width: int, keys: str = ''):
         self.editor.setCursorWidth(cursor_width)
         EditorMode.mode = mode
         self.key_sequence = ''
+        self.count = None
         status_bar.write(mode.value, keys)
         return True
 
@@ -64,20 +97,21 @@ def to_normal(self):
     def to_insert(self):
         return self.change_mode(Modes.INSERT, self.cursor_width['line'])
 
-    def parse_keys(self, editor: QPlainTextEdit, event: QEvent) -> bool:
+    def parse_keys(self, editor: TextEditor, event: QEvent) -> bool:
         raise NotImplementedError
 
 
 class InsertEventFilter(BaseFilter):
-    def __init__(self, editor: QPlainTextEdit, parent=None):
+    def __init__(self, editor: TextEditor, parent=None):
         super().__init__(editor, [Modes.INSERT], parent)
         self.editor = editor
 
-    def parse_keys(self, editor: QPlainTextEdit, event: QEvent):
+    def parse_keys(self, editor: TextEditor, event: QEvent):
 
         key_event = cast(QKeyEvent, event)
 
         if event.key() == Qt.Key_Escape:
+            LastChange.finish_insert()
             super().to_normal()
             return True
 
@@ -85,15 +119,22 @@ def parse_keys(self, editor: QPlainTextEdit, event: QEvent):
             self.editor.redo()
             return True
 
+        LastChange.record_key(key_event)
         return False
 
 
 class NormalEventFilter(BaseFilter):
-    operators = ['d', 'c', 'y', 'v']
-    text_objects = ['i', 'a']
+    """Parse the keys of the normal, visual and operator modes.
+
+    The keys are parsed incrementally as `[count] [operator [count]] command`:
+    a key that does not extend an operator (e.g. the `w` of `d3w`) switches to
+    the mode of the operator and is matched again as a motion or a text object
+    of that mode, which then applies the operator to the range it selected. The
+    counts are multiplied, so `2d3w` deletes six words.
+    """
 
     def __init__(
-        self, editor: QPlainTextEdit,
+        self, editor: TextEditor,
         handlers: Optional[List[HandlerType]] = None,
         parent=None
     ):
@@ -110,35 +151,83 @@ def __init__(
         self._handlers = [handler(self.editor) for handler in handlers]
         LOGGER.debug(f"handlers: {self._handlers}")
 
-    def _set_edit_mode(self,):
-        """Check if the key sequence is a edit mode.
+        self._keymap = Keymap.from_handlers(
+            self.allowed_modes, self._handlers, load_user_keymap()
+        )
+
+        # the keymap node of the current key sequence and the sequence and mode
+        # it was reached with, so the next key press only needs one trie step.
+        self._node: Optional[KeymapNode] = None
+        self._node_keys = ''
+        self._node_mode: Optional[Modes] = None
+
+        # when the sequence is complete but also the prefix of a longer one
+        # (e.g. `g` and `gg`), wait `timeoutlen` ms for the next key before
+        # running the shorter one, like Vim does.
+        self._timeout = QTimer(self)
+        self._timeout.setSingleShot(True)
+        self._timeout.timeout.connect(self._on_timeout)
+        self._pending_event: Optional[QKeyEvent] = None
+        self._pending_node: Optional[KeymapNode] = None
+        self._pending_keys = ''
+        self._pending_mode = Modes.NORMAL
+
+        # the count typed after an operator (e.g. the `3` in `d3w`)
+        self._operator_count: Optional[int] = None
+
+    def change_mode(self, mode: Modes, cursor_width: int, keys: str = ''):
+        self._timeout.stop()
+        self._operator_count = None
+        return super().change_mode(mode, cursor_width, keys)
 
-        This is an ugly hack to check if the key sequence is a edit mode. If a
-        double key is pressed, like 'd' and 'w', the first key is the edit mode
-        while the second is the command. It then sets the edit mode and removes
-        the first key from the sequence and passes the second key to the handlers
-        to be executed.
+    def _clear_sequence(self):
+        """Discard a key sequence that cannot become a command."""
+        self._timeout.stop()
+
+        if EditorMode.mode in [Modes.DELETE, Modes.YANK, Modes.CHANGE]:
+            super().to_normal()
+            return
 
+        self.key_sequence = ''
+        self.count = None
+        self._operator_count = None
+        status_bar.write(EditorMode.mode.value, '')
+
+    def _run_pending(self, cursor: TextCursor):
+        """Run the complete sequence that was waiting for a longer one."""
+        if self._pending_node is None or self._pending_event is None:
+            return
+
+        EditorMode.mode = self._node_mode = self._pending_mode
+        self.key_sequence = self._node_keys = self._pending_keys
+        self._node = self._pending_node
+        self._pending_node = None
+
+        self._execute(cursor, self._pending_event)
+
+    def _on_timeout(self):
+        self._run_pending(self.editor.textCursor())
+
+    def _start_operator(self, key_text: str) -> bool:
+        """Switch to the mode of the operator typed before the key.
+
+        The sequence becomes the key alone, to be matched in the operator mode
+        (e.g. `dw` is `w` in DELETE mode). A doubled operator (e.g. `dd`) is a
+        command of its own and is not an operator.
         """
-        operator = self.key_sequence[0]
+        operator = self.key_sequence[:-len(key_text)]
         if (
-            len(self.key_sequence) != 2 or
-            operator not in self.operators or
-            self.key_sequence[1] in [*self.text_objects, operator]
+            EditorMode.mode != Modes.NORMAL or
+            operator not in OPERATOR_MODES or
+            key_text in ('', operator)
         ):
-            return
-
-        operator_modes = {
-            'v': Modes.VISUAL,
-            'y': Modes.YANK,
-            'd': Modes.DELETE,
-            'c': Modes.CHANGE,
-        }
+            return False
 
-        EditorMode.mode = operator_modes[operator]
-        self.key_sequence = self.key_sequence[1:]
+        EditorMode.mode = OPERATOR_MODES[operator]
+        self.key_sequence = key_text
+        return True
 
-    def arrow_keys(self, cursor: QTextCursor, key_event: QKeyEvent):
+    def arrow_keys(self, cursor: TextCursor, key_event: QKeyEvent):
         key = key_event.key()
 
         arrows = {
@@ -153,31 +242,132 @@ def arrow_keys(self, cursor: QTextCursor, key_event: QKeyEvent):
 
         return False
 
-    def parse_keys(self, editor: QPlainTextEdit, event: QEvent):
-        cursor = editor.textCursor()
-        key_event = cast(QKeyEvent, event)
-        modifiers = extract_modifiers(key_event.modifiers())
+    def _parse_count(self, key_text: str) -> bool:
+        """Accumulate the count typed before a command (e.g. the `3` in `3}`).
+
+        A count can only be typed at the beginning of a key sequence or after
+        an operator (e.g. the `3` in `d3w`), and `0` is a count only when it
+        follows another digit, otherwise it is a motion.
+        """
+        if len(key_text) != 1 or key_text not in '0123456789':
+            return False
+
+        if not self.key_sequence:
+            if key_text == '0' and not self.count:
+                return False
+            self.count = (self.count or 0) * 10 + int(key_text)
+            return True
 
-        self.key_sequence += key_event.text().strip()
-        status_bar.write('NORMAL', self.key_sequence)
+        if EditorMode.mode != Modes.NORMAL or self.key_sequence not in OPERATOR_MODES:
+            return False
+
+        if key_text == '0' and not self._operator_count:
+            return False
 
-        if self.key_sequence:
-            self._set_edit_mode()
+        self._operator_count = (self._operator_count or 0) * 10 + int(key_text)
+        return True
 
-        if key_event.key() == Qt.Key_R and key_event.modifiers() == Qt.ControlModifier:
+    def _typed_keys(self) -> str:
+        """Return the keys of the sequence for the status bar."""
+        return f'{self.count or ""}{self.key_sequence}{self._operator_count or ""}'
+
+    def _match(self, key_text: str, submit: bool) -> Match:
+        """Move the keymap to the current key sequence and return the match.
+
+        When the sequence only grew by the key just typed this is a single trie
+        step, otherwise (e.g. an operator changed the mode or a key was erased)
+        the sequence is looked up again from the root of the mode. Remapped keys
+        are replaced in the sequence by the keys they map to.
+        """
+        mode = EditorMode.mode
+        node = self._node
+
+        if (
+            node is not None and
+            mode == self._node_mode and
+            self.key_sequence == self._node_keys + key_text
+        ):
+            if key_text:
+                node, self.key_sequence = node.follow(key_text, self._node_keys)
+        else:
+            node, self.key_sequence = self._keymap.lookup(mode, self.key_sequence)
+
+        self._node = node
+        self._node_keys = self.key_sequence
+        self._node_mode = mode
+
+        return node.match(submit) if node else Match.INVALID
+
+    def _run(self, handler: BaseHandler, params: HandlerParams) -> bool:
+        """Run the command of the handler in a single edit block.
+
+        The command is then one undo step and the document is laid out once.
+        """
+        if not handler.edit_block:
+            return handler.handle(params)
+
+        cursor = params.cursor
+        cursor.beginEditBlock()
+        try:
+            return handler.handle(params)
+        finally:
+            cursor.endEditBlock()
+
+    def _handle(self, handler: BaseHandler, params: HandlerParams) -> bool:
+        if not Latency.enabled:
+            return self._run(handler, params)
+
+        start = perf_counter_ns()
+        handled = self._run(handler, params)
+        Latency.record(
+            f'{type(handler).__name__} {params.mode.value} {self._node.name}',
+            perf_counter_ns() - start
+        )
+        return handled
+
+    def parse_keys(self, editor: TextEditor, event: QEvent):
+        cursor = editor.textCursor()
+        key_event = cast(QKeyEvent, event)
+        key = key_event.key()
+
+        if key == Qt.Key_R and key_event.modifiers() == Qt.ControlModifier:
             EventManager.emit('execute_code')
+            self._timeout.stop()
+            self.key_sequence = ''
             return True
 
-        if key_event.key() == Qt.Key_Escape:
+        if key == Qt.Key_Escape:
             super().to_normal()
             cursor.clearSelection()
             self.editor.setTextCursor(cursor)
             return True
 
-        if key_event.key() == Qt.Key_Backspace:
-            self.key_sequence = self.key_sequence[:-1]
+        if key == Qt.Key_Backspace:
+            self._timeout.stop()
+            if self._operator_count:
+                self._operator_count = self._operator_count // 10 or None
+            else:
+                self.key_sequence = self.key_sequence[:-1]
+            status_bar.write('NORMAL', self._typed_keys())
+            return True
+
+        key_text = extract_key_text(key_event)
+        if self._parse_count(key_text):
+            status_bar.write('NORMAL', self._typed_keys())
             return True
 
+        if not self.key_sequence and EditorMode.mode == Modes.NORMAL:
+            if key_text == '.':
+                return self._repeat(cursor)
+
+            if key_text == 'q' and Macros.recording:
+                Macros.stop()
+                status_bar.write('NORMAL', '')
+                return True
+
+        self.key_sequence += key_text
+        status_bar.write('NORMAL', self._typed_keys())
+
         if self.key_sequence == 'V':
             cursor.movePosition(QTextCursor.StartOfLine, QTextCursor.MoveAnchor)
             cursor.movePosition(QTextCursor.EndOfLine, QTextCursor.KeepAnchor)
@@ -188,38 +378,195 @@ def parse_keys(self, editor: QPlainTextEdit, event: QEvent):
             self.editor.setTextCursor(cursor)
             return True
 
-        execute = False
-        for handler in self._handlers:
-            params = HandlerParams(
-                cursor=cursor,
-                keys=self.key_sequence,
-                modifiers=modifiers,
-                event=key_event,
-                mode=EditorMode.mode,
+        submit = key in [Qt.Key_Return, Qt.Key_Enter]
+        if not key_text and not submit:
+            return True
+
+        # the sequence before this key, run it if the key does not extend it
+        ambiguous = self._timeout.isActive()
+        self._timeout.stop()
+
+        match = self._match(key_text, submit)
+
+        if match == Match.INVALID and not ambiguous and self._start_operator(key_text):
+            match = self._match(key_text, submit)
+
+        if match == Match.PENDING:
+            return True
+
+        if match == Match.AMBIGUOUS:
+            # Qt deletes the event after the delivery, so keep a copy
+            self._pending_event = QKeyEvent(
+                key_event.type(), key, key_event.modifiers(), key_event.text()
             )
+            self._pending_node = self._node
+            self._pending_keys = self.key_sequence
+            self._pending_mode = EditorMode.mode
+            self._timeout.start(Settings.timeoutlen)
+            return True
+
+        if match == Match.INVALID:
+            if not ambiguous:
+                self._clear_sequence()
+                return True
+
+            # the key does not extend the previous sequence: run the shorter
+            # command and then parse the key on its own
+            self._run_pending(cursor)
+            if EditorMode.mode not in self.allowed_modes:
+                return False
+            return self.parse_keys(editor, event)
 
+        self._execute(cursor, key_event)
+        return True
+
+    def _execute(self, cursor: TextCursor, key_event: QKeyEvent):
+        """Run the handlers of the current keymap node."""
+        count = self.count
+        if self._operator_count:
+            count = (count or 1) * self._operator_count
+        self._operator_count = None
+
+        params = HandlerParams(
+            cursor=cursor,
+            keys=self.key_sequence,
+            modifiers=extract_modifiers(key_event.modifiers()),
+            event=key_event,
+            mode=EditorMode.mode,
+            count=count,
+        )
+
+        executed: Optional[BaseHandler] = None
+        for handler in self._node.handlers:
             if not handler.should_handle(params):
                 continue
 
-            if handler.handle(params):
-                editor.setTextCursor(cursor)
+            if self._handle(handler, params):
+                self.editor.setTextCursor(cursor)
                 self.key_sequence = ''
-                execute = True
+                self.count = None
+                executed = handler
                 break
 
+        if executed is None:
+            self._clear_sequence()
+            return
+
         # If the command was executed, change the mode
-        if execute:
+        if EditorMode.mode in [Modes.DELETE, Modes.YANK]:
+            super().to_normal()
 
-            if EditorMode.mode in [Modes.DELETE, Modes.YANK]:
-                super().to_normal()
+        elif EditorMode.mode == Modes.CHANGE:
+            super().to_insert()
 
-            elif EditorMode.mode == Modes.CHANGE:
-                super().to_insert()
+        if executed.repeatable(params):
+            LastChange.record(executed, params, EditorMode.mode == Modes.INSERT)
 
-        return True
+    def _repeat(self, cursor: TextCursor) -> bool:
+        """Repeat the last change (`.`) in a single edit block.
+
+        A count replaces the count of the change (e.g. `3.` after `dw`).
+        """
+        change = LastChange.change
+        if change is None:
+            self._clear_sequence()
+            return True
+
+        params = change.params.replace(cursor=cursor, count=self.count or change.params.count)
+        EditorMode.mode = params.mode
+
+        cursor.beginEditBlock()
+        try:
+            handled = change.handler.handle(params)
+            if handled and (params.mode == Modes.CHANGE or EditorMode.mode == Modes.INSERT):
+                cursor.insertText(change.text)
+        finally:
+            cursor.endEditBlock()
+
+        self.editor.setTextCursor(cursor)
+        return super().to_normal()
+
+
+class EditorEventFilter(QObject):
+    """The event filter installed on the editor.
+
+    The editor receives many events that are not key presses (paint, mouse,
+    resize, etc.), so they are discarded first and the key presses are passed
+    to the filter of the current mode with a single lookup.
+
+    The key presses are also recorded in the macro being recorded, and the
+    macros are replayed from here since the keys can switch mode.
+    """
+
+    def __init__(
+        self,
+        editor: TextEditor,
+        handlers: Optional[List[HandlerType]] = None,
+        parent=None
+    ):
+        super().__init__(parent)
+        self.editor = editor
+        self.normal_filter = NormalEventFilter(editor, handlers, self)
+        self.insert_filter = InsertEventFilter(editor, self)
+
+        self._mode_filters: Dict[Modes, BaseFilter] = {
+            mode: mode_filter
+            for mode_filter in (self.normal_filter, self.insert_filter)
+            for mode in mode_filter.allowed_modes
+        }
+
+    def eventFilter(self, watched: QObject, event: QEvent):
+        event_type = event.type()
+
+        if event_type == QEvent.KeyPress:
+            if Macros.recording:
+                Macros.record(cast(QKeyEvent, event))
+
+            handled = self._key_press(event)
+            if Macros.queued:
+                self._play_macro()
+            return handled
+
+        if event_type == QEvent.FocusOut:
+            get_live_marks(self.editor.document()).save()
+            Registers.flush()
+
+        return False
+
+    def _key_press(self, event: QEvent) -> bool:
+        mode_filter = self._mode_filters.get(EditorMode.mode)
+        if mode_filter is None:
+            return False
+        return mode_filter.key_press(self.editor, event)
+
+    def _play_macro(self):
+        """Replay the queued macro as a single undo step.
+
+        The editor is not repainted until the replay is done and the keys that
+        are not handled by the filters (e.g. the text typed in insert mode) are
+        sent to the editor directly, skipping the event filters.
+        """
+        keys, count = Macros.queued
+        Macros.queued = None
+        events = parse_notation(keys)
+
+        editor = self.editor
+        cursor = editor.textCursor()
+
+        Macros.playing = True
+        editor.setUpdatesEnabled(False)
+        cursor.beginEditBlock()
+        try:
+            for _ in range(count):
+                for event in events:
+                    if not self._key_press(event):
+                        editor.event(event)
+        finally:
+            cursor.endEditBlock()
+            editor.setUpdatesEnabled(True)
+            Macros.playing = False
 
 
 EDITOR_FILTERS = [
-    NormalEventFilter,
-    InsertEventFilter,
+    EditorEventFilter,
 ]
@@ -0,0 +1,49 @@
+"""Per editor state of the normal mode that outlives a single key press."""
+import sys
+import weakref
+from dataclasses import dataclass
+
+from .editor_adapter import TextEditor
+
+# Desired column that keeps the cursor at the end of the lines (`$`).
+END_OF_LINE = sys.maxsize
+
+_EDITOR_STATES: 'weakref.WeakKeyDictionary[TextEditor, EditorState]' = (
+    weakref.WeakKeyDictionary()
+)
+
+
+@dataclass
+class EditorState:
+    """Normal mode state of an editor.
+
+    Attributes:
+        desired_column: The column the vertical motions try to keep when they
+            cross shorter lines ("curswant" in Vim).
+        desired_column_position: The cursor position after the last vertical
+            motion. When the cursor is found somewhere else, it was moved by a
+            horizontal motion, an edit or the mouse, and the desired column is
+            reset to the current column.
+    """
+    desired_column: int = 0
+    desired_column_position: int = -1
+
+    def get_desired_column(self, position: int, column: int) -> int:
+        if position != self.desired_column_position:
+            self.desired_column = column
+        return self.desired_column
+
+    def reset_desired_column(self) -> None:
+        """Take the current column as desired column at the next vertical motion."""
+        self.desired_column_position = -1
+
+    def set_desired_column(self, position: int, column: int) -> None:
+        self.desired_column = column
+        self.desired_column_position = position
+
+
+def get_editor_state(editor: TextEditor) -> EditorState:
+    state = _EDITOR_STATES.get(editor)
+    if state is None:
+        state = _EDITOR_STATES[editor] = EditorState()
+    return state
@@ -1,21 +1,27 @@
 from abc import ABC, abstractmethod
-from typing import Any, List, Type, TypeVar, Callable
-
-from PySide2.QtWidgets import QPlainTextEdit
+from typing import Any, List, Type, TypeVar, Callable, Optional, FrozenSet
 
+from .keymap import KeyBinding
 from .logger import LOGGER
 from .registers import Registers
 from .status_bar import status_bar
 from .editor_mode import Modes, EditorMode
+from .editor_adapter import TextEditor
 from .handler_parameters import HandlerParams
 
-HandlerType = Callable[[QPlainTextEdit], Any]
+HandlerType = Callable[[TextEditor], Any]
 
 _NORMAL_HANDLERS: List[HandlerType] = []
 
 
 class BaseHandler(ABC):
-    def __init__(self, editor: QPlainTextEdit):
+    # the modes in which the handler key bindings are active, None means every mode
+    modes: Optional[FrozenSet[Modes]] = None
+
+    # run the commands in an edit block, so each command is a single undo step
+    edit_block = True
+
+    def __init__(self, editor: TextEditor):
         self.editor = editor
         self.registers = Registers
 
@@ -45,10 +51,27 @@ def to_insert_mode(self):
     def to_visual_mode(self):
         EditorMode.mode = Modes.VISUAL
 
+    def key_bindings(self) -> List[KeyBinding]:
+        """Return the key sequences that the handler can execute.
+
+        The bindings are compiled into the keymap of the normal mode so the
+        handler is only called when one of its sequences is typed. By default
+        they are the keys of the `commands` table.
+        """
+        commands = getattr(self, 'commands', {})
+        return [KeyBinding(keys, modes=self.modes) for keys in commands]
+
     def should_handle(self, params: HandlerParams) -> bool:
         """Indicate whether the key sequence should be handled."""
         return True
 
+    def repeatable(self, params: HandlerParams) -> bool:
+        """Indicate whether the command changed the text and `.` can repeat it.
+
+        By default only the motions of the delete and change operators do.
+        """
+        return params.mode == Modes.DELETE or params.mode == Modes.CHANGE
+
     @abstractmethod
     def handle(self, params: HandlerParams) -> bool:
         """Handle the key sequence and return True if the key sequence was handled.
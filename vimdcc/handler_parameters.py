@@ -1,28 +1,78 @@
-from typing import List
-from dataclasses import field, dataclass
+from typing import Any, List, Optional
 
 from PySide2.QtGui import QKeyEvent, QTextCursor
 
 from .status_bar import StatusBar, status_bar
 from .editor_mode import Modes
+from .editor_adapter import TextCursor
+
+OPERATOR_PENDING_MODES = frozenset({Modes.YANK, Modes.DELETE, Modes.CHANGE})
+
+VISUAL_MODES = frozenset({Modes.VISUAL, Modes.VISUAL_LINE, *OPERATOR_PENDING_MODES})
 
 
-@dataclass
 class HandlerParams:
-    cursor: QTextCursor
-    event: QKeyEvent
+    """The key press passed to the handlers.
+
+    A single instance is created for each key press and shared by every
+    handler, so the attributes are read only. Use `replace` to get a copy with
+    different values (e.g. `params.replace(keys='w')`).
+
+    `visual` is True when the motions select text (visual and operator modes)
+    and `operator_pending` when the selection is then deleted, changed or
+    yanked, so the commands do not need to compare the mode strings.
+
+    """
+    __slots__ = (
+        'cursor', 'event', 'keys', 'modifiers', 'mode', 'count',
+        'visual', 'operator_pending', 'anchor'
+    )
+
+    _fields = ('cursor', 'event', 'keys', 'modifiers', 'mode', 'count')
 
+    status_bar: StatusBar = status_bar
+
+    cursor: TextCursor
+    event: QKeyEvent
     keys: str
     modifiers: List[str]
-
     mode: Modes
+    count: Optional[int]
+    visual: bool
+    operator_pending: bool
+    anchor: QTextCursor.MoveMode
+
+    def __init__(
+        self,
+        cursor: TextCursor,
+        event: QKeyEvent,
+        keys: str,
+        modifiers: List[str],
+        mode: Modes,
+        count: Optional[int] = None,
+    ):
+        visual = mode in VISUAL_MODES
+
+        setattr_ = object.__setattr__
+        setattr_(self, 'cursor', cursor)
+        setattr_(self, 'event', event)
+        setattr_(self, 'keys', keys)
+        setattr_(self, 'modifiers', modifiers)
+        setattr_(self, 'mode', mode)
+        setattr_(self, 'count', count)
+        setattr_(self, 'visual', visual)
+        setattr_(self, 'operator_pending', mode in OPERATOR_PENDING_MODES)
+        setattr_(self, 'anchor', QTextCursor.KeepAnchor if visual else QTextCursor.MoveAnchor)
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f'{type(self).__name__} is read only, use replace() instead')
 
-    visual: bool = field(init=False)
-    anchor: QTextCursor.MoveMode = field(init=False)
-    status_bar: StatusBar = field(init=False)
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self._fields)
+        return f'{type(self).__name__}({fields})'
 
-    def __post_init__(self):
-        self.visual = self.mode in [Modes.VISUAL, Modes.VISUAL_LINE, Modes.YANK,
-                                    Modes.DELETE, Modes.CHANGE]
-        self.anchor = QTextCursor.KeepAnchor if self.visual else QTextCursor.MoveAnchor
-        self.status_bar = status_bar
+    def replace(self, **changes: Any) -> 'HandlerParams':
+        """Return a copy of the parameters with the given fields changed."""
+        values = {name: getattr(self, name) for name in self._fields}
+        values.update(changes)
+        return HandlerParams(**values)
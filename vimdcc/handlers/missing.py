@@ -1,22 +1,27 @@
 """Keeping track of missing Vim commands that I would like to implement."""
-from PySide2.QtWidgets import QPlainTextEdit
+from typing import List
 
+from ..keymap import KeyBinding
 from ..handler_base import BaseHandler, register_normal_handler
+from ..editor_adapter import TextEditor
 from ..handler_parameters import HandlerParams
 
 
 @register_normal_handler
 class MissingHandler(BaseHandler):
-    def __init__(self, editor: QPlainTextEdit):
+    missing = [
+        'W', 'E', 'B', 'zz', 'J', '%', 'U', 'R', '<<', '>>',
+    ]
+
+    def __init__(self, editor: TextEditor):
         super().__init__(editor)
 
-    def handle(self, params: HandlerParams):
-        missing = [
-            'W', 'E', 'B', '.', 'zz', 'J', '%', 'U', 'R', '<<', '>>',
-        ]
+    def key_bindings(self) -> List[KeyBinding]:
+        return [KeyBinding(keys) for keys in self.missing]
 
+    def handle(self, params: HandlerParams):
         key_sequence = params.keys
-        if key_sequence in missing:
+        if key_sequence in self.missing:
             print(f'Not implemented yet: {key_sequence}')
             params.status_bar.write('NORMAL', f'Not implemented yet: {key_sequence}')
             return True
@@ -1,32 +1,57 @@
 from __future__ import annotations
 
-from typing import Dict, Callable, Optional
+from typing import Dict, List, Callable, Optional
 
 from PySide2.QtGui import QTextCursor
-from PySide2.QtWidgets import QPlainTextEdit
-
-from ..editor_mode import Modes, EditorMode
+from PySide2.QtCore import Qt, QCoreApplication
+from PySide2.QtWidgets import QApplication
+
+from ..marks import get_live_marks
+from ..events import EventManager
+from ..keymap import KeyBinding, KeyArgument
+from ..logger import LOGGER
+from ..macros import Macros
+from ..latency import Latency
+from ..jumplist import get_jumplist
+from ..settings import Settings
+from ..operators import OPERATOR_MODES, apply_operator
+from ..editor_mode import Modes
 from ..command_base import BaseCommand, MoveCommand
 from ..handler_base import BaseHandler, register_normal_handler
 from ..text_objects import MatchingCharacter, find_matching
+from ..editor_adapter import TextCursor, TextEditor
 from ..commands.insert import (Inserta, InsertA, Inserti, InsertI, InsertO,
                                Inserto)
 from ..commands.search import SearchCommand
+from ..utils.profiling import Profiler
 from ..commands.motions import (MoveLineUp, MoveLineEnd, MoveLineDown,
                                 MoveWordLeft, MoveLineStart, MoveWordRight,
                                 MoveWordForward, MoveWordBackward,
                                 MoveToStartOfBlock, MoveWordForwardEnd)
-from ..commands.document import (MoveDocumentUp, MoveParagraphUp,
-                                 MoveDocumentDown, MoveParagraphDown)
+from ..commands.document import (MoveToLine, ScrollPageUp, MoveDocumentUp,
+                                 ScrollPageDown, MoveParagraphUp,
+                                 MoveDocumentDown, ScrollHalfPageUp,
+                                 MoveParagraphDown, ScrollHalfPageDown)
 from ..registers_preview import (PreviewMarkRegister, PreviewNamedRegister,
                                  PreviewNumberedRegister)
 from ..commands.swap_case import SwapCase, SwapLower, SwapUpper
 from ..handler_parameters import HandlerParams
 
+NORMAL_ONLY = frozenset({Modes.NORMAL})
+
+
+def can_preview(keys: str) -> bool:
+    """Return True if the previewer dialogs can be shown (e.g. not headless)."""
+    if isinstance(QCoreApplication.instance(), QApplication):
+        return True
+
+    LOGGER.warning(f'{keys!r} needs a QApplication to show the previewer, ignored')
+    return False
+
 
 @register_normal_handler
 class MotionHandler(BaseHandler):
-    def __init__(self, editor: QPlainTextEdit):
+    def __init__(self, editor: TextEditor):
         super().__init__(editor)
         self.commands: Dict[str, MoveCommand] = {
             'w': MoveWordForward(editor),
@@ -48,13 +73,17 @@ def handle(self, params: HandlerParams):
 
 @register_normal_handler
 class DocumentHandler(BaseHandler):
-    def __init__(self, editor: QPlainTextEdit):
+    def __init__(self, editor: TextEditor):
         super().__init__(editor)
         self.commands: Dict[str, MoveCommand] = {
             'G': MoveDocumentDown(editor),
             'gg': MoveDocumentUp(editor),
             '{': MoveParagraphUp(editor),
             '}': MoveParagraphDown(editor),
+            '<C-d>': ScrollHalfPageDown(editor),
+            '<C-u>': ScrollHalfPageUp(editor),
+            '<C-f>': ScrollPageDown(editor),
+            '<C-b>': ScrollPageUp(editor),
         }
 
     def handle(self, params: HandlerParams):
@@ -62,9 +91,62 @@ def handle(self, params: HandlerParams):
         return command.execute(params) if command else False
 
 
+@register_normal_handler
+class CommandLineHandler(BaseHandler):
+    """Handle the commands typed after `:` and confirmed with Enter."""
+
+    def __init__(self, editor: TextEditor):
+        super().__init__(editor)
+        self.go_to_line = MoveToLine(editor)
+        self.commands = {
+            'latency': self.latency_report,
+            'profile': self.toggle_profiler,
+        }
+
+    def key_bindings(self) -> List[KeyBinding]:
+        return [KeyBinding(':', KeyArgument.LINE)]
+
+    def handle(self, params: HandlerParams):
+        keys = params.keys
+        if not keys.startswith(':') or params.event.key() not in [Qt.Key_Return, Qt.Key_Enter]:
+            return False
+
+        command = keys[1:]
+        if command.isdigit():
+            return self.go_to_line.execute(params)
+
+        if command in self.commands:
+            return self.commands[command](params)
+
+        params.status_bar.write('NORMAL', f'Not an editor command: {command}')
+        return True
+
+    def toggle_profiler(self, params: HandlerParams):
+        path = Profiler.toggle(Settings.profiler_collapsed_stacks)
+        EventManager.emit('profiler_toggled', Profiler.running)
+
+        if Profiler.running:
+            params.status_bar.write('NORMAL', 'Profiler started')
+        elif path:
+            params.status_bar.write('NORMAL', f'Profile written to {path}')
+        else:
+            params.status_bar.write('NORMAL', 'Profiler stopped: nothing was recorded')
+        return True
+
+    def latency_report(self, params: HandlerParams):
+        LOGGER.info(f'Key latency:\n{Latency.format_report()}')
+        if Latency.enabled:
+            params.status_bar.write('NORMAL', 'Latency report written to the log')
+        else:
+            params.status_bar.write('NORMAL', 'Latency recording is disabled in the preferences')
+        return True
+
+
 @register_normal_handler
 class InsertHandler(BaseHandler):
-    def __init__(self, editor: QPlainTextEdit):
+    modes = frozenset({Modes.NORMAL})
+
+    def __init__(self, editor: TextEditor):
         super().__init__(editor)
         self.commands: Dict[str, BaseCommand] = {
             'i': Inserti(editor),
@@ -75,8 +157,11 @@ def __init__(self, editor: QPlainTextEdit):
             'O': InsertO(editor),
         }
 
+    def repeatable(self, params: HandlerParams) -> bool:
+        return True
+
     def handle(self, params: HandlerParams):
-        if params.mode != 'NORMAL':
+        if params.mode != Modes.NORMAL:
             return False
 
         command = self.commands.get(params.keys)
@@ -88,7 +173,7 @@ def handle(self, params: HandlerParams):
 
 @register_normal_handler
 class SwapCaseHandler(BaseHandler):
-    def __init__(self, editor: QPlainTextEdit):
+    def __init__(self, editor: TextEditor):
         super().__init__(editor)
         self.commands: Dict[str, BaseCommand] = {
             '~': SwapCase(editor),
@@ -97,6 +182,9 @@ def __init__(self, editor: QPlainTextEdit):
             'gU': SwapUpper(editor),
         }
 
+    def repeatable(self, params: HandlerParams) -> bool:
+        return True
+
     def handle(self, params: HandlerParams):
         command = self.commands.get(params.keys)
         if command and command.execute(params):
@@ -105,22 +193,77 @@ def handle(self, params: HandlerParams):
         return False
 
 
+@register_normal_handler
+class MacroHandler(BaseHandler):
+    modes = frozenset({Modes.NORMAL})
+
+    def __init__(self, editor: TextEditor):
+        super().__init__(editor)
+
+    def key_bindings(self) -> List[KeyBinding]:
+        return [
+            KeyBinding('q', KeyArgument.CHAR, self.modes),
+            KeyBinding('@', KeyArgument.CHAR, self.modes),
+        ]
+
+    def record(self, params: HandlerParams, register: str):
+        # the `q` that stops the recording is handled by the event filter
+        if not register.isalnum():
+            return False
+
+        Macros.start(register)
+        params.status_bar.write('NORMAL', f'recording @{register}')
+        return True
+
+    def play(self, params: HandlerParams, register: str):
+        return Macros.play(register, params.count or 1)
+
+    def handle(self, params: HandlerParams):
+        keys = params.keys
+        if len(keys) != 2:
+            return False
+
+        if keys[0] == 'q':
+            return self.record(params, keys[1])
+
+        if keys[0] == '@':
+            return self.play(params, keys[1])
+
+        return False
+
+
 @register_normal_handler
 class MarksHandler(BaseHandler):
-    def __init__(self, editor: QPlainTextEdit):
+    def __init__(self, editor: TextEditor):
         super().__init__(editor)
-        self._preview_marks = PreviewMarkRegister()
+        # the dialog is created on the first use, so the handler needs no QApplication
+        self._preview_marks: Optional[PreviewMarkRegister] = None
+
+    def key_bindings(self) -> List[KeyBinding]:
+        return [KeyBinding('m', KeyArgument.CHAR), KeyBinding('`')]
 
     def set_mark(self, key: str, params: HandlerParams):
         current_line_text = params.cursor.block().text().strip()
-        self.registers.add_mark(key, current_line_text, params.cursor.position())
+        marks = get_live_marks(self.editor.document())
+        marks.set(key, params.cursor.position(), current_line_text)
         return True
 
     def go_to_mark(self, params: HandlerParams):
+        # the previewer reads the registers so update them with the live positions
+        get_live_marks(self.editor.document()).sync()
+
+        if not can_preview(params.keys):
+            return True
+
+        if self._preview_marks is None:
+            self._preview_marks = PreviewMarkRegister()
+
         previewer = self._preview_marks
         value = previewer.get_text_value()
         if value is not None:
-            params.cursor.setPosition(int(value))
+            get_jumplist(self.editor.document()).push(params.cursor.position())
+            last_position = self.editor.document().characterCount() - 1
+            params.cursor.setPosition(min(int(value), last_position))
         return True
 
     def handle(self, params: HandlerParams):
@@ -132,9 +275,36 @@ def handle(self, params: HandlerParams):
         return self.go_to_mark(params) if key_sequence == '`' else False
 
 
+@register_normal_handler
+class JumpListHandler(BaseHandler):
+    def __init__(self, editor: TextEditor):
+        super().__init__(editor)
+        self.commands = {
+            '<C-o>': self.jump_back,
+            '<C-i>': self.jump_forward,
+        }
+
+    def _jump(self, params: HandlerParams, position: Optional[int]):
+        if position is not None:
+            last_position = self.editor.document().characterCount() - 1
+            params.cursor.setPosition(min(position, last_position), params.anchor)
+        return True
+
+    def jump_back(self, params: HandlerParams):
+        jumplist = get_jumplist(self.editor.document())
+        return self._jump(params, jumplist.back(params.cursor.position()))
+
+    def jump_forward(self, params: HandlerParams):
+        return self._jump(params, get_jumplist(self.editor.document()).forward())
+
+    def handle(self, params: HandlerParams):
+        command = self.commands.get(params.keys)
+        return command(params) if command else False
+
+
 @register_normal_handler
 class SearchHandler(BaseHandler):
-    def __init__(self, editor: QPlainTextEdit):
+    def __init__(self, editor: TextEditor):
         super().__init__(editor)
         self.commands = {
             'n': self.go_down,
@@ -144,7 +314,14 @@ def __init__(self, editor: QPlainTextEdit):
         }
         self.search = SearchCommand(editor)
 
-    def _get_word_under_cursor(self, cursor: QTextCursor) -> str:
+    def key_bindings(self) -> List[KeyBinding]:
+        return [
+            *super().key_bindings(),
+            KeyBinding('/', KeyArgument.LINE),
+            KeyBinding('?', KeyArgument.LINE),
+        ]
+
+    def _get_word_under_cursor(self, cursor: TextCursor) -> str:
         initial_position = cursor.position()
         cursor.select(QTextCursor.WordUnderCursor)
         text = cursor.selectedText()
@@ -156,22 +333,9 @@ def _move_cursor(self, params: HandlerParams, move_func: Callable[[int], Optiona
         start = cursor.position()
         pos = move_func(cursor.position())
         if pos is not None:
-
-            # TODO: Refactor: Many similarity with the _set_cursor method from SearchLineHandler
-            select = QTextCursor.MoveAnchor
-            if EditorMode.mode in [Modes.CHANGE, Modes.DELETE, Modes.YANK, Modes.VISUAL]:
-                cursor.setPosition(start, QTextCursor.MoveAnchor)
-                select = QTextCursor.KeepAnchor
-
-            cursor.setPosition(pos, select)
-
-            if EditorMode.mode in [Modes.CHANGE, Modes.DELETE]:
-                cursor.removeSelectedText()
-
-            elif EditorMode.mode == Modes.YANK:
-                self.registers.add(cursor.selectedText())
-                cursor.clearSelection()
-                cursor.setPosition(start, QTextCursor.MoveAnchor)
+            get_jumplist(self.editor.document()).push(start)
+            cursor.setPosition(pos, params.anchor)
+            apply_operator(cursor, params.mode, start)
 
         return True
 
@@ -219,99 +383,62 @@ def handle(self, params: HandlerParams) -> bool:
 
 @register_normal_handler
 class SearchLineHandler(BaseHandler):
-    def __init__(self, editor: QPlainTextEdit):
+    def __init__(self, editor: TextEditor):
         super().__init__(editor)
         self.search = SearchCommand(editor)
         self.commands = {
             ';': self.search_forward_again,
             ',': self.search_backward_again,
         }
-        # TODO: This is a mess. Refactor this.
-        # TODO: Add tests for c, d, y, v
-
-    def _set_cursor(
-        self,
-        start: int,
-        cursor: QTextCursor,
-        pos: Optional[int],
-        move_char: QTextCursor.MoveOperation = QTextCursor.NoMove
-    ):
-        if pos is None:
-            return False
-
-        # anchor the cursor if we are in any of the modes
-        select = QTextCursor.MoveAnchor
-        if EditorMode.mode in [Modes.CHANGE, Modes.DELETE, Modes.YANK, Modes.VISUAL]:
-            cursor.setPosition(start, QTextCursor.MoveAnchor)
-            select = QTextCursor.KeepAnchor
 
-        # set the cursor to destination
-        cursor.setPosition(pos, select)
+    def key_bindings(self) -> List[KeyBinding]:
+        return [
+            *super().key_bindings(),
+            *[KeyBinding(key, KeyArgument.CHAR) for key in 'fFtT'],
+        ]
 
-        if EditorMode.mode in [Modes.CHANGE, Modes.DELETE]:
-            cursor.movePosition(move_char, QTextCursor.KeepAnchor)
-            cursor.removeSelectedText()
-
-        elif EditorMode.mode == Modes.YANK:
-            cursor.movePosition(move_char, QTextCursor.KeepAnchor)
-            self.registers.add(cursor.selectedText())
-            cursor.clearSelection()
-            cursor.setPosition(start, QTextCursor.MoveAnchor)
-
-        elif EditorMode.mode == Modes.VISUAL:
-            cursor.movePosition(move_char, QTextCursor.KeepAnchor)
+    def _set_cursor(self, params: HandlerParams, pos: Optional[int], offset: int = 0):
+        """Move the cursor to `pos + offset` and apply the operator of the mode."""
+        if pos is None:
+            return False
 
+        cursor = params.cursor
+        start = cursor.position()
+        cursor.setPosition(pos + offset, params.anchor)
+        apply_operator(cursor, params.mode, start)
         return True
 
-    def search_forward(
-        self,
-        params: HandlerParams,
-        key: str,
-        move_char: QTextCursor.MoveOperation = QTextCursor.NextCharacter
-    ):
+    def search_forward(self, params: HandlerParams, key: str):
         """f + key."""
         self.search.find(key)
-        cursor = params.cursor
-        start = cursor.position()
-        pos = self.search.find_next_down(start)
-        return self._set_cursor(start, cursor, pos, move_char)
-
-    def search_backward(
-        self,
-        params: HandlerParams,
-        key: str,
-        move_char: QTextCursor.MoveOperation = QTextCursor.NoMove
-    ):
+        pos = self.search.find_next_down(params.cursor.position())
+
+        # the character is part of the selected range
+        return self._set_cursor(params, pos, 1 if params.visual else 0)
+
+    def search_backward(self, params: HandlerParams, key: str):
         """F + key."""
         self.search.find(key)
-        cursor = params.cursor
-        start = cursor.position()
-        pos = self.search.find_next_up(cursor.position())
-        return self._set_cursor(start, cursor, pos, move_char)
+        pos = self.search.find_next_up(params.cursor.position())
+        return self._set_cursor(params, pos)
 
     def search_forward_before(self, params: HandlerParams, key: str):
         """t + key."""
-        if not self.search_forward(params, key, QTextCursor.NextCharacter):
-            return False
-        params.cursor.movePosition(QTextCursor.PreviousCharacter, QTextCursor.KeepAnchor)
-        return True
+        self.search.find(key)
+        pos = self.search.find_next_down(params.cursor.position())
+        return self._set_cursor(params, pos, 0 if params.visual else -1)
 
     def search_backward_before(self, params: HandlerParams, key: str):
         """T + key."""
-        if not self.search_backward(params, key, QTextCursor.NextCharacter):
-            return False
-        params.cursor.movePosition(QTextCursor.NextCharacter)
-        return True
+        self.search.find(key)
+        pos = self.search.find_next_up(params.cursor.position())
+        return self._set_cursor(params, pos, 1)
 
     def search_forward_again(self, params: HandlerParams):
-        start = params.cursor.position()
-        pos = self.search.find_next_down(start)
-        return self._set_cursor(start, params.cursor, pos)
+        return self._set_cursor(params, self.search.find_next_down(params.cursor.position()))
 
     def search_backward_again(self, params: HandlerParams):
-        start = params.cursor.position()
-        pos = self.search.find_next_up(start)
-        return self._set_cursor(start, params.cursor, pos)
+        return self._set_cursor(params, self.search.find_next_up(params.cursor.position()))
 
     def handle(self, params: HandlerParams):
         keys = params.keys
@@ -341,7 +468,7 @@ class YankHandler(BaseHandler):
     # token to identify that the copied text contains a new line
     LINE_COPY = '<LINE_COPY>'
 
-    def __init__(self, editor: QPlainTextEdit):
+    def __init__(self, editor: TextEditor):
         super().__init__(editor)
         self.commands = {
             'yy': self.yank_line,
@@ -349,8 +476,19 @@ def __init__(self, editor: QPlainTextEdit):
             'p': self.paste,
             'P': self.paste_before,
         }
-        self._named_register = PreviewNamedRegister()
-        self._numbered_register = PreviewNumberedRegister()
+        # the dialogs are created on the first use, so the handler needs no QApplication
+        self._named_register: Optional[PreviewNamedRegister] = None
+        self._numbered_register: Optional[PreviewNumberedRegister] = None
+
+    def key_bindings(self) -> List[KeyBinding]:
+        # `yy` only in normal mode, so the `y` of the visual modes does not wait for it
+        return [
+            KeyBinding(keys, modes=NORMAL_ONLY if keys == 'yy' else self.modes)
+            for keys in self.commands
+        ] + [KeyBinding("'"), KeyBinding('\\')]
+
+    def repeatable(self, params: HandlerParams) -> bool:
+        return params.keys in ('p', 'P')
 
     def _paste(self, params: HandlerParams, text: Optional[str] = None):
         if not text:
@@ -381,6 +519,7 @@ def yank_line(self, params: HandlerParams):
         cursor = params.cursor
         pos = cursor.position()
         cursor.movePosition(QTextCursor.StartOfLine)
+        cursor.movePosition(QTextCursor.Down, QTextCursor.KeepAnchor, (params.count or 1) - 1)
         cursor.movePosition(QTextCursor.EndOfLine, QTextCursor.KeepAnchor)
         self.registers.add(self.LINE_COPY + cursor.selectedText() + '\n')
         cursor.clearSelection()
@@ -398,6 +537,12 @@ def handle(self, params: HandlerParams):
         return commands(params) if commands else False
 
     def preview_clipboard(self, params: HandlerParams):
+        if not can_preview(params.keys):
+            return True
+
+        if self._numbered_register is None:
+            self._numbered_register = PreviewNumberedRegister()
+
         previewer = self._numbered_register
         value = previewer.get_text_value()
         if value:
@@ -405,6 +550,12 @@ def preview_clipboard(self, params: HandlerParams):
         return True
 
     def preview_register(self, params: HandlerParams):
+        if not can_preview(params.keys):
+            return True
+
+        if self._named_register is None:
+            self._named_register = PreviewNamedRegister()
+
         previewer = self._named_register
         value = previewer.get_text_value()
         if value:
@@ -419,8 +570,9 @@ class VisualEditHandler(BaseHandler):
     Although it's called visual edit handler, it handles the commands from the
     NORMAL mode. I dont have enough reasons to create a new mode for this.
     """
+    modes = frozenset({Modes.VISUAL, Modes.VISUAL_LINE})
 
-    def __init__(self, editor: QPlainTextEdit):
+    def __init__(self, editor: TextEditor):
         super().__init__(editor)
         self.command_map = {
             'c': self.cut_text,
@@ -428,35 +580,37 @@ def __init__(self, editor: QPlainTextEdit):
             'y': self.yank_text,
         }
 
+    def key_bindings(self) -> List[KeyBinding]:
+        return [KeyBinding(keys, modes=self.modes) for keys in self.command_map]
+
     def handle(self, params: HandlerParams):
-        if params.mode not in ['VISUAL', 'VISUAL_LINE']:
+        if params.mode not in self.modes:
             return False
 
         command = self.command_map.get(params.keys)
         return command(params) if command else False
 
     def yank_text(self, params: HandlerParams) -> bool:
-        super().add_to_clipboard(params.cursor.selectedText())
-        params.cursor.clearSelection()
+        apply_operator(params.cursor, Modes.YANK)
         super().to_normal_mode()
         return True
 
     def delete_text(self, params: HandlerParams) -> bool:
-        super().add_to_clipboard(params.cursor.selectedText())
-        params.cursor.removeSelectedText()
+        apply_operator(params.cursor, Modes.DELETE)
         super().to_normal_mode()
         return True
 
     def cut_text(self, params: HandlerParams) -> bool:
-        super().add_to_clipboard(params.cursor.selectedText())
-        params.cursor.removeSelectedText()
+        apply_operator(params.cursor, Modes.CHANGE)
         super().to_insert_mode()
         return True
 
 
 @register_normal_handler
 class TextObjectsHandler(BaseHandler):
-    def __init__(self, editor: QPlainTextEdit):
+    modes = frozenset({Modes.NORMAL, Modes.VISUAL, Modes.VISUAL_LINE})
+
+    def __init__(self, editor: TextEditor):
         super().__init__(editor)
         self.brackets = {
             '(': MatchingCharacter.PARENTHESIS,
@@ -478,9 +632,24 @@ def __init__(self, editor: QPlainTextEdit):
         }
 
         self.valid_operators = {'ci', 'ca', 'di', 'da', 'vi', 'va', 'yi', 'ya'}
-        self.text_obj_mode = ''
 
-    def _execute_text_object(self, cursor: QTextCursor, operator: str, start: int, end: int):
+    def key_bindings(self) -> List[KeyBinding]:
+        # in visual mode `c`, `d` and `y` act on the selection, only `v` can
+        # start a text object without waiting for the next key
+        visual_modes = frozenset({Modes.VISUAL, Modes.VISUAL_LINE})
+        return [
+            KeyBinding(
+                operator,
+                KeyArgument.CHAR,
+                self.modes if operator[0] == 'v' else self.modes - visual_modes
+            )
+            for operator in self.valid_operators
+        ]
+
+    def repeatable(self, params: HandlerParams) -> bool:
+        return params.keys[0] in ('c', 'd')
+
+    def _execute_text_object(self, cursor: TextCursor, operator: str, start: int, end: int):
 
         if operator[1] == 'i':
             start += 1
@@ -490,19 +659,7 @@ def _execute_text_object(self, cursor: QTextCursor, operator: str, start: int, e
         cursor.setPosition(start, QTextCursor.MoveAnchor)
         cursor.setPosition(end, QTextCursor.KeepAnchor)
 
-        # when in visual or yank mode, we dont need to delete the text
-        # so we stop before
-
-        if self.text_obj_mode == 'VISUAL':
-            return True
-
-        self.registers.add(cursor.selectedText())
-
-        if self.text_obj_mode == 'YANK':
-            cursor.clearSelection()
-            return True
-
-        cursor.removeSelectedText()
+        apply_operator(cursor, OPERATOR_MODES[operator[0]])
 
         if operator[0] == 'c':
             super().to_insert_mode()
@@ -510,7 +667,7 @@ def _execute_text_object(self, cursor: QTextCursor, operator: str, start: int, e
         return True
 
     def find_text_object_quote(
-        self, cursor: QTextCursor, quote_type: MatchingCharacter, operator: str
+        self, cursor: TextCursor, quote_type: MatchingCharacter, operator: str
     ):
 
         line_end_position = cursor.block().position() + cursor.block().length() - 1
@@ -521,14 +678,14 @@ def find_text_object_quote(
         return True
 
     def find_text_object_bracket(
-        self, cursor: QTextCursor, bracket_type: MatchingCharacter, operator: str
+        self, cursor: TextCursor, bracket_type: MatchingCharacter, operator: str
     ):
         find = find_matching(self.editor.toPlainText(), bracket_type, cursor.position())
         if find:
             self._execute_text_object(cursor, operator, find[0], find[1])
         return True
 
-    def delete_word(self, cursor: QTextCursor, operator: str):
+    def delete_word(self, cursor: TextCursor, operator: str):
         # TODO: i and a are the same: It does not handle the around spaces
         if operator[1] == 'a':
             operator = 'di'
@@ -543,9 +700,6 @@ def delete_word(self, cursor: QTextCursor, operator: str):
         return self._execute_text_object(cursor, operator, start_pos, end_pos)
 
     def handle(self, params: HandlerParams) -> bool:
-
-        self.text_obj_mode = ''
-
         keys = params.keys
         if not keys or len(keys) < 3:
             return False
@@ -557,11 +711,8 @@ def handle(self, params: HandlerParams) -> bool:
             return False
 
         if operator[0] == 'v':
-            self.text_obj_mode = 'VISUAL'
-            # HACK: change the mode to visual so that the VisualEditHandler can handle it
+            # the selection is then handled by the VisualEditHandler
             super().to_visual_mode()
-        elif operator[0] == 'y':
-            self.text_obj_mode = 'YANK'
 
         if character in self.brackets:
             bracket_type = self.brackets[character]
@@ -579,7 +730,7 @@ def handle(self, params: HandlerParams) -> bool:
 
 @register_normal_handler
 class TextSearchObjectsHandler(BaseHandler):
-    def __init__(self, editor: QPlainTextEdit):
+    def __init__(self, editor: TextEditor):
         super().__init__(editor)
 
     def handle(self, params: HandlerParams) -> bool:
@@ -589,62 +740,84 @@ def handle(self, params: HandlerParams) -> bool:
 
 @register_normal_handler
 class EditHandler(BaseHandler):
-    def __init__(self, editor: QPlainTextEdit):
+    def __init__(self, editor: TextEditor):
         super().__init__(editor)
         self.commands = {
             'x': self._delete_char,
             'X': self._delete_char_before,
             's': self._delete_char_insert,
-            'S': self._delete_line_insert,
-            'cc': self._delete_line_insert,
             'C': self._delete_from_cursor_insert,
             'D': self._delete_from_cursor,
+        }
+        # the commands that act on `count` lines (e.g. `3dd`)
+        self.line_commands = {
+            'S': self._delete_line_insert,
+            'cc': self._delete_line_insert,
             'dd': self._delete_line,
         }
 
-    def _delete_from_cursor(self, cursor: QTextCursor):
+    def key_bindings(self) -> List[KeyBinding]:
+        return [
+            *super().key_bindings(),
+            # only in normal mode, so the `c` and `d` of the visual modes do not wait for them
+            *[KeyBinding(keys, modes=NORMAL_ONLY) for keys in self.line_commands],
+            KeyBinding('r', KeyArgument.CHAR),
+        ]
+
+    def repeatable(self, params: HandlerParams) -> bool:
+        return True
+
+    def _delete_from_cursor(self, cursor: TextCursor, count: int = 1):
+        # like `d$`, a count deletes to the end of the `count - 1`th line below
+        cursor.movePosition(QTextCursor.Down, QTextCursor.KeepAnchor, count - 1)
         cursor.movePosition(QTextCursor.EndOfLine, QTextCursor.KeepAnchor)
         super().add_to_clipboard(cursor.selectedText())
         cursor.removeSelectedText()
         return True
 
-    def _delete_from_cursor_insert(self, cursor: QTextCursor):
+    def _delete_from_cursor_insert(self, cursor: TextCursor, count: int = 1):
         super().to_insert_mode()
-        self._delete_from_cursor(cursor)
+        self._delete_from_cursor(cursor, count)
         return True
 
-    def _delete_char(self, cursor: QTextCursor):
-        cursor.deleteChar()
+    def _delete_char(self, cursor: TextCursor, count: int = 1):
+        # the count does not go past the end of the line
+        block = cursor.block()
+        end = block.position() + block.length() - 1
+        cursor.setPosition(min(cursor.position() + count, end), QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
         return True
 
-    def _delete_char_before(self, cursor: QTextCursor):
-        cursor.movePosition(QTextCursor.PreviousCharacter)
-        cursor.deleteChar()
+    def _delete_char_before(self, cursor: TextCursor, count: int = 1):
+        start = max(cursor.position() - count, cursor.block().position())
+        cursor.setPosition(start, QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
         return True
 
-    def _delete_char_insert(self, cursor: QTextCursor):
+    def _delete_char_insert(self, cursor: TextCursor, count: int = 1):
         super().to_insert_mode()
-        cursor.deleteChar()
+        self._delete_char(cursor, count)
         return True
 
-    def _replace_char(self, cursor: QTextCursor, key: str):
+    def _replace_char(self, cursor: TextCursor, key: str):
         cursor.movePosition(QTextCursor.NextCharacter)
         cursor.deletePreviousChar()
         cursor.insertText(key)
         return True
 
-    def _delete_line(self, cursor: QTextCursor):
-        if cursor.block().text().strip() == '':
+    def _delete_line(self, cursor: TextCursor, count: int = 1):
+        if count == 1 and cursor.block().text().strip() == '':
             cursor.deleteChar()
         else:
             cursor.movePosition(QTextCursor.StartOfLine, QTextCursor.MoveAnchor)
+            cursor.movePosition(QTextCursor.Down, QTextCursor.KeepAnchor, count - 1)
             cursor.movePosition(QTextCursor.EndOfLine, QTextCursor.KeepAnchor)
             super().add_to_clipboard(cursor.selectedText() + '\n')
             cursor.removeSelectedText()
         return True
 
-    def _delete_line_insert(self, cursor: QTextCursor):
-        self._delete_line(cursor)
+    def _delete_line_insert(self, cursor: TextCursor, count: int = 1):
+        self._delete_line(cursor, count)
         super().to_insert_mode()
         return True
 
@@ -654,13 +827,16 @@ def handle(self, params: HandlerParams):
         if keys.startswith('r') and len(keys) == 2:
             return self._replace_char(params.cursor, keys[1])
 
-        commands = self.commands.get(keys)
-        return commands(params.cursor) if commands else False
+        command = self.line_commands.get(keys) or self.commands.get(keys)
+        return command(params.cursor, params.count or 1) if command else False
 
 
 @register_normal_handler
 class UndoRedoHandler(BaseHandler):
-    def __init__(self, editor: QPlainTextEdit):
+    # undo and redo cannot run while an edit block is open
+    edit_block = False
+
+    def __init__(self, editor: TextEditor):
         super().__init__(editor)
         self.commands = {
             'u': self.undo,
@@ -0,0 +1,736 @@
+"""A pure Python editor that runs the engine without Qt widgets.
+
+`HeadlessEditor` implements the `editor_adapter` protocols on a plain text
+buffer, so the handlers, the event filters and the registers run in batch jobs,
+benchmarks and tests without a `QApplication` or a display:
+
+>>> from vimdcc.editor_filters import EditorEventFilter
+>>> editor = HeadlessEditor('one two three')
+>>> editor.installEventFilter(EditorEventFilter(editor))
+>>> editor.send_keys('dwA four<Esc>')
+>>> editor.toPlainText()
+'two three four'
+
+The cursor follows `QTextCursor` for a document without line wrapping: a line
+is a block, the columns are characters, and a word is a run of letters, digits
+and underscores or a run of punctuation characters.
+
+"""
+import weakref
+from typing import Any, List, Tuple, Callable, Optional
+
+from PySide2.QtGui import Qt, QKeyEvent, QTextCursor
+from PySide2.QtCore import QEvent, QObject
+
+from .macros import parse_notation
+from .piece_table import PieceTable
+
+PARAGRAPH_SEPARATOR = '\u2029'
+
+# an edit of the text: the position, the text removed and the text added
+Edit = Tuple[int, str, str]
+
+_SPACE, _WORD, _PUNCTUATION = range(3)
+
+
+def _char_class(char: str) -> int:
+    if char.isspace():
+        return _SPACE
+    if char.isalnum() or char == '_':
+        return _WORD
+    return _PUNCTUATION
+
+
+def _next_word(line: str, column: int) -> int:
+    """The column of the next word of the line or of its end."""
+    end = len(line)
+    char_class = _char_class(line[column])
+    if char_class != _SPACE:
+        while column < end and _char_class(line[column]) == char_class:
+            column += 1
+
+    while column < end and line[column].isspace():
+        column += 1
+
+    return column
+
+
+def _previous_word(line: str, column: int) -> int:
+    """The column of the start of the previous word of the line or 0."""
+    while column > 0 and line[column - 1].isspace():
+        column -= 1
+
+    if column > 0:
+        char_class = _char_class(line[column - 1])
+        while column > 0 and _char_class(line[column - 1]) == char_class:
+            column -= 1
+
+    return column
+
+
+def _end_of_word(line: str, column: int) -> int:
+    if column < len(line):
+        char_class = _char_class(line[column])
+        if char_class != _SPACE:
+            while column < len(line) and _char_class(line[column]) == char_class:
+                column += 1
+
+    return column
+
+
+def _start_of_word(line: str, column: int) -> int:
+    if column == 0:
+        return column
+
+    if column == len(line):
+        # after a space or a punctuation character it is not in a word
+        if _char_class(line[-1]) != _WORD:
+            return column
+        return _previous_word(line, column)
+
+    return _previous_word(line, column + 1)
+
+
+def _normalize(text: str) -> str:
+    """Convert the line separators to `\\n`, like `QTextCursor.insertText` does."""
+    return text.replace('\r\n', '\n').replace('\r', '\n').replace(PARAGRAPH_SEPARATOR, '\n')
+
+
+class Signal:
+    """The `connect`, `disconnect` and `emit` of a Qt signal."""
+
+    def __init__(self):
+        self._slots: List[Callable[..., Any]] = []
+
+    def connect(self, slot: Callable[..., Any]) -> None:
+        self._slots.append(slot)
+
+    def disconnect(self, slot: Callable[..., Any]) -> None:
+        self._slots.remove(slot)
+
+    def emit(self, *args: Any) -> None:
+        for slot in list(self._slots):
+            slot(*args)
+
+
+class HeadlessBlock:
+    """A line of a `HeadlessDocument`, like a `QTextBlock`.
+
+    The block is a view of the document: it is not updated after an edit.
+    """
+    __slots__ = ('_document', '_number')
+
+    def __init__(self, document: 'HeadlessDocument', number: int):
+        self._document = document
+        self._number = number
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, HeadlessBlock) and
+            other._document is self._document and
+            other.blockNumber() == self.blockNumber()
+        )
+
+    def __repr__(self):
+        return f'HeadlessBlock({self.blockNumber()}, {self.text()!r})'
+
+    def isValid(self) -> bool:
+        return 0 <= self._number < self._document.blockCount()
+
+    def blockNumber(self) -> int:
+        return self._number if self.isValid() else -1
+
+    def position(self) -> int:
+        return self._document._block_start(self._number) if self.isValid() else 0
+
+    def text(self) -> str:
+        return self._document._block_text(self._number) if self.isValid() else ''
+
+    def length(self) -> int:
+        """The length of the text and of the block separator."""
+        return len(self.text()) + 1 if self.isValid() else 0
+
+    def next(self) -> 'HeadlessBlock':
+        return HeadlessBlock(self._document, self._number + 1 if self.isValid() else -1)
+
+    def previous(self) -> 'HeadlessBlock':
+        return HeadlessBlock(self._document, self._number - 1 if self.isValid() else -1)
+
+
+class HeadlessDocument:
+    """The text of a `HeadlessEditor`, like a `QTextDocument`.
+
+    The positions count the block separators as one character, so they are the
+    same as the ones of the Qt document with the same text. Every edit emits
+    `contentsChange`, moves the cursors of the document and is recorded in the
+    undo stack: the edits done between `beginEditBlock` and `endEditBlock` are
+    a single undo step and so are the characters typed one after the other.
+
+    """
+
+    def __init__(self, text: str = ''):
+        self.contentsChange = Signal()
+
+        self._table = PieceTable()
+        self._cursors: 'weakref.WeakSet[HeadlessCursor]' = weakref.WeakSet()
+
+        self._undo_stack: List[List[Edit]] = []
+        self._redo_stack: List[List[Edit]] = []
+        self._block_edits: Optional[List[Edit]] = None
+        self._block_depth = 0
+        self._typing = False
+
+        self.setPlainText(text)
+
+    def __len__(self) -> int:
+        """The number of characters, without the separator of the last block."""
+        return len(self._table)
+
+    def toPlainText(self) -> str:
+        return self._table.text()
+
+    def setPlainText(self, text: str) -> None:
+        """Replace the text, the cursors are moved to the start and the undo stack is cleared."""
+        removed = len(self._table)
+        self._table = PieceTable(_normalize(text))
+
+        for cursor in self._cursors:
+            cursor._set(0, 0)
+
+        self._undo_stack.clear()
+        self._redo_stack.clear()
+        self._typing = False
+        self.contentsChange.emit(0, removed, len(self._table))
+
+    def characterCount(self) -> int:
+        """The number of characters, including the separator of the last block."""
+        return len(self._table) + 1
+
+    def characterAt(self, position: int) -> str:
+        length = len(self._table)
+        if 0 <= position < length:
+            char = self._table.char_at(position)
+            return PARAGRAPH_SEPARATOR if char == '\n' else char
+        return PARAGRAPH_SEPARATOR if position == length else '\x00'
+
+    def blockCount(self) -> int:
+        return self._table.line_count()
+
+    def begin(self) -> HeadlessBlock:
+        return HeadlessBlock(self, 0)
+
+    def lastBlock(self) -> HeadlessBlock:
+        return HeadlessBlock(self, self._table.line_count() - 1)
+
+    def findBlockByNumber(self, number: int) -> HeadlessBlock:
+        return HeadlessBlock(self, number)
+
+    def findBlock(self, position: int) -> HeadlessBlock:
+        if not 0 <= position <= len(self._table):
+            return HeadlessBlock(self, -1)
+        return HeadlessBlock(self, self._table.line_of(position))
+
+    def _block_start(self, number: int) -> int:
+        return self._table.line_start(number)
+
+    def _block_end(self, number: int) -> int:
+        """The position of the separator of the block."""
+        if number + 1 < self._table.line_count():
+            return self._table.line_start(number + 1) - 1
+        return len(self._table)
+
+    def _block_text(self, number: int) -> str:
+        return self._table.substring(self._block_start(number), self._block_end(number))
+
+    def isUndoAvailable(self) -> bool:
+        return bool(self._undo_stack)
+
+    def isRedoAvailable(self) -> bool:
+        return bool(self._redo_stack)
+
+    def undo(self, cursor: Optional['HeadlessCursor'] = None) -> None:
+        """Undo the last step and move the cursor to the text it restored."""
+        if not self._undo_stack or self._block_depth:
+            return
+
+        edits = self._undo_stack.pop()
+        position = 0
+        for start, removed, added in reversed(edits):
+            self._replace(start, len(added), removed)
+            position = start + len(removed)
+
+        self._redo_stack.append(edits)
+        self._typing = False
+        if cursor is not None:
+            cursor.setPosition(position)
+
+    def redo(self, cursor: Optional['HeadlessCursor'] = None) -> None:
+        if not self._redo_stack or self._block_depth:
+            return
+
+        edits = self._redo_stack.pop()
+        position = 0
+        for start, removed, added in edits:
+            self._replace(start, len(removed), added)
+            position = start + len(added)
+
+        self._undo_stack.append(edits)
+        self._typing = False
+        if cursor is not None:
+            cursor.setPosition(position)
+
+    def _begin_edit_block(self) -> None:
+        if not self._block_depth:
+            self._block_edits = []
+        self._block_depth += 1
+
+    def _end_edit_block(self) -> None:
+        if not self._block_depth:
+            return
+
+        self._block_depth -= 1
+        if self._block_depth:
+            return
+
+        edits, self._block_edits = self._block_edits, None
+        if edits:
+            self._undo_stack.append(edits)
+            self._typing = False
+
+    def _edit(self, position: int, length: int, text: str) -> None:
+        """Replace `length` characters at `position` with the text and record it."""
+        text = _normalize(text)
+        if not length and not text:
+            return
+
+        edit = (position, self._table.substring(position, position + length), text)
+        self._replace(position, length, text)
+        self._redo_stack.clear()
+
+        if self._block_edits is not None:
+            self._block_edits.append(edit)
+            return
+
+        # typed characters are merged with the previous ones, until a new line
+        typing = not length and '\n' not in text
+        if typing and self._typing:
+            start, _, added = self._undo_stack[-1][-1]
+            if start + len(added) == position:
+                self._undo_stack[-1][-1] = (start, '', added + text)
+                return
+
+        self._undo_stack.append([edit])
+        self._typing = typing
+
+    def _replace(self, position: int, length: int, text: str) -> None:
+        end = position + length
+        delta = len(text) - length
+        self._table.delete(position, length)
+        self._table.insert(position, text)
+
+        for cursor in self._cursors:
+            cursor._adjust(position, end, delta)
+
+        self.contentsChange.emit(position, length, len(text))
+
+
+class HeadlessCursor:
+    """A cursor of a `HeadlessDocument`, like a `QTextCursor`.
+
+    The cursor follows the edits of the document done by the other cursors.
+    """
+
+    def __init__(self, document: HeadlessDocument, position: int = 0, anchor: int = -1):
+        self._document = document
+        self._position = position
+        self._anchor = position if anchor == -1 else anchor
+
+        # the column kept by the vertical moves
+        self._column = -1
+
+        document._cursors.add(self)
+
+    def __repr__(self):
+        return f'HeadlessCursor(position={self._position}, anchor={self._anchor})'
+
+    def _set(self, position: int, anchor: int) -> None:
+        self._position = position
+        self._anchor = anchor
+        self._column = -1
+
+    def _adjust(self, start: int, end: int, delta: int) -> None:
+        position, anchor = self._position, self._anchor
+
+        if position >= end:
+            position += delta
+        elif position > start:
+            position = start
+
+        if anchor >= end:
+            anchor += delta
+        elif anchor > start:
+            anchor = start
+
+        self._set(position, anchor)
+
+    def document(self) -> HeadlessDocument:
+        return self._document
+
+    def copy(self) -> 'HeadlessCursor':
+        return HeadlessCursor(self._document, self._position, self._anchor)
+
+    def position(self) -> int:
+        return self._position
+
+    def anchor(self) -> int:
+        return self._anchor
+
+    def setPosition(self, position: int, mode: QTextCursor.MoveMode = QTextCursor.MoveAnchor):
+        if not 0 <= position < self._document.characterCount():
+            return
+
+        anchor = position if mode == QTextCursor.MoveAnchor else self._anchor
+        self._set(position, anchor)
+
+    def block(self) -> HeadlessBlock:
+        return self._document.findBlock(self._position)
+
+    def blockNumber(self) -> int:
+        return self._document._table.line_of(self._position)
+
+    def positionInBlock(self) -> int:
+        return self._position - self._document._block_start(self.blockNumber())
+
+    columnNumber = positionInBlock
+
+    def atStart(self) -> bool:
+        return self._position == 0
+
+    def atEnd(self) -> bool:
+        return self._position == len(self._document)
+
+    def atBlockStart(self) -> bool:
+        return self.positionInBlock() == 0
+
+    def atBlockEnd(self) -> bool:
+        return self._position == self._document._block_end(self.blockNumber())
+
+    def movePosition(
+        self,
+        operation: QTextCursor.MoveOperation,
+        mode: QTextCursor.MoveMode = QTextCursor.MoveAnchor,
+        n: int = 1
+    ) -> bool:
+        """Move the cursor `n` times and return False if a move could not be done."""
+        if operation == QTextCursor.NoMove:
+            return True
+
+        vertical = operation in (QTextCursor.Up, QTextCursor.Down)
+
+        for _ in range(n):
+            column = self._column if self._column != -1 else self.positionInBlock()
+            position = self._target(operation, mode, column)
+            if position is None:
+                return False
+
+            # like Qt, a word start is searched from the next character
+            origin = self._position
+            if (
+                operation == QTextCursor.StartOfWord and
+                not self.atBlockStart() and
+                not self.atBlockEnd()
+            ):
+                origin += 1
+
+            moved = position != origin
+            anchor = position if mode == QTextCursor.MoveAnchor else self._anchor
+            self._set(position, anchor)
+
+            if vertical:
+                self._column = column
+
+            if not moved:
+                return False
+
+        return True
+
+    def _target(
+        self, operation: QTextCursor.MoveOperation, mode: QTextCursor.MoveMode, column: int
+    ) -> Optional[int]:
+        """Return the position the operation moves to or None if it cannot move.
+
+        `column` is the column the vertical moves go to.
+        """
+        document = self._document
+        position = self._position
+        number = self.blockNumber()
+        start = document._block_start(number)
+        end = document._block_end(number)
+
+        if operation in (QTextCursor.NextCharacter, QTextCursor.Right):
+            if mode == QTextCursor.MoveAnchor and self._anchor != position:
+                return max(position, self._anchor)
+            return min(position + 1, len(document))
+
+        if operation in (QTextCursor.PreviousCharacter, QTextCursor.Left):
+            if mode == QTextCursor.MoveAnchor and self._anchor != position:
+                return min(position, self._anchor)
+            return max(position - 1, 0)
+
+        if operation in (QTextCursor.StartOfLine, QTextCursor.StartOfBlock):
+            return start
+
+        if operation in (QTextCursor.EndOfLine, QTextCursor.EndOfBlock):
+            return end
+
+        if operation == QTextCursor.Start:
+            return 0
+
+        if operation == QTextCursor.End:
+            return len(document)
+
+        if operation in (QTextCursor.NextBlock, QTextCursor.PreviousBlock):
+            number += 1 if operation == QTextCursor.NextBlock else -1
+            if not 0 <= number < document.blockCount():
+                return None
+            return document._block_start(number)
+
+        if operation in (QTextCursor.Up, QTextCursor.Down):
+            number += 1 if operation == QTextCursor.Down else -1
+            if not 0 <= number < document.blockCount():
+                return None
+
+            target = document._block_start(number)
+            return target + min(column, document._block_end(number) - target)
+
+        if operation in (QTextCursor.NextWord, QTextCursor.WordRight):
+            if position == end:
+                return min(position + 1, len(document))
+            return start + _next_word(document._block_text(number), position - start)
+
+        if operation in (QTextCursor.PreviousWord, QTextCursor.WordLeft):
+            if position == start:
+                return max(position - 1, 0)
+            return start + _previous_word(document._block_text(number), position - start)
+
+        if operation == QTextCursor.EndOfWord:
+            return start + _end_of_word(document._block_text(number), position - start)
+
+        if operation == QTextCursor.StartOfWord:
+            return start + _start_of_word(document._block_text(number), position - start)
+
+        # like Qt, the operations that do not apply to plain text (e.g. the
+        # table cells) do not move
+        return None
+
+    def select(self, selection: QTextCursor.SelectionType) -> None:
+        if selection == QTextCursor.WordUnderCursor:
+            self.movePosition(QTextCursor.StartOfWord)
+            self.movePosition(QTextCursor.EndOfWord, QTextCursor.KeepAnchor)
+
+        elif selection in (QTextCursor.LineUnderCursor, QTextCursor.BlockUnderCursor):
+            self.movePosition(QTextCursor.StartOfBlock)
+            self.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+
+        elif selection == QTextCursor.Document:
+            self.movePosition(QTextCursor.Start)
+            self.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+
+    def hasSelection(self) -> bool:
+        return self._position != self._anchor
+
+    def selectionStart(self) -> int:
+        return min(self._position, self._anchor)
+
+    def selectionEnd(self) -> int:
+        return max(self._position, self._anchor)
+
+    def selectedText(self) -> str:
+        """The selected text with the Qt block separators (`\\u2029`)."""
+        text = self._document._table.substring(self.selectionStart(), self.selectionEnd())
+        return text.replace('\n', PARAGRAPH_SEPARATOR)
+
+    def clearSelection(self) -> None:
+        self._anchor = self._position
+
+    def removeSelectedText(self) -> None:
+        start = self.selectionStart()
+        self._document._edit(start, self.selectionEnd() - start, '')
+
+    def insertText(self, text: str) -> None:
+        start = self.selectionStart()
+        self._document._edit(start, self.selectionEnd() - start, text)
+
+    def deleteChar(self) -> None:
+        if self.hasSelection():
+            self.removeSelectedText()
+        elif self._position < len(self._document):
+            self._document._edit(self._position, 1, '')
+
+    def deletePreviousChar(self) -> None:
+        if self.hasSelection():
+            self.removeSelectedText()
+        elif self._position > 0:
+            self._document._edit(self._position - 1, 1, '')
+
+    def beginEditBlock(self) -> None:
+        self._document._begin_edit_block()
+
+    def endEditBlock(self) -> None:
+        self._document._end_edit_block()
+
+
+class _FontMetrics:
+    """Every character is one unit wide and every line one unit high."""
+
+    def width(self, text: str) -> int:
+        return len(text)
+
+    horizontalAdvance = width
+
+    def lineSpacing(self) -> int:
+        return 1
+
+
+class _Viewport:
+    def __init__(self, lines: int):
+        self.lines = lines
+
+    def height(self) -> int:
+        return self.lines
+
+    def update(self) -> None:
+        pass
+
+
+class _ScrollBar:
+    def __init__(self):
+        self._value = 0
+
+    def value(self) -> int:
+        return self._value
+
+    def setValue(self, value: int) -> None:
+        self._value = max(0, value)
+
+
+class HeadlessEditor:
+    """A text editor without a widget, like a `QPlainTextEdit`.
+
+    The key presses are sent with `send_event` or `send_keys`: the event
+    filters installed on the editor see them first and the keys they do not
+    consume are typed in the text, like the Qt editor does.
+
+    Args:
+        text: The initial text.
+        lines: The number of lines that fit in the viewport, for the scroll
+            commands.
+    """
+
+    def __init__(self, text: str = '', lines: int = 50):
+        self._document = HeadlessDocument(text)
+        self._cursor = HeadlessCursor(self._document)
+        self._viewport = _Viewport(lines)
+        self._scrollbar = _ScrollBar()
+        self._font_metrics = _FontMetrics()
+        self._event_filters: List[QObject] = []
+        self._cursor_width = 1
+        self._updates_enabled = True
+
+    def document(self) -> HeadlessDocument:
+        return self._document
+
+    def textCursor(self) -> HeadlessCursor:
+        """A copy of the editor cursor, use `setTextCursor` to apply its changes."""
+        return self._cursor.copy()
+
+    def setTextCursor(self, cursor: HeadlessCursor) -> None:
+        self._cursor._set(cursor.position(), cursor.anchor())
+
+    def toPlainText(self) -> str:
+        return self._document.toPlainText()
+
+    def setPlainText(self, text: str) -> None:
+        self._document.setPlainText(text)
+
+    def undo(self) -> None:
+        self._document.undo(self._cursor)
+
+    def redo(self) -> None:
+        self._document.redo(self._cursor)
+
+    def cursorWidth(self) -> int:
+        return self._cursor_width
+
+    def setCursorWidth(self, width: int) -> None:
+        self._cursor_width = width
+
+    def fontMetrics(self) -> _FontMetrics:
+        return self._font_metrics
+
+    def viewport(self) -> _Viewport:
+        return self._viewport
+
+    def verticalScrollBar(self) -> _ScrollBar:
+        return self._scrollbar
+
+    def updatesEnabled(self) -> bool:
+        return self._updates_enabled
+
+    def setUpdatesEnabled(self, enable: bool) -> None:
+        self._updates_enabled = enable
+
+    def setFocus(self) -> None:
+        pass
+
+    def installEventFilter(self, event_filter: QObject) -> None:
+        self._event_filters.append(event_filter)
+
+    def removeEventFilter(self, event_filter: QObject) -> None:
+        self._event_filters.remove(event_filter)
+
+    def send_event(self, event: QEvent) -> bool:
+        """Deliver the event to the event filters and then to the editor."""
+        for event_filter in reversed(self._event_filters):
+            if event_filter.eventFilter(self, event):
+                return True
+        return self.event(event)
+
+    def send_keys(self, keys: str) -> None:
+        """Press the keys written in the Vim notation (e.g. `ciwfoo<Esc>`)."""
+        for event in parse_notation(keys):
+            self.send_event(event)
+
+    def event(self, event: QEvent) -> bool:
+        """Type the key like the Qt editor does when no filter consumed it."""
+        if event.type() != QEvent.KeyPress:
+            return False
+
+        key_event: QKeyEvent = event  # type: ignore
+        key = key_event.key()
+        cursor = self._cursor
+
+        if key in (Qt.Key_Return, Qt.Key_Enter):
+            cursor.insertText('\n')
+        elif key == Qt.Key_Backspace:
+            cursor.deletePreviousChar()
+        elif key == Qt.Key_Delete:
+            cursor.deleteChar()
+        elif key in _ARROW_KEYS:
+            cursor.movePosition(_ARROW_KEYS[key])
+        elif key_event.text() and (key_event.text().isprintable() or key == Qt.Key_Tab):
+            cursor.insertText(key_event.text())
+        else:
+            return False
+
+        return True
+
+
+_ARROW_KEYS = {
+    Qt.Key_Left: QTextCursor.Left,
+    Qt.Key_Right: QTextCursor.Right,
+    Qt.Key_Up: QTextCursor.Up,
+    Qt.Key_Down: QTextCursor.Down,
+    Qt.Key_Home: QTextCursor.StartOfLine,
+    Qt.Key_End: QTextCursor.EndOfLine,
+}
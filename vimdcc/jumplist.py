@@ -0,0 +1,90 @@
+"""Jumplist used by `Ctrl-o` and `Ctrl-i`.
+
+The jumplist keeps the positions the cursor jumped from (`gg`, `G`, `:{n}`,
+searches, marks, etc.). Positions are tracked so they stay correct after the
+text above them is edited.
+
+"""
+from typing import Deque, Optional
+from collections import deque
+
+from .editor_adapter import TextDocument
+from .position_tracker import (PositionTracker, TrackedPosition,
+                               get_position_tracker)
+from .document_registry import DocumentRegistry
+
+
+class JumpList:
+    """Bounded list of jump positions with a cursor to move through it.
+
+    When the list is full the oldest jump is dropped. Like in Vim, a new jump
+    is always appended at the end even after moving back in the list.
+
+    >>> from vimdcc.headless import HeadlessDocument
+    >>> jumps = get_jumplist(HeadlessDocument('foo bar ' * 10))
+    >>> jumps.push(10)
+    >>> jumps.back(50)
+    10
+    >>> jumps.forward()
+    50
+
+    """
+
+    def __init__(self, tracker: PositionTracker, size: int = 100):
+        self._tracker = tracker
+        self._jumps: Deque[TrackedPosition] = deque(maxlen=size)
+        self._index = 0
+
+    def __len__(self):
+        return len(self._jumps)
+
+    def positions(self):
+        return [jump.position for jump in self._jumps]
+
+    def push(self, position: int) -> None:
+        if self._jumps and self._jumps[-1].position == position:
+            self._index = len(self._jumps)
+            return
+
+        if len(self._jumps) == self._jumps.maxlen:
+            self._tracker.release(self._jumps[0])
+
+        self._jumps.append(self._tracker.track(position))
+        self._index = len(self._jumps)
+
+    def back(self, position: int) -> Optional[int]:
+        """Return the previous jump position or None if there is none.
+
+        `position` is the current cursor position: when moving back from the end
+        of the list it is stored so `forward` can return to it.
+        """
+        if not self._jumps:
+            return None
+
+        if self._index == len(self._jumps):
+            self.push(position)
+            self._index = len(self._jumps) - 1
+
+        if self._index <= 0:
+            return None
+
+        self._index -= 1
+        return self._jumps[self._index].position
+
+    def forward(self) -> Optional[int]:
+        """Return the next jump position or None if there is none."""
+        if self._index + 1 >= len(self._jumps):
+            return None
+
+        self._index += 1
+        return self._jumps[self._index].position
+
+
+_JUMPLISTS: DocumentRegistry[JumpList] = DocumentRegistry(
+    lambda document: JumpList(get_position_tracker(document))
+)
+
+
+def get_jumplist(document: TextDocument) -> JumpList:
+    """Return the jumplist of the document (see `get_position_tracker`)."""
+    return _JUMPLISTS.get(document)
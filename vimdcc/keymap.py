@@ -0,0 +1,274 @@
+"""Compiled keymap used by the normal mode to dispatch the key sequences.
+
+Every handler declares the key sequences it can execute (see
+`BaseHandler.key_bindings`). The bindings are compiled once, when the event
+filter is created, into a trie for each mode. Each key press then moves one
+step in the trie and only the handlers of the matching node are called, so
+the dispatch cost does not depend on how many commands are registered.
+
+User remaps are read from `vimdcc_keymap.json`, next to `vimdcc.json`, and
+compiled into the same trie: the mapped keys lead to the node of the original
+sequence, so a remap costs nothing extra per key press.
+
+    {
+        "H": "^",
+        "L": "$",
+        "U": "®",
+        "zz": null
+    }
+
+A `null` value removes the binding. The mapped keys must be a single key
+sequence of the keymap: `"Y": "y$"` is invalid because `y` and `$` are two
+bindings (an operator and its motion), and not one sequence of the trie.
+
+"""
+from __future__ import annotations
+
+import json
+import pathlib
+from enum import Enum
+from typing import (TYPE_CHECKING, Dict, List, Tuple, Iterable, Optional,
+                    FrozenSet, NamedTuple)
+
+from .logger import LOGGER
+from .settings import SETTINGS_FILE
+from .editor_mode import Modes
+
+if TYPE_CHECKING:
+    from .handler_base import BaseHandler
+
+KEYMAP_FILE = SETTINGS_FILE.parent / 'vimdcc_keymap.json'
+
+Remaps = Dict[str, Optional[str]]
+
+
+class KeyArgument(str, Enum):
+    NONE = 'none'
+
+    # a single key after the sequence (e.g. `f{char}`, `m{char}`)
+    CHAR = 'char'
+
+    # any text after the sequence, confirmed with Enter (e.g. `/{pattern}`)
+    LINE = 'line'
+
+
+class KeyBinding(NamedTuple):
+    keys: str
+    argument: KeyArgument = KeyArgument.NONE
+
+    # the modes in which the binding is active, None means every mode
+    modes: Optional[FrozenSet[Modes]] = None
+
+
+class Match(str, Enum):
+    COMPLETE = 'complete'
+    PENDING = 'pending'
+    INVALID = 'invalid'
+
+    # complete, but also the prefix of a longer sequence
+    AMBIGUOUS = 'ambiguous'
+
+
+class KeymapNode:
+    __slots__ = ('keys', 'name', 'children', 'handlers', 'argument', 'line')
+
+    def __init__(self, keys: str = '', name: Optional[str] = None):
+        # the key sequence that leads to the node. The handlers always receive
+        # this sequence, also when the node was reached with a remap.
+        self.keys = keys
+
+        # the key sequence with a placeholder for the arguments (e.g. `f{char}`),
+        # used to identify the command
+        self.name = keys if name is None else name
+
+        self.children: Dict[str, KeymapNode] = {}
+        self.handlers: List[BaseHandler] = []
+
+        # the node reached by any key when the binding takes a `{char}`
+        self.argument: Optional[KeymapNode] = None
+
+        # True when the node keeps consuming keys until Enter
+        self.line = False
+
+    def step(self, key_text: str) -> Optional[KeymapNode]:
+        if self.line:
+            return self
+
+        if self.argument is not None:
+            return self.argument
+
+        node: Optional[KeymapNode] = self
+        for char in key_text:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def follow(self, key_text: str, keys: str) -> Tuple[Optional[KeymapNode], str]:
+        """Step with the key and return the next node and its key sequence.
+
+        `keys` is the sequence of the current node. The sequence of the next
+        node is the one of its binding, so a remapped key is replaced by the
+        keys it maps to.
+        """
+        node = self.step(key_text)
+        if node is None or self.line or self.argument is not None:
+            return node, keys + key_text
+        return node, node.keys
+
+    def match(self, submit: bool = False) -> Match:
+        if self.line:
+            return Match.COMPLETE if submit else Match.PENDING
+
+        prefix = bool(self.children) or self.argument is not None
+
+        if self.handlers:
+            return Match.AMBIGUOUS if prefix and not submit else Match.COMPLETE
+
+        if prefix:
+            return Match.PENDING
+
+        return Match.INVALID
+
+
+class Keymap:
+    """A trie of key bindings for each mode.
+
+    >>> handler = object()  # any BaseHandler
+    >>> keymap = Keymap([Modes.NORMAL])
+    >>> keymap.add(KeyBinding('gg'), handler)
+    >>> node = keymap.root(Modes.NORMAL).step('g')
+    >>> node.match()
+    <Match.PENDING: 'pending'>
+    >>> node.step('g').match()
+    <Match.COMPLETE: 'complete'>
+
+    """
+
+    def __init__(self, modes: Iterable[Modes]):
+        self._roots = {mode: KeymapNode() for mode in modes}
+
+        # the nodes of the bound key sequences and their prefixes. The remaps
+        # are resolved here, so they never see the other remaps (e.g. `j` and
+        # `k` can be swapped).
+        self._nodes: Dict[Modes, Dict[str, KeymapNode]] = {mode: {} for mode in modes}
+
+    def root(self, mode: Modes) -> Optional[KeymapNode]:
+        return self._roots.get(mode)
+
+    def add(self, binding: KeyBinding, handler: BaseHandler) -> None:
+        for mode, root in self._roots.items():
+            if binding.modes is not None and mode not in binding.modes:
+                continue
+
+            node = root
+            for char in binding.keys:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = KeymapNode(node.keys + char)
+                    self._nodes[mode][child.keys] = child
+                node = child
+
+            if binding.argument == KeyArgument.CHAR:
+                if node.argument is None:
+                    node.argument = KeymapNode(node.keys, node.name + '{char}')
+                node = node.argument
+
+            elif binding.argument == KeyArgument.LINE:
+                node.line = True
+
+            if handler not in node.handlers:
+                node.handlers.append(handler)
+
+    def remap(self, lhs: str, rhs: Optional[str]) -> bool:
+        """Make `lhs` lead to the node of `rhs`, or remove `lhs` if `rhs` is None.
+
+        `rhs` is resolved against the bindings, never against the previous
+        remaps. Return False when `rhs` is not a key sequence of the keymap
+        (e.g. an operator followed by a motion, like `y$`).
+        """
+        if not lhs:
+            return False
+
+        remapped = False
+        for mode, root in self._roots.items():
+            if rhs is None:
+                parent: Optional[KeymapNode] = root
+                for char in lhs[:-1]:
+                    parent = parent.children.get(char) if parent else None
+                if parent is not None:
+                    remapped = parent.children.pop(lhs[-1], None) is not None or remapped
+                continue
+
+            node = self._nodes[mode].get(rhs)
+            if node is None:
+                continue
+
+            parent = root
+            for char in lhs[:-1]:
+                child = parent.children.get(char)
+                if child is None:
+                    child = parent.children[char] = KeymapNode(parent.keys + char)
+                parent = child
+
+            parent.children[lhs[-1]] = node
+            remapped = True
+
+        return remapped
+
+    def lookup(self, mode: Modes, keys: str) -> Tuple[Optional[KeymapNode], str]:
+        """Walk the whole key sequence from the root of the mode.
+
+        Return the node and its key sequence (see `KeymapNode.follow`), or None
+        and the given keys when the sequence is invalid.
+
+        This is only needed when the key sequence was changed without typing
+        (e.g. after a backspace), otherwise use `KeymapNode.follow`.
+        """
+        node = self.root(mode)
+        canonical = ''
+        for char in keys:
+            if node is None:
+                return None, keys
+            node, canonical = node.follow(char, canonical)
+
+        return node, canonical if node else keys
+
+    @classmethod
+    def from_handlers(
+        cls,
+        modes: Iterable[Modes],
+        handlers: Iterable[BaseHandler],
+        remaps: Optional[Remaps] = None
+    ) -> Keymap:
+        keymap = cls(modes)
+        for handler in handlers:
+            for binding in handler.key_bindings():
+                keymap.add(binding, handler)
+
+        for lhs, rhs in (remaps or {}).items():
+            if not keymap.remap(lhs, rhs):
+                LOGGER.warning(f'Invalid keymap: {lhs!r} -> {rhs!r}')
+
+        return keymap
+
+
+def load_user_keymap(path: pathlib.Path = KEYMAP_FILE) -> Remaps:
+    """Return the remaps of the user keymap file or an empty dict."""
+    if not path.exists():
+        return {}
+
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError) as e:
+        LOGGER.error(f'Failed to load the keymap {path}: {e}')
+        return {}
+
+    if not isinstance(data, dict):
+        LOGGER.error(f'Failed to load the keymap {path}: expected a JSON object')
+        return {}
+
+    return {
+        str(lhs): rhs if rhs is None else str(rhs)
+        for lhs, rhs in data.items()
+    }
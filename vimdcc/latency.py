@@ -0,0 +1,128 @@
+"""Opt-in latency instrumentation of the key presses.
+
+When enabled, the event filters record how long each key press takes and how
+long each handler takes to execute its command. Durations are stored in fixed
+size histograms, one per key, so recording has a constant cost and memory does
+not grow with the number of key presses.
+
+The report can be printed in the log with the `:latency` command or read with
+`Latency.report()`.
+
+"""
+from typing import Dict, List, Tuple
+
+from .settings import Settings
+
+# Each power of two is split in 8 buckets, so a percentile is at most ~12%
+# above the real value.
+SUB_BUCKET_BITS = 3
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+# Durations above 2^40ns (~18 minutes) are counted in the last bucket.
+MAX_BITS = 40
+BUCKETS = SUB_BUCKETS * (MAX_BITS - SUB_BUCKET_BITS + 1)
+
+PERCENTILES = (50, 95, 99)
+
+
+def bucket_index(nanoseconds: int) -> int:
+    if nanoseconds < SUB_BUCKETS * 2:
+        return max(nanoseconds, 0)
+
+    exponent = nanoseconds.bit_length() - SUB_BUCKET_BITS - 1
+    index = exponent * SUB_BUCKETS + (nanoseconds >> exponent)
+    return min(index, BUCKETS - 1)
+
+
+def bucket_upper_bound(index: int) -> int:
+    if index < SUB_BUCKETS * 2:
+        return index
+
+    exponent = index // SUB_BUCKETS - 1
+    mantissa = index - exponent * SUB_BUCKETS
+    return ((mantissa + 1) << exponent) - 1
+
+
+class LatencyHistogram:
+    """Log-linear histogram of durations in nanoseconds.
+
+    >>> histogram = LatencyHistogram()
+    >>> histogram.record(1500)
+    >>> histogram.record(2000)
+    >>> histogram.percentile(50)
+    1535
+
+    """
+    __slots__ = ('buckets', 'count', 'max')
+
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.max = 0
+
+    def record(self, nanoseconds: int) -> None:
+        self.buckets[bucket_index(nanoseconds)] += 1
+        self.count += 1
+        if nanoseconds > self.max:
+            self.max = nanoseconds
+
+    def percentile(self, percent: float) -> int:
+        """Return the upper bound in nanoseconds of the given percentile."""
+        if not self.count:
+            return 0
+
+        rank = max(1, round(self.count * percent / 100))
+        total = 0
+        for index, count in enumerate(self.buckets):
+            total += count
+            if total >= rank:
+                return min(bucket_upper_bound(index), self.max)
+        return self.max
+
+
+class LatencyRecorder:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._histograms: Dict[str, LatencyHistogram] = {}
+
+    def record(self, key: str, nanoseconds: int) -> None:
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = LatencyHistogram()
+        histogram.record(nanoseconds)
+
+    def reset(self) -> None:
+        self._histograms.clear()
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Return count, p50, p95, p99 and max (in microseconds) of every key."""
+        report: Dict[str, Dict[str, float]] = {}
+        for key, histogram in self._histograms.items():
+            stats: Dict[str, float] = {'count': histogram.count}
+            for percent in PERCENTILES:
+                stats[f'p{percent}'] = histogram.percentile(percent) / 1000
+            stats['max'] = histogram.max / 1000
+            report[key] = stats
+        return report
+
+    def format_report(self) -> str:
+        rows: List[Tuple[str, Dict[str, float]]] = sorted(
+            self.report().items(), key=lambda row: row[1]['p99'], reverse=True
+        )
+        if not rows:
+            return 'No latency recorded'
+
+        width = max(len(key) for key, _ in rows)
+        lines = [
+            f'{"key":<{width}} {"count":>8} {"p50 us":>10} {"p95 us":>10} '
+            f'{"p99 us":>10} {"max us":>10}'
+        ]
+        for key, stats in rows:
+            lines.append(
+                f'{key:<{width}} {stats["count"]:>8} {stats["p50"]:>10.1f} '
+                f'{stats["p95"]:>10.1f} {stats["p99"]:>10.1f} {stats["max"]:>10.1f}'
+            )
+        return '\n'.join(lines)
+
+
+Latency = LatencyRecorder(Settings.record_latency)
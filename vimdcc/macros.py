@@ -0,0 +1,154 @@
+"""Keyboard macros recorded with `q{register}` and replayed with `@{register}`.
+
+The keys are stored in the named registers in the Vim notation (e.g.
+`ciwfoo<Esc>`), so the macros are saved with the registers and can be pasted,
+edited and yanked back like any other text.
+
+The replay itself is done by the event filter of the editor, which passes the
+keys to the filters of the modes without repainting the editor in between.
+
+"""
+import re
+from typing import List, Tuple, Optional
+
+from PySide2.QtGui import Qt, QKeyEvent
+from PySide2.QtCore import QEvent
+
+from .registers import Registers, resolve
+
+SPECIAL_KEYS = {
+    Qt.Key_Escape: 'Esc',
+    Qt.Key_Return: 'CR',
+    Qt.Key_Enter: 'CR',
+    Qt.Key_Backspace: 'BS',
+    Qt.Key_Delete: 'Del',
+    Qt.Key_Tab: 'Tab',
+    Qt.Key_Left: 'Left',
+    Qt.Key_Right: 'Right',
+    Qt.Key_Up: 'Up',
+    Qt.Key_Down: 'Down',
+}
+
+SPECIAL_NAMES = {name: key for key, name in SPECIAL_KEYS.items() if key != Qt.Key_Enter}
+
+_TOKEN = re.compile(r'<(?:C-[a-z]|lt|[A-Za-z]+)>|.', re.DOTALL)
+
+
+def key_notation(event: QKeyEvent) -> str:
+    """Return the key of the event in the Vim notation."""
+    key = event.key()
+    if event.modifiers() & Qt.ControlModifier and Qt.Key_A <= key <= Qt.Key_Z:
+        return f'<C-{chr(key).lower()}>'
+
+    name = SPECIAL_KEYS.get(key)
+    if name:
+        return f'<{name}>'
+
+    text = event.text()
+    return '<lt>' if text == '<' else text
+
+
+def _key_event(token: str) -> Optional[QKeyEvent]:
+    if token.startswith('<C-') and len(token) == 5:
+        key = ord(token[3].upper())
+        return QKeyEvent(QEvent.KeyPress, key, Qt.ControlModifier, chr(key - 64))
+
+    if token == '<lt>':
+        token = '<'
+
+    elif len(token) > 1:
+        key = SPECIAL_NAMES.get(token[1:-1])
+        if key is None:
+            return None
+        text = {Qt.Key_Return: '\r', Qt.Key_Tab: '\t'}.get(key, '')
+        return QKeyEvent(QEvent.KeyPress, key, Qt.NoModifier, text)
+
+    return QKeyEvent(QEvent.KeyPress, ord(token.upper()[0]), Qt.NoModifier, token)
+
+
+def parse_notation(keys: str) -> List[QKeyEvent]:
+    """Convert the keys in the Vim notation to key press events.
+
+    A `<...>` sequence that is not a known key is typed as it is.
+    """
+    events = []
+    for token in _TOKEN.findall(keys):
+        event = _key_event(token)
+        if event is not None:
+            events.append(event)
+            continue
+
+        events.extend(_key_event(char) for char in token)
+
+    return events
+
+
+class MacroRecorder:
+    """Record the keys typed between `q{register}` and `q`.
+
+    >>> recorder = MacroRecorder()
+    >>> recorder.start('a')
+    >>> for event in parse_notation('dwjq'):  # every key press, up to the `q`
+    ...     recorder.record(event)
+    >>> recorder.stop()
+    'dwj'
+    >>> recorder.play('a', count=3)
+    True
+
+    """
+
+    def __init__(self):
+        self.register: Optional[str] = None
+        self.last_register: Optional[str] = None
+        self.queued: Optional[Tuple[str, int]] = None
+        self.playing = False
+        self._keys: List[str] = []
+
+    @property
+    def recording(self) -> bool:
+        return self.register is not None
+
+    def start(self, register: str) -> None:
+        self.register = register
+        self._keys = []
+
+    def record(self, event: QKeyEvent) -> None:
+        if self.register is not None:
+            self._keys.append(key_notation(event))
+
+    def stop(self) -> Optional[str]:
+        """Stop the recording and store the keys, without the `q` that stopped it."""
+        register = self.register
+        if register is None:
+            return None
+
+        keys = ''.join(self._keys[:-1])
+        self.register = None
+        self._keys = []
+
+        Registers.set_named_register_value(register, keys)
+        return keys
+
+    def play(self, register: str, count: int = 1) -> bool:
+        """Queue the replay of the macro in the register (`@` replays the last one).
+
+        The replay is done by the event filter once the current key press is
+        handled. A macro cannot replay another macro.
+        """
+        if register == '@':
+            register = self.last_register
+
+        if self.playing or register is None:
+            return False
+
+        value = Registers.get_named_register().get(register)
+        keys = resolve(value) if value is not None else None
+        if not keys:
+            return False
+
+        self.last_register = register
+        self.queued = (keys, count)
+        return True
+
+
+Macros = MacroRecorder()
@@ -0,0 +1,116 @@
+"""Marks that stay correct while the document is edited.
+
+Every mark is a tracked position (see `position_tracker`), so inserting or
+removing text above it shifts the mark instead of leaving it on the wrong
+character. The registers file is not written on every `m{char}`: the marks are
+saved lazily, after a short delay or when the editor loses the focus.
+
+The global marks (`A`-`Z`) are shared by the editors: the position of a global
+mark is only written back by the document it was last set in.
+
+"""
+import weakref
+from typing import Set, Dict, Optional
+
+from PySide2.QtCore import QTimer, QCoreApplication
+
+from .registers import Registers, _Registers
+from .editor_adapter import TextDocument
+from .position_tracker import TrackedPosition, get_position_tracker
+from .document_registry import DocumentRegistry
+
+# The marks of the document each global mark was set in
+_GLOBAL_MARKS: 'weakref.WeakValueDictionary[str, LiveMarks]' = weakref.WeakValueDictionary()
+
+# Milliseconds to wait after the last mark before writing the registers file.
+SAVE_DELAY = 2000
+
+
+class LiveMarks:
+    def __init__(self, document: TextDocument, registers: _Registers = Registers):
+        self._tracker = get_position_tracker(document)
+        self._registers = registers
+
+        # the marks to write with the next save
+        self._changed: Set[str] = set()
+
+        self._marks: Dict[str, TrackedPosition] = {
+            key: self._tracker.track(mark['position'])
+            for key, mark in registers.get_marks().items()
+        }
+
+        self._save_timer = QTimer()
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(SAVE_DELAY)
+        self._save_timer.timeout.connect(self.save)
+
+    def set(self, key: str, position: int, line: str) -> None:
+        if key.isupper():
+            owner = _GLOBAL_MARKS.get(key)
+            if owner is not None and owner is not self:
+                owner._forget(key)
+            _GLOBAL_MARKS[key] = self
+
+        previous = self._marks.get(key)
+        if previous is not None:
+            self._tracker.release(previous)
+
+        self._marks[key] = self._tracker.track(position)
+        self._registers.add_mark(key, line, position, save=False)
+
+        self._changed.add(key)
+
+        # without an event loop (e.g. the headless editor) the marks are saved by `save`
+        if QCoreApplication.instance() is not None:
+            self._save_timer.start()
+
+    def get(self, key: str) -> Optional[int]:
+        tracked = self._marks.get(key)
+        return tracked.position if tracked else None
+
+    def _forget(self, key: str) -> None:
+        """Stop tracking a global mark set in another document."""
+        tracked = self._marks.pop(key, None)
+        if tracked is not None:
+            self._tracker.release(tracked)
+        self._changed.discard(key)
+
+    def sync(self) -> None:
+        """Copy the current position of the marks to the registers.
+
+        A global mark is only copied by the document it was set in.
+        """
+        marks = self._registers.get_marks()
+
+        for key, tracked in list(self._marks.items()):
+            mark = marks.get(key)
+
+            # the registers were cleared
+            if mark is None:
+                self._tracker.release(self._marks.pop(key))
+
+            elif key.isupper() and _GLOBAL_MARKS.get(key) is not self:
+                continue
+
+            elif mark['position'] != tracked.position:
+                mark['position'] = tracked.position
+                self._changed.add(key)
+
+    def save(self) -> None:
+        """Write the marks to the registers file if they have changed."""
+        self._save_timer.stop()
+        self.sync()
+
+        for key in self._changed:
+            self._registers.save_mark(key)
+        self._changed.clear()
+
+        self._registers.flush()
+
+
+_LIVE_MARKS: DocumentRegistry[LiveMarks] = DocumentRegistry(LiveMarks)
+
+
+def get_live_marks(document: TextDocument) -> LiveMarks:
+    """Return the marks of the document (see `get_position_tracker`)."""
+    return _LIVE_MARKS.get(document)
@@ -0,0 +1,52 @@
+"""Operators applied to the range selected by a motion or a text object.
+
+In normal mode an operator key (`d`, `c`, `y` or `v`) followed by a motion is
+parsed by the event filter into an operator mode: the motion then moves the
+cursor keeping the anchor at its start and the selected range is passed to
+`apply_operator`, the only place that deletes, changes or yanks text.
+
+The mode change that follows an operator (e.g. insert mode after `c`) is done
+by the event filter once the command returns.
+
+"""
+from typing import Optional
+
+from PySide2.QtGui import QTextCursor
+
+from .registers import Registers
+from .editor_mode import Modes
+from .editor_adapter import TextCursor
+
+OPERATOR_MODES = {
+    'd': Modes.DELETE,
+    'c': Modes.CHANGE,
+    'y': Modes.YANK,
+    'v': Modes.VISUAL,
+}
+
+REMOVE_MODES = frozenset({Modes.DELETE, Modes.CHANGE})
+
+
+def apply_operator(cursor: TextCursor, mode: Modes, start: Optional[int] = None) -> None:
+    """Apply the operator of `mode` to the selection of the cursor.
+
+    Args:
+        cursor: The cursor with the range to operate on selected.
+        mode: The operator mode. `DELETE` and `CHANGE` remove the text, `YANK`
+            copies it and `VISUAL_LINE` extends the selection to whole lines.
+            Any other mode keeps the selection as it is.
+        start: The position to move the cursor to after a yank.
+    """
+    if mode == Modes.VISUAL_LINE:
+        cursor.movePosition(QTextCursor.StartOfLine, QTextCursor.KeepAnchor)
+        cursor.movePosition(QTextCursor.EndOfLine, QTextCursor.KeepAnchor)
+
+    elif mode in REMOVE_MODES:
+        Registers.add(cursor.selectedText())
+        cursor.removeSelectedText()
+
+    elif mode == Modes.YANK:
+        Registers.add(cursor.selectedText())
+        cursor.clearSelection()
+        if start is not None:
+            cursor.setPosition(start)
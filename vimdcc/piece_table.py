@@ -0,0 +1,327 @@
+"""The piece table that stores the text of the headless editor.
+
+The text is never copied by an edit: it is a sequence of pieces, each a slice
+of an immutable buffer (the initial text or the text of an insertion). The
+pieces are the nodes of a treap ordered by their position in the text and each
+node counts the characters and the new lines of its subtree, so an edit and a
+conversion between a position and a line walk a single path of the tree, in
+O(log n) of the number of pieces.
+
+>>> table = PieceTable('one\\ntwo')
+>>> table.insert(3, ' and a half')
+>>> table.line_start(1), table.line_of(16)
+(15, 1)
+>>> table.text()
+'one and a half\\ntwo'
+
+"""
+import random
+from bisect import bisect_left
+from typing import List, Tuple, Optional
+from itertools import accumulate
+
+# the buffers of the typed text are extended instead of adding one piece per
+# character, up to this length
+MAX_EXTEND = 4096
+
+
+class _Buffer:
+    """A text and the positions of its new lines."""
+    __slots__ = ('text', 'newlines')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.newlines = list(accumulate((len(line) + 1 for line in text.split('\n')), initial=-1))
+        self.newlines = self.newlines[1:-1]
+
+    def count_newlines(self, start: int, end: int) -> int:
+        newlines = self.newlines
+        return bisect_left(newlines, end) - bisect_left(newlines, start)
+
+    def extend(self, text: str) -> None:
+        offset = len(self.text)
+        self.text += text
+        self.newlines.extend(offset + i for i, char in enumerate(text) if char == '\n')
+
+
+class _Piece:
+    """A node of the treap: a slice of a buffer and the totals of its subtree."""
+    __slots__ = (
+        'buffer', 'start', 'length', 'own_newlines',
+        'size', 'newlines', 'priority', 'left', 'right'
+    )
+
+    def __init__(self, buffer: _Buffer, start: int, length: int, priority: float):
+        self.buffer = buffer
+        self.start = start
+        self.length = length
+        self.own_newlines = buffer.count_newlines(start, start + length)
+        self.priority = priority
+        self.left: Optional[_Piece] = None
+        self.right: Optional[_Piece] = None
+        self.size = length
+        self.newlines = self.own_newlines
+
+    def update(self) -> None:
+        size = self.length
+        newlines = self.own_newlines
+
+        left = self.left
+        if left is not None:
+            size += left.size
+            newlines += left.newlines
+
+        right = self.right
+        if right is not None:
+            size += right.size
+            newlines += right.newlines
+
+        self.size = size
+        self.newlines = newlines
+
+
+def _split(node: Optional[_Piece], position: int) -> Tuple[Optional[_Piece], Optional[_Piece]]:
+    """Split the tree in the pieces before and after `position`."""
+    if node is None:
+        return None, None
+
+    left_size = node.left.size if node.left is not None else 0
+
+    if position <= left_size:
+        left, node.left = _split(node.left, position)
+        node.update()
+        return left, node
+
+    position -= left_size
+    if position >= node.length:
+        node.right, right = _split(node.right, position - node.length)
+        node.update()
+        return node, right
+
+    # the position is inside the piece: the tail becomes the root of the right
+    # tree, with the same priority so both trees are still heaps
+    tail = _Piece(node.buffer, node.start + position, node.length - position, node.priority)
+    tail.right = node.right
+    tail.update()
+
+    node.length = position
+    node.own_newlines -= tail.own_newlines
+    node.right = None
+    node.update()
+    return node, tail
+
+
+def _merge(left: Optional[_Piece], right: Optional[_Piece]) -> Optional[_Piece]:
+    if left is None:
+        return right
+    if right is None:
+        return left
+
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        left.update()
+        return left
+
+    right.left = _merge(left, right.left)
+    right.update()
+    return right
+
+
+class PieceTable:
+    """The text of a document as a piece table with a line index.
+
+    The lines are separated by `\\n` and numbered from 0. The text is joined
+    only by `text`, which caches it until the next edit.
+    """
+
+    def __init__(self, text: str = ''):
+        self._root: Optional[_Piece] = None
+        self._text: Optional[str] = text
+
+        if text:
+            self._root = self._new_piece(_Buffer(text), 0, len(text))
+
+    def __len__(self) -> int:
+        return self._root.size if self._root is not None else 0
+
+    @staticmethod
+    def _new_piece(buffer: _Buffer, start: int, length: int) -> _Piece:
+        return _Piece(buffer, start, length, random.random())
+
+    def line_count(self) -> int:
+        return (self._root.newlines if self._root is not None else 0) + 1
+
+    def text(self) -> str:
+        if self._text is None:
+            parts: List[str] = []
+            self._collect(self._root, 0, len(self), 0, parts)
+            self._text = ''.join(parts)
+        return self._text
+
+    def substring(self, start: int, end: int) -> str:
+        if self._text is not None:
+            return self._text[start:end]
+
+        parts: List[str] = []
+        self._collect(self._root, max(start, 0), min(end, len(self)), 0, parts)
+        return ''.join(parts)
+
+    def _collect(self, node: Optional[_Piece], start: int, end: int, offset: int, parts: List[str]):
+        """Append the slices of the pieces between `start` and `end` to `parts`.
+
+        `offset` is the position of the first character of the subtree.
+        """
+        while node is not None and start < end:
+            left_size = node.left.size if node.left is not None else 0
+            piece_start = offset + left_size
+
+            if start < piece_start:
+                self._collect(node.left, start, min(end, piece_start), offset, parts)
+
+            piece_end = piece_start + node.length
+            if start < piece_end and end > piece_start:
+                begin = node.start + max(start - piece_start, 0)
+                parts.append(node.buffer.text[begin:node.start + min(end, piece_end) - piece_start])
+
+            # the right subtree is walked by the loop
+            if end <= piece_end:
+                return
+            start = max(start, piece_end)
+            offset = piece_end
+            node = node.right
+
+    def char_at(self, position: int) -> str:
+        if self._text is not None:
+            return self._text[position]
+
+        node = self._root
+        while node is not None:
+            left_size = node.left.size if node.left is not None else 0
+            if position < left_size:
+                node = node.left
+                continue
+
+            position -= left_size
+            if position < node.length:
+                return node.buffer.text[node.start + position]
+
+            position -= node.length
+            node = node.right
+
+        raise IndexError('position out of range')
+
+    def line_of(self, position: int) -> int:
+        """Return the line of the position, the number of new lines before it."""
+        line = 0
+        node = self._root
+        while node is not None:
+            left = node.left
+            left_size = left.size if left is not None else 0
+            if position < left_size:
+                node = left
+                continue
+
+            if left is not None:
+                line += left.newlines
+
+            position -= left_size
+            if position < node.length:
+                return line + node.buffer.count_newlines(node.start, node.start + position)
+
+            line += node.own_newlines
+            position -= node.length
+            node = node.right
+
+        return line
+
+    def line_start(self, line: int) -> int:
+        """Return the position of the first character of the line."""
+        if line <= 0:
+            return 0
+
+        offset = 0
+        node = self._root
+        while node is not None:
+            left = node.left
+            left_newlines = left.newlines if left is not None else 0
+            if line <= left_newlines:
+                node = left
+                continue
+
+            line -= left_newlines
+            offset += left.size if left is not None else 0
+
+            if line <= node.own_newlines:
+                newlines = node.buffer.newlines
+                index = bisect_left(newlines, node.start) + line - 1
+                return offset + newlines[index] - node.start + 1
+
+            line -= node.own_newlines
+            offset += node.length
+            node = node.right
+
+        raise IndexError('line out of range')
+
+    def insert(self, position: int, text: str) -> None:
+        if not text:
+            return
+
+        self._text = None
+        if self._extend(position, text):
+            return
+
+        left, right = _split(self._root, position)
+        piece = self._new_piece(_Buffer(text), 0, len(text))
+        self._root = _merge(_merge(left, piece), right)
+
+    def _extend(self, position: int, text: str) -> bool:
+        """Append the text to the piece that ends at `position`, if it ends its buffer.
+
+        Typing a character is then an update of the totals of a single path.
+        """
+        if position == 0:
+            return False
+
+        path: List[_Piece] = []
+        node = self._root
+        offset = position
+        while node is not None:
+            path.append(node)
+            left_size = node.left.size if node.left is not None else 0
+            if offset <= left_size:
+                node = node.left
+                continue
+
+            offset -= left_size
+            if offset <= node.length:
+                break
+
+            offset -= node.length
+            node = node.right
+
+        if node is None or offset != node.length:
+            return False
+
+        buffer = node.buffer
+        if node.start + node.length != len(buffer.text) or len(buffer.text) >= MAX_EXTEND:
+            return False
+
+        newlines = len(buffer.newlines)
+        buffer.extend(text)
+        added = len(buffer.newlines) - newlines
+
+        node.length += len(text)
+        node.own_newlines += added
+        for parent in path:
+            parent.size += len(text)
+            parent.newlines += added
+        return True
+
+    def delete(self, position: int, length: int) -> None:
+        if length <= 0:
+            return
+
+        self._text = None
+        left, right = _split(self._root, position)
+        _, right = _split(right, length)
+        self._root = _merge(left, right)
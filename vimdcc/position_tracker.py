@@ -0,0 +1,63 @@
+"""Document positions that follow the edits, like a QTextCursor does.
+
+A tracked position is shifted when text is inserted or removed before it and
+collapsed to the edit position when the text around it is removed. All the
+positions of a document are adjusted from a single `contentsChange` slot.
+
+"""
+from typing import Set
+
+from .editor_adapter import TextDocument
+from .document_registry import DocumentRegistry
+
+
+class TrackedPosition:
+    __slots__ = ('position',)
+
+    def __init__(self, position: int):
+        self.position = position
+
+    def __repr__(self):
+        return f'TrackedPosition({self.position})'
+
+
+class PositionTracker:
+    """Keep a set of positions in sync with the edits of a document.
+
+    NOTE: Use `get_position_tracker` instead of instantiating the class yourself
+    so every position of the same document is adjusted by the same slot.
+
+    """
+
+    def __init__(self, document: TextDocument):
+        self._positions: Set[TrackedPosition] = set()
+        document.contentsChange.connect(self._on_contents_change)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def track(self, position: int) -> TrackedPosition:
+        tracked = TrackedPosition(position)
+        self._positions.add(tracked)
+        return tracked
+
+    def release(self, tracked: TrackedPosition) -> None:
+        self._positions.discard(tracked)
+
+    def _on_contents_change(self, position: int, chars_removed: int, chars_added: int):
+        end = position + chars_removed
+        delta = chars_added - chars_removed
+
+        for tracked in self._positions:
+            if tracked.position >= end:
+                tracked.position += delta
+            elif tracked.position > position:
+                tracked.position = position
+
+
+_POSITION_TRACKERS: DocumentRegistry[PositionTracker] = DocumentRegistry(PositionTracker)
+
+
+def get_position_tracker(document: TextDocument) -> PositionTracker:
+    """Return the tracker of the document, creating it if needed."""
+    return _POSITION_TRACKERS.get(document)
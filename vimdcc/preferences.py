@@ -5,8 +5,12 @@
 from PySide2.QtWidgets import (QFrame, QSpinBox, QCheckBox, QFormLayout,
                                QMessageBox, QPushButton)
 
+from .events import EventManager
+from .latency import Latency
 from .settings import Settings, VimDccSettings
 from .registers import Registers
+from .status_bar import status_bar
+from .utils.profiling import Profiler
 
 
 class VimPreferencesModel:
@@ -23,6 +27,10 @@ def set(self, key: str, value: Any):
     def clear_registers(self):
         Registers.clear()
 
+    def set_clipboard_size(self, size: int):
+        self.set('clipboard_size', size)
+        Registers.set_clipboard_size(size)
+
 
 class VimPreferencesView(QFrame):
     def __init__(self, parent=None):
@@ -32,15 +40,28 @@ def __init__(self, parent=None):
 
         self.launch_on_startup = QCheckBox()
         self.copy_to_system_clipboard = QCheckBox()
+        self.journal_registers = QCheckBox()
 
         self.clipboard_size = QSpinBox()
         self.clipboard_size.setRange(1, 1000)
         self.clipboard_size.setSingleStep(1)
         self.clipboard_size.setValue(100)
 
+        self.timeoutlen = QSpinBox()
+        self.timeoutlen.setRange(0, 10000)
+        self.timeoutlen.setSingleStep(100)
+        self.timeoutlen.setSuffix(' ms')
+        self.timeoutlen.setValue(1000)
+
         self.previewer_auto_insert = QCheckBox()
         self.previewer_auto_insert.setChecked(True)
 
+        self.record_latency = QCheckBox()
+        self.profiler_collapsed_stacks = QCheckBox()
+
+        self.toggle_profiler = QPushButton('Start Profiler')
+        self.toggle_profiler.setCheckable(True)
+
         self.clear_editor_cache = QPushButton('Clear Editor Cache')
         self.clear_registers = QPushButton('Clear Registers')
 
@@ -50,7 +71,12 @@ def __init__(self, parent=None):
         form_layout.addRow('Launch on Startup', self.launch_on_startup)
         form_layout.addRow('Previewer auto insert', self.previewer_auto_insert)
         form_layout.addRow('Clipboard Size', self.clipboard_size)
+        form_layout.addRow('Key sequence timeout', self.timeoutlen)
         form_layout.addRow('Copy to system clipboard', self.copy_to_system_clipboard)
+        form_layout.addRow('Journal registers', self.journal_registers)
+        form_layout.addRow('Record key latency', self.record_latency)
+        form_layout.addRow('Profiler collapsed stacks', self.profiler_collapsed_stacks)
+        form_layout.addRow(self.toggle_profiler)
         form_layout.addRow(self.clear_registers)
 
         self.setLayout(form_layout)
@@ -63,8 +89,16 @@ def __init__(self, view: VimPreferencesView, model: VimPreferencesModel):
 
         self._view.launch_on_startup.stateChanged.connect(self._on_launch_on_startup)
         self._view.clipboard_size.valueChanged.connect(self._on_clipboard_size)
+        self._view.timeoutlen.valueChanged.connect(self._on_timeoutlen)
         self._view.previewer_auto_insert.stateChanged.connect(self._on_previewer_auto_insert)
         self._view.copy_to_system_clipboard.stateChanged.connect(self._on_copy_to_system_clipboard)
+        self._view.journal_registers.stateChanged.connect(self._on_journal_registers)
+        self._view.record_latency.stateChanged.connect(self._on_record_latency)
+        self._view.profiler_collapsed_stacks.stateChanged.connect(
+            self._on_profiler_collapsed_stacks
+        )
+        self._view.toggle_profiler.clicked.connect(self._on_toggle_profiler)
+        EventManager.register('profiler_toggled', self._on_profiler_toggled)
         self._view.clear_registers.clicked.connect(self._on_clear_registers)
 
     @Slot()
@@ -75,13 +109,50 @@ def _on_clear_registers(self):
     def _on_copy_to_system_clipboard(self, state: int):
         self._model.set('copy_to_system_clipboard', state == 2)
 
+    @Slot(int)
+    def _on_journal_registers(self, state: int):
+        QMessageBox.information(
+            self._view, 'VimDcc', 'You must restart VimDcc for this change to take effect.'
+        )
+        self._model.set('journal_registers', state == 2)
+
+    @Slot(int)
+    def _on_profiler_collapsed_stacks(self, state: int):
+        self._model.set('profiler_collapsed_stacks', state == 2)
+
+    @Slot(bool)
+    def _on_toggle_profiler(self, checked: bool):
+        if checked == Profiler.running:
+            return
+
+        path = Profiler.toggle(self._model.settings.profiler_collapsed_stacks)
+        self._on_profiler_toggled(Profiler.running)
+        if path:
+            status_bar.write('NORMAL', f'Profile written to {path}')
+
+    def _on_profiler_toggled(self, running: bool):
+        widget = self._view.toggle_profiler
+        widget.blockSignals(True)
+        widget.setChecked(running)
+        widget.setText('Stop Profiler' if running else 'Start Profiler')
+        widget.blockSignals(False)
+
+    @Slot(int)
+    def _on_record_latency(self, state: int):
+        self._model.set('record_latency', state == 2)
+        Latency.enabled = state == 2
+
     @Slot(int)
     def _on_previewer_auto_insert(self, state: int):
         self._model.set('previewer_auto_insert', state == 2)
 
     @Slot(int)
     def _on_clipboard_size(self, value: int):
-        self._model.set('clipboard_size', value)
+        self._model.set_clipboard_size(value)
+
+    @Slot(int)
+    def _on_timeoutlen(self, value: int):
+        self._model.set('timeoutlen', value)
 
     @Slot(int)
     def _on_launch_on_startup(self, state: int):
@@ -97,11 +168,18 @@ def init(self):
         self._view.copy_to_system_clipboard.setChecked(settings.copy_to_system_clipboard)
         self._view.previewer_auto_insert.setChecked(settings.previewer_auto_insert)
         self._view.clipboard_size.setValue(settings.clipboard_size)
-
-        widget = self._view.launch_on_startup
-        widget.blockSignals(True)
-        widget.setChecked(settings.launch_on_startup)
-        widget.blockSignals(False)
+        self._view.timeoutlen.setValue(settings.timeoutlen)
+        self._view.record_latency.setChecked(settings.record_latency)
+        self._view.profiler_collapsed_stacks.setChecked(settings.profiler_collapsed_stacks)
+        self._on_profiler_toggled(Profiler.running)
+
+        for widget, checked in [
+            (self._view.launch_on_startup, settings.launch_on_startup),
+            (self._view.journal_registers, settings.journal_registers),
+        ]:
+            widget.blockSignals(True)
+            widget.setChecked(checked)
+            widget.blockSignals(False)
 
 
 class VimPreferences:
@@ -1,14 +1,166 @@
 import os
+import re
 import json
+import atexit
+import hashlib
 import pathlib
+import tempfile
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import (Any, Set, Dict, List, Deque, Union, Iterable, Optional,
+                    MutableSequence)
+from itertools import islice
+from collections import deque
 from dataclasses import asdict, dataclass
 
-from PySide2.QtGui import QClipboard
+from PySide2.QtGui import QClipboard, QGuiApplication
+from PySide2.QtCore import QTimer, QCoreApplication
 
+from .logger import LOGGER
 from .settings import Settings
 
+# Milliseconds to wait after the last change before writing the registers file.
+SAVE_DELAY = 1000
+
+# Bytes of changes the journal grows to before it is compacted in a snapshot.
+JOURNAL_COMPACT_SIZE = 1_000_000
+
+# Characters above which a yank is stored in its own file (see `PayloadStore`).
+PAYLOAD_SIZE = 64 * 1024
+
+PAYLOAD_REFERENCE = re.compile(r'<PAYLOAD:([0-9a-f]{64})>')
+
+
+def _write_atomic(path: pathlib.Path, text: str) -> None:
+    """Write the file with a temporary file, so a crash never leaves it truncated."""
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{path.name}.', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+class Payload:
+    """A large register value stored in its own file and read on first use."""
+    __slots__ = ('digest', '_store', '_text')
+
+    def __init__(self, store: 'PayloadStore', digest: str, text: Optional[str] = None):
+        self.digest = digest
+        self._store = store
+        self._text = text
+
+    @property
+    def reference(self) -> str:
+        """The text written in the registers file instead of the value."""
+        return f'<PAYLOAD:{self.digest}>'
+
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self._store.read(self.digest)
+        return self._text
+
+    def head(self, length: int) -> str:
+        """Return the start of the text, without reading the whole file."""
+        if self._text is None:
+            return self._store.read(self.digest, length)
+        return self._text[:length]
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Payload) and other.digest == self.digest
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> 'Payload':
+        # `asdict` copies the registers: the payload is never modified
+        return self
+
+    def __repr__(self) -> str:
+        return self.reference
+
+
+# A register value as kept in memory
+RegisterValue = Union[str, Payload]
+
+
+def resolve(value: RegisterValue) -> str:
+    """Return the text of a register value, reading it if it is a `Payload`."""
+    return value.text() if isinstance(value, Payload) else value
+
+
+class PayloadStore:
+    """Content addressed files of the register values above `PAYLOAD_SIZE`.
+
+    The registers file only keeps the reference of a large yank, so it is not
+    written again with every yank after it nor read when the registers are
+    loaded. The same text is stored once.
+    """
+
+    def __init__(self, directory: pathlib.Path, size: int = PAYLOAD_SIZE):
+        self._directory = directory
+        self.size = size
+
+    def _path(self, digest: str) -> pathlib.Path:
+        return self._directory / f'{digest}.txt'
+
+    def store(self, value: RegisterValue) -> RegisterValue:
+        """Return a `Payload` for a value above the size, written if new."""
+        if isinstance(value, Payload) or len(value) <= self.size:
+            return value
+
+        digest = hashlib.sha256(value.encode('utf-8', 'surrogatepass')).hexdigest()
+        path = self._path(digest)
+        if not path.exists():
+            self._directory.mkdir(parents=True, exist_ok=True)
+            _write_atomic(path, value)
+
+        return Payload(self, digest, value)
+
+    def load(self, value: RegisterValue) -> Optional[RegisterValue]:
+        """Return a `Payload` for a reference read from the registers file.
+
+        None when the file of the payload is missing: the register is dropped.
+        """
+        if isinstance(value, str) and value.startswith('<PAYLOAD:'):
+            match = PAYLOAD_REFERENCE.fullmatch(value)
+            if match:
+                digest = match.group(1)
+                if not self._path(digest).exists():
+                    LOGGER.warning(f'Missing register payload {digest}, register dropped')
+                    return None
+                return Payload(self, digest)
+        return value
+
+    def read(self, digest: str, length: int = -1) -> str:
+        try:
+            with self._path(digest).open(encoding='utf-8', newline='') as f:
+                return f.read(length)
+        except FileNotFoundError:
+            # removed since the registers were loaded
+            LOGGER.warning(f'Missing register payload {digest}')
+            return ''
+
+    def prune(self, values: Iterable[RegisterValue]) -> None:
+        """Remove the files of the payloads that are not in `values`."""
+        if not self._directory.exists():
+            return
+
+        keep: Set[str] = {value.digest for value in values if isinstance(value, Payload)}
+        for path in self._directory.glob('*.txt'):
+            if path.stem not in keep:
+                path.unlink()
+
+
+def _encode(value: Any) -> Any:
+    """Encode the register values that are not JSON types."""
+    if isinstance(value, Payload):
+        return value.reference
+    if isinstance(value, deque):
+        return list(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
 
 class Mark(Dict[str, Any]):
     position: int
@@ -18,7 +170,8 @@ class Mark(Dict[str, Any]):
 @dataclass
 class RegistersData:
     named: Dict[str, str]
-    clipboard: List[str]
+    # a list when loaded, the deque of the `Clipboard` in `_Registers`
+    clipboard: MutableSequence[RegisterValue]
     last_search: str
     marks: Dict[str, Mark]
 
@@ -30,37 +183,81 @@ class Clipboard:
     text copied from the editor. The size of the clipboard is defined in the
     settings but it can be overriden at runtime.
 
+    The history is a ring buffer, newest first: a `deque` whose `maxlen` drops
+    the oldest item, so adding an item does not copy the history.
+
     >>> previous_history = ['hello', 'world']
     >>> clipboard = Clipboard(previous_history)
     >>> clipboard.size = 3
     >>> clipboard.add('foo')
     >>> clipboard.add('bar')
     >>> clipboard
-    >>> ['bar', 'foo', 'hello']
+    ['bar', 'foo', 'hello']
 
     """
 
-    def __init__(self, previous_history: Optional[List[str]] = None) -> None:
-        self.history: List[str] = previous_history or []
-        self.size = Settings.clipboard_size
+    def __init__(self, previous_history: Optional[MutableSequence[RegisterValue]] = None) -> None:
+        # the history is newest first: a longer one keeps its newest items
+        size = Settings.clipboard_size
+        self.history: Deque[RegisterValue] = deque(
+            islice(previous_history or [], size), maxlen=size
+        )
+
+    @property
+    def size(self) -> int:
+        return self.history.maxlen or 0
+
+    @size.setter
+    def size(self, size: int) -> None:
+        # the newest items are kept when the history shrinks
+        if size != self.history.maxlen:
+            self.history = deque(islice(self.history, size), maxlen=size)
 
-    def add(self, item: str):
+    def add(self, item: RegisterValue):
         # don't add the same item twice in a row
         if self.history and item == self.history[0]:
             return
 
-        self.history.insert(0, item)
-        self.history = self.history[:self.size]
+        self.history.appendleft(item)
 
-        if Settings.copy_to_system_clipboard:
-            item = item.replace('<LINE_COPY>', '\n')
-            QClipboard().setText(item)
+        # the system clipboard needs a QApplication (e.g. not in the headless editor)
+        if Settings.copy_to_system_clipboard and QGuiApplication.instance() is not None:
+            text = resolve(item).replace('<LINE_COPY>', '\n')
+            QClipboard().setText(text)
 
     def get(self, index: int):
         return self.history[index] if 0 <= index < len(self.history) else None
 
     def __repr__(self):
-        return str(self.history)
+        return str(list(self.history))
+
+
+# A change of the registers, e.g. {'op': 'named', 'key': 'a', 'value': 'foo'}
+Change = Dict[str, Any]
+
+
+def empty_registers() -> RegistersData:
+    return RegistersData(named={}, clipboard=[], last_search='', marks={})
+
+
+def apply_change(registers: RegistersData, change: Change) -> None:
+    """Apply a change written by `_Registers` to the registers."""
+    op = change['op']
+
+    if op == 'clipboard':
+        clipboard = registers.clipboard
+        if not clipboard or clipboard[0] != change['value']:
+            clipboard.insert(0, change['value'])
+            del clipboard[Settings.clipboard_size:]
+
+    elif op == 'named':
+        registers.named[change['key']] = change['value']
+
+    elif op == 'mark':
+        registers.marks[change['key']] = Mark(change['value'])
+
+    elif op == 'last_search':
+        registers.last_search = change['value']
 
 
 class RegisterFileInterface(ABC):
@@ -70,6 +267,14 @@ def load(self) -> RegistersData: ...
     @abstractmethod
     def save(self, registers: RegistersData) -> None: ...
 
+    def append(self, registers: RegistersData, changes: List[Change]) -> bool:
+        """Write the changes made since the last write, by default with `save`.
+
+        Return True when all the registers were written (e.g. a compaction).
+        """
+        self.save(registers)
+        return True
+
 
 class RegisterFile(RegisterFileInterface):
 
@@ -78,12 +283,7 @@ def __init__(self, register_file: pathlib.Path) -> None:
 
     def load(self) -> RegistersData:
         if not self._register_file.exists():
-            registers = RegistersData(
-                named={},
-                clipboard=[],
-                last_search='',
-                marks={},
-            )
+            registers = empty_registers()
             self.save(registers)
             return registers
 
@@ -91,41 +291,229 @@ def load(self) -> RegistersData:
             return RegistersData(**json.load(f))
 
     def save(self, registers: RegistersData):
-        with self._register_file.open('w') as f:
-            json.dump(asdict(registers), f, indent=4)
+        _write_atomic(
+            self._register_file, json.dumps(asdict(registers), indent=4, default=_encode)
+        )
+
+
+class JournalRegisterFile(RegisterFileInterface):
+    """Registers file that appends the changes instead of rewriting everything.
+
+    Each line of the journal is a JSON change. The first line is a snapshot of
+    all the registers. A yank then only writes its own text. When the changes
+    pass `compact_size` bytes, the journal is replaced by a new snapshot, with
+    a temporary file like `RegisterFile`. A line cut by a crash is ignored
+    when the journal is loaded, which then compacts it.
+
+    When the journal does not exist yet, it starts from `initial` (e.g. the
+    `registers.json` of a `RegisterFile`).
+    """
+
+    def __init__(
+        self,
+        journal_file: pathlib.Path,
+        initial: Optional[RegisterFileInterface] = None,
+        compact_size: int = JOURNAL_COMPACT_SIZE
+    ) -> None:
+        self._journal_file = journal_file
+        self._initial = initial
+        self._compact_size = compact_size
+        self._snapshot_size = 0
+
+    def load(self) -> RegistersData:
+        if not self._journal_file.exists():
+            registers = self._initial.load() if self._initial else empty_registers()
+            self.save(registers)
+            return registers
+
+        registers = empty_registers()
+        torn = False
+        with self._journal_file.open(encoding='utf-8') as f:
+            for number, line in enumerate(f):
+                try:
+                    change = json.loads(line) if line.endswith('\n') else None
+                except json.JSONDecodeError:
+                    change = None
+
+                if change is None:
+                    torn = True
+                    break
+
+                if number == 0 and change['op'] == 'snapshot':
+                    registers = RegistersData(**change['value'])
+                    self._snapshot_size = len(line.encode('utf-8'))
+                else:
+                    apply_change(registers, change)
+
+        # the next changes would be appended to the cut line and lost with it
+        if torn:
+            self.save(registers)
+
+        return registers
+
+    def save(self, registers: RegistersData) -> None:
+        """Replace the journal with a snapshot of the registers."""
+        line = json.dumps({'op': 'snapshot', 'value': asdict(registers)}, default=_encode) + '\n'
+        _write_atomic(self._journal_file, line)
+        self._snapshot_size = len(line.encode('utf-8'))
+
+    def append(self, registers: RegistersData, changes: List[Change]) -> bool:
+        with self._journal_file.open('a', encoding='utf-8') as f:
+            f.writelines(json.dumps(change, default=_encode) + '\n' for change in changes)
+            size = f.tell()
+
+        if size - self._snapshot_size > self._compact_size:
+            self.save(registers)
+            return True
+        return False
 
 
 class _Registers:
+    """The registers, written to the registers file behind the edits.
+
+    A change only marks the registers as dirty and (re)starts a timer, so a
+    burst of yanks, deletes and searches is written once, `SAVE_DELAY` ms after
+    the last one. The pending changes are also written by `flush` when the
+    editor loses the focus and when Python exits.
+
+    The changes are kept until then, so a `JournalRegisterFile` only appends
+    them instead of writing all the registers.
+
+    With a `PayloadStore`, the values above its size are kept in their own
+    files and read when they are pasted or previewed. `get_clipboard` and
+    `get_named_register` return them as `Payload`, see `resolve`.
+    """
 
-    def __init__(self, register_file: RegisterFileInterface):
+    def __init__(
+        self,
+        register_file: RegisterFileInterface,
+        payloads: Optional[PayloadStore] = None
+    ):
         self.registers_file = register_file
         self.registers = register_file.load()
 
+        self._payloads = payloads
+        dropped = False
+        if payloads is not None:
+            registers = self.registers
+            clipboard = [payloads.load(value) for value in registers.clipboard]
+            named = {key: payloads.load(value) for key, value in registers.named.items()}
+
+            registers.clipboard = [value for value in clipboard if value is not None]
+            registers.named = {key: value for key, value in named.items() if value is not None}
+            dropped = (
+                len(registers.clipboard) != len(clipboard) or len(registers.named) != len(named)
+            )
+
+        # the registers share the history of the clipboard
         self._clipboard = Clipboard(self.registers.clipboard)
+        self.registers.clipboard = self._clipboard.history
         self._named_register: Optional[str] = None
 
-    def _push_to_clipboard(self, value: str):
+        self._dirty = False
+        # the changes to write, None when all the registers have to be written
+        self._changes: Optional[List[Change]] = []
+        self._save_timer = QTimer()
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(SAVE_DELAY)
+        self._save_timer.timeout.connect(self.flush)
+
+        # the registers file still has the references of the dropped registers
+        if dropped:
+            self.save_later()
+
+    def _store(self, value: str) -> RegisterValue:
+        return self._payloads.store(value) if self._payloads is not None else value
+
+    def _prune_payloads(self) -> None:
+        """Remove the payloads no longer referenced, once all the registers are written."""
+        if self._payloads is not None:
+            self._payloads.prune([*self.registers.clipboard, *self.registers.named.values()])
+
+    def _push_to_clipboard(self, value: RegisterValue):
         self._clipboard.add(value)
+        self.save_later({'op': 'clipboard', 'value': value})
+
+    def set_clipboard_size(self, size: int) -> None:
+        if size == self._clipboard.size:
+            return
+
+        self._clipboard.size = size
         self.registers.clipboard = self._clipboard.history
-        self.registers_file.save(self.registers)
+        self.save_later()
 
-    def add_mark(self, key: str, text: str, pos: int) -> None:
-        self.registers.marks[key] = Mark(position=pos, line=text)
+    def save(self) -> None:
+        """Write the registers file now."""
+        self._save_timer.stop()
+        self._dirty = False
+        self._changes = []
         self.registers_file.save(self.registers)
+        self._prune_payloads()
+
+    def save_later(self, change: Optional[Change] = None) -> None:
+        """Mark the registers as changed and write them after `SAVE_DELAY` ms.
+
+        Without a change (e.g. the registers were edited in place) all the
+        registers are written.
+        """
+        if change is None or self._changes is None:
+            self._changes = None
+        else:
+            self._changes.append(change)
+
+        self._dirty = True
+
+        # without an event loop (e.g. the headless editor) the registers are
+        # written by `flush`, at the latest when Python exits
+        if QCoreApplication.instance() is not None:
+            self._save_timer.start()
+
+    def flush(self) -> None:
+        """Write the registers file if there are unsaved changes."""
+        if not self._dirty:
+            return
+
+        if self._changes is None:
+            self.save()
+            return
+
+        self._save_timer.stop()
+        compacted = self.registers_file.append(self.registers, self._changes)
+        self._dirty = False
+        self._changes = []
+
+        if compacted:
+            self._prune_payloads()
+
+    def add_mark(self, key: str, text: str, pos: int, save: bool = True) -> None:
+        mark = self.registers.marks[key] = Mark(position=pos, line=text)
+        if save:
+            self.save_later({'op': 'mark', 'key': key, 'value': mark})
+
+    def save_mark(self, key: str) -> None:
+        """Write the mark, changed in place, with the next changes."""
+        mark = self.registers.marks.get(key)
+        if mark is not None:
+            self.save_later({'op': 'mark', 'key': key, 'value': mark})
 
     def get_mark(self, key: str) -> Optional[Mark]:
         return self.registers.marks.get(key)
 
     def add_last_search(self, value: str) -> None:
         self.registers.last_search = value
+        self.save_later({'op': 'last_search', 'value': value})
         self._push_to_clipboard(value)
 
     def set_named_register(self, key: str) -> None:
         self._named_register = key
 
+    def set_named_register_value(self, key: str, value: str) -> None:
+        value = self.registers.named[key] = self._store(value)
+        self.save_later({'op': 'named', 'key': key, 'value': value})
+
     def get_numbered_register_value(self, index: int) -> Optional[str]:
         try:
-            return self.registers.clipboard[index]
+            return resolve(self.registers.clipboard[index])
         except IndexError:
             return None
 
@@ -133,36 +521,40 @@ def get_named_register_value(self) -> Optional[str]:
         key = self._named_register
 
         if not key:
-            return self.registers.clipboard[0]
+            return resolve(self.registers.clipboard[0])
 
         if key == '/':
             return self.registers.last_search
 
-        return self.registers.named.get(key)
+        value = self.registers.named.get(key)
+        return resolve(value) if value is not None else None
 
     def add(self, value: str) -> None:
         if value.isspace():
             return
 
+        stored = self._store(value)
+
         if self._named_register:
-            self.registers.named[self._named_register] = value
+            self.registers.named[self._named_register] = stored
+            self.save_later({'op': 'named', 'key': self._named_register, 'value': stored})
 
-        self._push_to_clipboard(value)
+        self._push_to_clipboard(stored)
         self._named_register = None
 
     def clear(self) -> None:
 
         self.registers.marks = {}
         self.registers.named = {}
-        self.registers.clipboard = []
+        self._clipboard.history.clear()
         self.registers.last_search = ''
 
-        self.registers_file.save(self.registers)
+        self.save()
 
-    def get_clipboard(self) -> List[str]:
+    def get_clipboard(self) -> MutableSequence[RegisterValue]:
         return self.registers.clipboard
 
-    def get_named_register(self) -> Dict[str, str]:
+    def get_named_register(self) -> Dict[str, RegisterValue]:
         return self.registers.named
 
     def get_marks(self) -> Dict[str, Mark]:
@@ -175,4 +567,13 @@ def get_register():
     return pathlib.Path(path) / 'registers.json'
 
 
-Registers = _Registers(RegisterFile(get_register()))
+def get_register_file() -> RegisterFileInterface:
+    register_file = RegisterFile(get_register())
+    if Settings.journal_registers:
+        return JournalRegisterFile(get_register().with_suffix('.journal'), register_file)
+    return register_file
+
+
+Registers = _Registers(get_register_file(), PayloadStore(
+    get_register().parent / 'registers_payloads'))
+atexit.register(Registers.flush)
@@ -12,7 +12,7 @@
                                QStyledItemDelegate)
 
 from .settings import Settings
-from .registers import Registers
+from .registers import Payload, Registers, RegisterValue, resolve
 
 # TODO: Test this module
 # TODO: Implement elided text delegate
@@ -22,8 +22,15 @@
 
 @dataclass
 class PreviewData:
-    text: str
-    value: str
+    # a `Payload` is only read when the item is selected
+    text: RegisterValue
+    value: RegisterValue
+
+
+def preview_label(value: RegisterValue) -> str:
+    if isinstance(value, Payload):
+        return f'{value.head(80).strip()}...'
+    return value.strip()
 
 
 RegisterItem = Dict[str, PreviewData]
@@ -140,7 +147,7 @@ def _press_enter_event(self):
         # is found. Keep it simple.
 
         self.search_bar.clear()
-        self.text_value = data.value
+        self.text_value = resolve(data.value)
         self.accept()
         return True
 
@@ -199,7 +206,7 @@ def _on_item_clicked(self, index: QModelIndex):
         data = self.list_view.get_item_data(index)
         if not data:
             return
-        self.view.text_preview.setPlainText(data.text)
+        self.view.text_preview.setPlainText(resolve(data.text))
 
     def init(self, name: str, items: RegisterItem):
         self.view.search_bar.clear()
@@ -261,7 +268,7 @@ def __init__(self):
 
     def prepare_items(self) -> RegisterItem:
         return {
-            v.strip(): PreviewData(v.strip(), v)
+            preview_label(v): PreviewData(v if isinstance(v, Payload) else v.strip(), v)
             for v in Registers.get_clipboard()
         }
 
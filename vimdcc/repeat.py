@@ -0,0 +1,76 @@
+"""The last change of the buffer, repeated by `.`.
+
+After a command that changes the text, the event filter records the handler
+that executed it with its resolved key sequence, mode and count. When the
+command ends in insert mode, the text typed until `<Esc>` is recorded too. `.`
+then calls the handler directly, without parsing the keys again, and inserts
+the recorded text.
+
+"""
+from typing import Any, List, Optional
+
+from PySide2.QtGui import Qt, QKeyEvent
+
+from .handler_parameters import HandlerParams
+
+
+class Change:
+    """A command that changed the text and the text inserted after it."""
+    __slots__ = ('handler', 'params', 'text')
+
+    def __init__(self, handler: Any, params: HandlerParams):
+        self.handler = handler
+        self.params = params
+        self.text = ''
+
+
+class ChangeRecorder:
+    """Record the last change and the keys typed in the insert mode after it."""
+
+    def __init__(self):
+        self.change: Optional[Change] = None
+        self._inserting = False
+        self._text: List[str] = []
+
+    def record(self, handler: Any, params: HandlerParams, inserting: bool) -> None:
+        """Record the command executed by the handler.
+
+        Args:
+            handler: The handler that executed the command.
+            params: The parameters the command was executed with.
+            inserting: True if the command switched to the insert mode, the
+                text typed until `finish_insert` is then part of the change.
+        """
+        event = params.event
+        if event is not None:
+            # Qt deletes the event after the delivery, so keep a copy
+            event = QKeyEvent(event.type(), event.key(), event.modifiers(), event.text())
+
+        self.change = Change(handler, params.replace(event=event))
+        self._inserting = inserting
+        self._text = []
+
+    def record_key(self, event: QKeyEvent) -> None:
+        """Record a key typed in the insert mode."""
+        if not self._inserting:
+            return
+
+        key = event.key()
+        if key == Qt.Key_Backspace:
+            if self._text:
+                self._text.pop()
+        elif key in (Qt.Key_Return, Qt.Key_Enter):
+            self._text.append('\n')
+        elif event.text().isprintable() or key == Qt.Key_Tab:
+            self._text.append(event.text())
+
+    def finish_insert(self) -> None:
+        """Store the text typed since the change in the change."""
+        if self._inserting and self.change is not None:
+            self.change.text = ''.join(self._text)
+
+        self._inserting = False
+        self._text = []
+
+
+LastChange = ChangeRecorder()
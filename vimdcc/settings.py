@@ -11,9 +11,13 @@
 class VimDccSettings:
     launch_on_startup: bool = field(init=False, default=False)
     clipboard_size: int = field(init=False, default=100)
+    timeoutlen: int = field(init=False, default=1000)
     install_to_all_editors: bool = field(init=False, default=False)
     previewer_auto_insert: bool = field(init=False, default=True)
     copy_to_system_clipboard: bool = field(init=False, default=True)
+    journal_registers: bool = field(init=False, default=False)
+    record_latency: bool = field(init=False, default=False)
+    profiler_collapsed_stacks: bool = field(init=False, default=False)
 
     def __post_init__(self):
         self._load_settings()
@@ -1,3 +1,3 @@
 from .cache import cache, clear_cache
 from .theme import set_theme
-from .profiling import profile
+from .profiling import Profiler, SessionProfiler
@@ -1,21 +1,158 @@
-def profile(func):
-    import io
-    import time
-    import pstats
-    import cProfile
-    from pstats import SortKey
-
-    def inner(*args, **kwargs):
-        pr = cProfile.Profile()
-        pr.enable()
-        value = func(*args, **kwargs)
-        pr.disable()
-        s = io.StringIO()
-        sortby = SortKey.CUMULATIVE
-        ps = pstats.Stats(pr, stream=s).sort_stats(sortby)
-        ps.print_stats()
-        with open('profile.log', 'w') as f:
-            f.write(s.getvalue())
-        # print(s.getvalue())
-        return value
-    return inner
+"""Session profiler that can be started and stopped while editing.
+
+The profiler is only enabled while the event filters handle an event, so the
+stats of a whole editing session are accumulated without the idle time in
+between key presses. When stopped, the stats are written to timestamped files
+in the logs directory:
+
+- `profile-<timestamp>.prof`: the raw `pstats` data (e.g. for snakeviz).
+- `profile-<timestamp>.txt`: the stats sorted by cumulative time.
+- `profile-<timestamp>.collapsed`: optional collapsed stacks for flamegraph.pl,
+  speedscope, etc.
+
+"""
+import io
+import pstats
+import pathlib
+import cProfile
+from typing import Dict, List, Tuple, Iterator, Optional
+from datetime import datetime
+from contextlib import contextmanager
+
+LOG_DIR = pathlib.Path(__file__).parent.parent.parent / 'logs'
+
+FunctionKey = Tuple[str, int, str]
+
+
+def _function_name(func: FunctionKey) -> str:
+    filename, line, name = func
+    if filename == '~':
+        return name
+    return f'{pathlib.Path(filename).name}:{line}:{name}'
+
+
+def collapsed_stacks(stats: pstats.Stats) -> List[str]:
+    """Convert the stats to the collapsed stack format (`a;b;c <microseconds>`).
+
+    cProfile only records the caller/callee pairs and not the full stacks, so
+    the time of a function called from many places is split among its callers
+    in proportion to the time of each call. The result is an estimate, good
+    enough to spot the hot paths.
+    """
+    raw: Dict[FunctionKey, tuple] = stats.stats  # type: ignore
+    children: Dict[FunctionKey, Dict[FunctionKey, float]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, (_, _, _, cumulative) in callers.items():
+            children.setdefault(caller, {})[func] = cumulative
+
+    lines: Dict[str, float] = {}
+
+    def walk(func: FunctionKey, time: float, stack: List[str], seen: set):
+        _, _, total, cumulative, _ = raw[func]
+        if cumulative <= 0:
+            return
+
+        stack = [*stack, _function_name(func)]
+        scale = min(time / cumulative, 1.0)
+
+        self_time = total * scale
+        if self_time > 0:
+            key = ';'.join(stack)
+            lines[key] = lines.get(key, 0) + self_time
+
+        for child, child_time in children.get(func, {}).items():
+            if child in seen or child not in raw:
+                continue
+            walk(child, child_time * scale, stack, seen | {child})
+
+    for func, (_, _, _, cumulative, callers) in raw.items():
+        if not callers:
+            walk(func, cumulative, [], {func})
+
+    return [
+        f'{stack} {round(seconds * 1e6)}'
+        for stack, seconds in lines.items()
+        if round(seconds * 1e6) > 0
+    ]
+
+
+class SessionProfiler:
+    """Accumulate the profile of the event filters between `start` and `stop`.
+
+    The event filters wrap the handling of each key press in `profile`:
+
+        Profiler.start()
+        with Profiler.profile():
+            handle_event()
+        Profiler.stop()  # logs/profile-20231102-101010-123456.prof
+
+    """
+
+    def __init__(self, log_dir: pathlib.Path = LOG_DIR):
+        self.log_dir = log_dir
+        self._profile: Optional[cProfile.Profile] = None
+        self._depth = 0
+
+    @property
+    def running(self) -> bool:
+        return self._profile is not None
+
+    def start(self) -> None:
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+
+    @contextmanager
+    def profile(self) -> Iterator[None]:
+        """Profile the body when the profiler is running."""
+        profile = self._profile
+        if profile is None or self._depth:
+            yield
+            return
+
+        self._depth += 1
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._depth -= 1
+
+    def stop(self, collapsed: bool = False) -> Optional[pathlib.Path]:
+        """Stop the profiler and write the stats, return the `.prof` path.
+
+        Returns None when the profiler was not running or nothing was recorded.
+        """
+        profile = self._profile
+        self._profile = None
+        if profile is None:
+            return None
+
+        profile.create_stats()
+        if not profile.stats:  # type: ignore
+            return None
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        path = self.log_dir / f'profile-{datetime.now():%Y%m%d-%H%M%S-%f}.prof'
+
+        profile.dump_stats(str(path))
+
+        stream = io.StringIO()
+        stats = pstats.Stats(profile, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats()
+        path.with_suffix('.txt').write_text(stream.getvalue())
+
+        if collapsed:
+            path.with_suffix('.collapsed').write_text('\n'.join(collapsed_stacks(stats)) + '\n')
+
+        return path
+
+    def toggle(self, collapsed: bool = False) -> Optional[pathlib.Path]:
+        """Start the profiler or stop it and return the path of the stats."""
+        if self.running:
+            return self.stop(collapsed)
+
+        self.start()
+        return None
+
+
+Profiler = SessionProfiler()